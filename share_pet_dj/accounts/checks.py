@@ -0,0 +1,36 @@
+from django.apps import apps
+from django.core import checks
+from django.db import models
+
+from core.db_routers import AccountsRouter
+
+
+def check_identity_relations(app_configs, **kwargs) -> list[checks.Error]:
+    """
+    Foreign keys of other apps to identity models cross databases,
+    so they must have neither a constraint nor a cascade.
+    """
+    identity_apps = AccountsRouter.route_app_labels
+    errors = []
+
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.app_label in identity_apps:
+            continue
+
+        for field in model._meta.local_fields:
+            if (not field.many_to_one or
+                    field.related_model._meta.app_label not in identity_apps):
+                continue
+
+            if (field.db_constraint or
+                    field.remote_field.on_delete is not models.DO_NOTHING):
+                errors.append(checks.Error(
+                    f'{field} points to an identity model '
+                    f'of another database.',
+                    hint='Use db_constraint=False and '
+                         'on_delete=models.DO_NOTHING.',
+                    obj=field,
+                    id='accounts.E001',
+                ))
+
+    return errors
@@ -10,6 +10,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.sites.shortcuts import get_current_site
 from django.urls import reverse
 
+from config.settings import AVATAR_MAX_PIXELS
 from .services.repository import AccountRepository
 
 
@@ -25,13 +26,25 @@ class SignupUserForm(AllauthSignupForm, forms.ModelForm):
             'username', 'email',
         )
 
+    def clean_avatar(self):
+        avatar = self.cleaned_data['avatar']
+
+        if avatar is not None:
+            width, height = avatar.image.size
+
+            if width * height > AVATAR_MAX_PIXELS:
+                raise forms.ValidationError(_('The image is too large.'))
+
+        return avatar
+
     def save(self, request):
+        from .services.services import AvatarService
+
         user = super().save(request)
         file = self.cleaned_data['avatar']
-        account_repository = AccountRepository()
 
         if file is not None:
-            account_repository.update_avatar(user, file.name, file, save=True)
+            AvatarService().update_avatar(user, file)
 
         return user
 
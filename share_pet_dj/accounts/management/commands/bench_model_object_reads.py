@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.forms import model_to_dict
+
+from accounts.models import Setting
+from accounts.services.data_structures import (
+    AccountProfileData, NotificationProfileData, SettingProfileData
+)
+from config.settings import ACCOUNTS_DATABASE
+from core.repository import ModelObject
+from notifications.models import Notification
+
+Account = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare full-row reads with `model_to_dict` against projection '
+        'reads of `ModelObject` for the profile repositories.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5_000)
+
+    @staticmethod
+    def _time_per_call(func, iterations: int) -> float:
+        start = time.perf_counter()
+
+        for _ in range(iterations):
+            func()
+
+        return (time.perf_counter() - start) / iterations * 1_000_000
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        with transaction.atomic(using=ACCOUNTS_DATABASE):
+            account = Account.objects.create(
+                username='bench_model_object', email='bench@example.com')
+            cases = (
+                (Account, AccountProfileData._fields, {'pk': account.pk}),
+                (Setting, SettingProfileData._fields,
+                 {'account_id': account.pk}),
+                (Notification, NotificationProfileData._fields,
+                 {'setting__account_id': account.pk}),
+            )
+
+            for model, fields, lookup in cases:
+                model_object = ModelObject(model)
+                full_row = self._time_per_call(
+                    lambda: model_to_dict(
+                        model.objects.get(**lookup), fields=fields),
+                    iterations
+                )
+                projection = self._time_per_call(
+                    lambda: model_object.get_model_object(fields, **lookup),
+                    iterations
+                )
+                self.stdout.write(
+                    f'{model.__name__:>12}: full row {full_row:8.1f} us, '
+                    f'projection {projection:8.1f} us '
+                    f'({full_row / projection:.2f}x)'
+                )
+
+            transaction.set_rollback(True, using=ACCOUNTS_DATABASE)
@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Callable
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections, router
+from django.utils import timezone
+
+from chats.models import Chat, Message
+
+Account = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure throughput of identity writes and chat writes alone '
+        'and together, to see whether they contend for one database. '
+        'Created rows are deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--threads', type=int, default=4)
+
+    @staticmethod
+    def _run_workers(works: list[Callable[[], None]], threads: int,
+                     seconds: float) -> list[int]:
+        """Run every work in `threads` threads, return their counts."""
+        deadline = time.monotonic() + seconds
+        counts = [0] * len(works)
+        lock = threading.Lock()
+
+        def worker(number: int) -> None:
+            done = 0
+
+            try:
+                while time.monotonic() < deadline:
+                    works[number]()
+                    done += 1
+            finally:
+                connections.close_all()
+
+            with lock:
+                counts[number] += done
+
+        workers = [
+            threading.Thread(target=worker, args=(number,))
+            for number in range(len(works))
+            for _ in range(threads)
+        ]
+
+        for thread in workers:
+            thread.start()
+
+        for thread in workers:
+            thread.join()
+
+        return counts
+
+    def handle(self, *args, **options):
+        seconds, threads = options['seconds'], options['threads']
+        account = Account.objects.create(username='bench_partition_user')
+        chat = Chat.objects.create(name='bench_partition_chat')
+
+        def write_identity() -> None:
+            Account.objects.filter(pk=account.pk).update(
+                last_login=timezone.now())
+
+        def write_chat() -> None:
+            Message.objects.create(
+                chat_id=chat.pk, sender_id=account.pk, text='bench')
+
+        self.stdout.write(
+            f'identity: {router.db_for_write(Account)}, '
+            f'chats: {router.db_for_write(Message)}'
+        )
+
+        try:
+            alone = [
+                self._run_workers([work], threads, seconds)[0]
+                for work in (write_identity, write_chat)
+            ]
+            together = self._run_workers(
+                [write_identity, write_chat], threads, seconds)
+        finally:
+            chat.delete()
+            account.delete()
+
+        for name, alone_count, together_count in zip(
+                ('identity', 'chats'), alone, together):
+            slowdown = (1 - together_count / max(alone_count, 1)) * 100
+            self.stdout.write(
+                f'{name:>8}: alone {alone_count / seconds:9.1f}/s, '
+                f'together {together_count / seconds:9.1f}/s, '
+                f'slowdown {slowdown:5.1f} %'
+            )
@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from config.settings import ACCOUNTS_DATABASE
+
+Account = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare request latency of signed in requests with the database '
+        'and the Redis session engines. Data is rolled back.'
+    )
+    engines = (
+        'django.contrib.sessions.backends.db',
+        'core.sessions',
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1_000)
+        parser.add_argument('--url', default=reverse('profile'))
+
+    def _time_requests(self, engine: str, account: Account,
+                       url: str, requests: int) -> list[float]:
+        with override_settings(SESSION_ENGINE=engine,
+                               ALLOWED_HOSTS=['testserver']):
+            client = Client()
+            client.force_login(account)
+            client.get(url)
+            timings = []
+
+            for _ in range(requests):
+                start = time.perf_counter()
+                client.get(url)
+                timings.append(time.perf_counter() - start)
+
+        return sorted(timings)
+
+    def handle(self, *args, **options):
+        with transaction.atomic(using=ACCOUNTS_DATABASE):
+            account = Account.objects.create(username='bench_session_user')
+
+            for engine in self.engines:
+                timings = self._time_requests(
+                    engine, account, options['url'], options['requests'])
+                average = sum(timings) / len(timings) * 1000
+                p95 = timings[int(len(timings) * 0.95) - 1] * 1000
+                self.stdout.write(
+                    f'{engine:>40}: average {average:7.2f} ms, '
+                    f'p95 {p95:7.2f} ms'
+                )
+
+            transaction.set_rollback(True, using=ACCOUNTS_DATABASE)
@@ -0,0 +1,88 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.services.repository import AccountRepository
+from accounts.services.services import UsernameAvailabilityService
+from config.settings import ACCOUNTS_DATABASE
+
+Account = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the username availability check while the account '
+        'table grows. Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=1_000_000)
+        parser.add_argument('--checks', type=int, default=1_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument(
+            '--scan-limit', type=int, default=100_000,
+            help='Also time the old full-table scan up to this many rows.'
+        )
+
+    @staticmethod
+    def _get_checkpoints(total: int) -> list[int]:
+        checkpoints = []
+        size = 1_000
+
+        while size < total:
+            checkpoints.append(size)
+            size *= 10
+
+        return checkpoints + [total]
+
+    @staticmethod
+    def _time_per_call(func, checks: int) -> float:
+        start = time.perf_counter()
+
+        for i in range(checks):
+            func(f'bench_user_{i * 7919}')
+
+        return (time.perf_counter() - start) / checks * 1_000_000
+
+    @staticmethod
+    def _scan(username: str) -> bool:
+        accounts = Account.objects.values_list('id', 'username').iterator()
+        return any(account[1] == username for account in accounts)
+
+    def _insert_accounts(self, start: int, stop: int, batch_size: int):
+        for batch_start in range(start, stop, batch_size):
+            batch_stop = min(batch_start + batch_size, stop)
+            Account.objects.bulk_create(
+                Account(username=f'bench_user_{i}', password='')
+                for i in range(batch_start, batch_stop)
+            )
+
+    def handle(self, *args, **options):
+        repository = AccountRepository()
+        service = UsernameAvailabilityService()
+        created = Account.objects.count()
+
+        with transaction.atomic(using=ACCOUNTS_DATABASE):
+            for checkpoint in self._get_checkpoints(options['accounts']):
+                self._insert_accounts(
+                    created, checkpoint, options['batch_size'])
+                created = max(created, checkpoint)
+
+                indexed = self._time_per_call(
+                    repository.is_username_taken, options['checks'])
+                available = self._time_per_call(
+                    service.is_available, options['checks'])
+                line = (f'{checkpoint:>10} accounts: '
+                        f'indexed lookup {indexed:8.1f} us, '
+                        f'availability {available:8.1f} us')
+
+                if checkpoint <= options['scan_limit']:
+                    scan = self._time_per_call(
+                        self._scan, max(1, options['checks'] // 100))
+                    line += f', full scan {scan:10.1f} us'
+
+                self.stdout.write(line)
+
+            transaction.set_rollback(True, using=ACCOUNTS_DATABASE)
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.services.data_structures import AccountImportReport
+from accounts.services.services import AccountImportService
+
+
+class Command(BaseCommand):
+    help = (
+        'Import accounts from a CSV or NDJSON file with the columns '
+        'username, email, password, first_name and last_name.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument(
+            '--format', choices=('csv', 'ndjson'),
+            help='Taken from the file extension by default.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers', type=int,
+            help='Password hashing processes, CPU count by default.'
+        )
+        parser.add_argument(
+            '--verified', action='store_true',
+            help='Mark imported emails as verified.'
+        )
+
+    def _write_report(self, report: AccountImportReport) -> None:
+        self.stdout.write(
+            f'{report.created} created, {report.skipped} skipped, '
+            f'{report.rows_per_second:.0f} rows/sec'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+
+        if file_format not in ('csv', 'ndjson', 'jsonl'):
+            raise CommandError(f'Unknown file format: {file_format}.')
+
+        import_service = AccountImportService(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            verified=options['verified'],
+            on_batch=self._write_report,
+        )
+
+        with path.open(newline='') as file:
+            rows = (import_service.read_csv(file) if file_format == 'csv'
+                    else import_service.read_ndjson(file))
+            report = import_service.execute(rows)
+
+        self._write_report(report)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported in {report.seconds:.1f} seconds.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from accounts.services.repository import UsernameFilter
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the Redis bloom filter of taken usernames.'
+
+    def handle(self, *args, **options):
+        count = UsernameFilter().rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Username filter rebuilt with {count} usernames.'))
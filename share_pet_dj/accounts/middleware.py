@@ -0,0 +1,57 @@
+from channels.auth import AuthMiddleware
+from channels.db import database_sync_to_async
+from channels.sessions import CookieMiddleware, SessionMiddleware
+from django.contrib.auth import logout
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.http import HttpResponseForbidden
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext as _
+
+from accounts.services.services import BanService, PrincipalService
+
+
+class PrincipalAuthenticationMiddleware(AuthenticationMiddleware):
+    """`request.user` from the session principal."""
+    _principal_service = PrincipalService()
+
+    def process_request(self, request):
+        request.user = SimpleLazyObject(
+            lambda: self._principal_service.get_user(request.session))
+
+
+class BanMiddleware:
+    """Sign banned accounts out without a query."""
+    _ban_service = BanService()
+
+    def __init__(self, get_response):
+        self._get_response = get_response
+
+    def __call__(self, request):
+        user = request.user
+
+        if user.is_authenticated and self._ban_service.is_banned(user.pk):
+            logout(request)
+            return HttpResponseForbidden(_('Your account is banned.'))
+
+        return self._get_response(request)
+
+
+class PrincipalAuthMiddleware(AuthMiddleware):
+    """`scope['user']` of websockets from the session principal."""
+    _principal_service = PrincipalService()
+
+    def _get_user(self, session):
+        user = self._principal_service.get_user(session)
+
+        if session.modified:
+            session.save()
+
+        return user
+
+    async def resolve_scope(self, scope):
+        scope['user']._wrapped = await database_sync_to_async(
+            self._get_user)(scope['session'])
+
+
+def PrincipalAuthMiddlewareStack(inner):
+    return CookieMiddleware(SessionMiddleware(PrincipalAuthMiddleware(inner)))
@@ -1,8 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
-from django_resized import ResizedImageField
 
 from notifications.models import Notification
 from .managers import AccountManager
@@ -21,8 +21,12 @@ class Account(AbstractUser):
     """
     username_validator = UnicodeUsernameValidator()
 
-    avatar = ResizedImageField(
+    avatar = models.ImageField(
         _('avatar'), upload_to='accounts/%Y/%m/%d', blank=True, null=True)
+    avatar_variants = models.JSONField(
+        _('avatar variants'), default=dict, blank=True, editable=False,
+        help_text=_('Resized copies of the avatar by size and format.')
+    )
     username = models.CharField(
         _('username'), max_length=150, unique=True, blank=True, null=True,
         help_text=_(
@@ -46,23 +50,37 @@ class Account(AbstractUser):
     )
     date_baned = models.DateTimeField(_('date baned'), blank=True, null=True)
 
+    # `date_baned` as it was read or last saved.
+    saved_date_baned = None
+
     objects = AccountManager()
 
     class Meta:
         db_table = 'account'
         ordering = 'date_joined',
+        indexes = [
+            models.Index(Upper('username'), name='account_username_upper_idx'),
+        ]
         verbose_name = _('account')
         verbose_name_plural = _('accounts')
 
     def __str__(self):
         return self.username or self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        account = super().from_db(db, field_names, values)
+        account.saved_date_baned = account.date_baned
+        return account
+
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         super().save(*args, **kwargs)
 
-        if not self.pk:
-            setting = Setting.objects.create(account=self)
-            Notification.objects.create(setting=setting)
+        if adding:
+            db = self._state.db
+            setting = Setting.objects.using(db).create(account=self)
+            Notification.objects.using(db).create(setting=setting)
 
 
 class Setting(models.Model):
@@ -1,6 +1,78 @@
-from typing import NamedTuple
+from typing import Any, NamedTuple
 
 
 class AccountData(NamedTuple):
     pk: str | None = None
     username: str | None = None
+
+
+class AccountProfileData(NamedTuple):
+    username: str | None
+    first_name: str
+    last_name: str
+    email: str | None
+    avatar: Any
+
+
+class SettingProfileData(NamedTuple):
+    language: str
+    status: str
+
+
+class NotificationProfileData(NamedTuple):
+    signup: bool
+    login: bool
+    changing_profile: bool
+    changing_setting: bool
+    sb_liked_comment: bool
+    sb_replied_to_comment: bool
+    sb_liked_article: bool
+    new_comment: bool
+    sb_liked_animal: bool
+    new_message: bool
+    deal_start: bool
+    deal_timeout: bool
+    deal_finish: bool
+    refill: bool
+
+
+class ProfileSnapshot(NamedTuple):
+    """Account, setting and notification data loaded at once."""
+    pk: int
+    setting_pk: int
+    notification_pk: int
+    account: AccountProfileData
+    setting: SettingProfileData
+    notification: NotificationProfileData
+
+
+class AccountImportData(NamedTuple):
+    username: str | None
+    email: str
+    password: str | None
+    first_name: str = ''
+    last_name: str = ''
+
+
+class AccountImportReport(NamedTuple):
+    created: int
+    skipped: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.created / self.seconds if self.seconds else 0.0
+
+
+class AccountPrincipal(NamedTuple):
+    """What most requests need to know about the signed in account."""
+    pk: int
+    username: str
+    setting_pk: int | None
+    is_superuser: bool
+    is_staff: bool
+    is_administrator: bool
+    is_active: bool
+    is_banned: bool
+    language: str
+    versions: tuple
@@ -2,38 +2,36 @@
 This module is used for working with
 domain logic in the app.
 """
-from typing import Generator, Sequence
+from typing import Sequence
 
 from config.settings import ACCOUNT_USERNAME_BLACKLIST
-from .data_structures import AccountData
+
+USERNAME_BLACKLIST = frozenset(
+    username.casefold() for username in ACCOUNT_USERNAME_BLACKLIST
+)
 
 
 class AccountDomain:
     @staticmethod
+    def is_username_blacklisted(username: str) -> bool:
+        return username.casefold() in USERNAME_BLACKLIST
+
     def is_username_valid(
-            pk: int, username: str,
-            accounts: Generator[AccountData, None, None]
+            self, username: str, is_taken: bool
     ) -> list[dict[str, Sequence[str]]]:
         errors = []
 
-        for account in accounts:
-            if account.pk == pk:
-                continue
-
-            if account.username == username:
-                errors.append({
-                    'field': 'username',
-                    'error_messages': ['A user with that username '
-                                       'already exists.']
-                })
-                break
-
-            if username in ACCOUNT_USERNAME_BLACKLIST:
-                errors.append({
-                    'field': 'username',
-                    'error_messages': ['Username can not be used. '
-                                       'Please use other username.']
-                })
-                break
+        if is_taken:
+            errors.append({
+                'field': 'username',
+                'error_messages': ['A user with that username '
+                                   'already exists.']
+            })
+        elif self.is_username_blacklisted(username):
+            errors.append({
+                'field': 'username',
+                'error_messages': ['Username can not be used. '
+                                   'Please use other username.']
+            })
 
         return errors
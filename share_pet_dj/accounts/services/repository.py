@@ -4,26 +4,50 @@ with data in the app.
 
 For example, Django ORM or sessions.
 """
-from typing import Generator, Type
+from typing import Iterable
 
+from allauth.account.models import EmailAddress
 from django.contrib.auth import get_user_model
-from django.contrib.auth.base_user import AbstractBaseUser
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Upper
+from redis import RedisError
 
 from accounts.models import Setting
-from accounts.services.data_structures import AccountData
-from core.repository import ModelObject
+from accounts.services.data_structures import (
+    AccountImportData, AccountPrincipal, AccountProfileData,
+    NotificationProfileData, ProfileSnapshot, SettingProfileData
+)
+from config.settings import ACCOUNTS_DATABASE, MODEL_OBJECT_CACHE_TIMEOUT
+from core.bloom_filter import RedisBloomFilter
+from core.db_routers import replica_read
+from core.replicated_set import ReplicatedIdSet
+from core.repository import CacheStats, ModelObject, ModelObjectCache
+from notifications.models import Notification
 
 Account = get_user_model()
 
 
 class AccountUpdate:
     """Logic for updating account model."""
-    _model_object = ModelObject(Account)
+    _model_object = ModelObject(Account, MODEL_OBJECT_CACHE_TIMEOUT)
 
     @staticmethod
-    def update_avatar(account: Account, *args, **kwargs) -> None:
-        account.avatar.save(*args, **kwargs)
-        account.save()
+    def update_avatar(account: Account, name: str, content) -> None:
+        """Store the original avatar, its variants are made later."""
+        account.avatar.save(name, content, save=False)
+        account.avatar_variants = {}
+        account.save(update_fields=('avatar', 'avatar_variants'))
+
+    @staticmethod
+    def update_avatar_variants(
+            pk: int, avatar_name: str, variants: dict) -> bool:
+        """Save variants unless the avatar was replaced meanwhile."""
+        updated = Account.objects.filter(pk=pk, avatar=avatar_name).update(
+            avatar_variants=variants)
+        ModelObjectCache.invalidate_model_object(Account, pk)
+
+        return bool(updated)
 
     def update_fields_by_pk(self, pk: int, **kwargs) -> None:
         self._model_object.update_fields_by_pk(pk, **kwargs)
@@ -31,32 +55,212 @@ class AccountUpdate:
 
 class AccountGet:
     """Logic for getting account model."""
-    _model_object = ModelObject(Account)
+    _model_object = ModelObject(Account, MODEL_OBJECT_CACHE_TIMEOUT)
 
+    @replica_read
     def get_account(self, fields: tuple, **kwargs) -> dict:
         return self._model_object.get_model_object(fields, **kwargs)
 
+    @replica_read
     def get_pure_account(self, *args, **kwargs) -> Account:
         return self._model_object.get_pure_model_object(*args, **kwargs)
 
+    def load_account(self, pk: int) -> Account:
+        return self._model_object.load_model_object(pk)
+
+    def load_accounts(self, pks: Iterable[int]) -> list[Account | None]:
+        return self._model_object.load_model_objects(pks)
+
     @staticmethod
-    def get_all_with_fields(fields: tuple[str, str]) \
-            -> Generator[AccountData, None, None]:
-        for model in Account.objects.values(*fields):
-            # todo: other fields
-            yield AccountData(
-                pk=model.get('id'),
-                username=model.get('username'),
+    def is_username_taken(username: str, exclude_pk: int | None = None) \
+            -> bool:
+        """Case-insensitive lookup served by `account_username_upper_idx`."""
+        accounts = Account.objects.filter(username__iexact=username)
+
+        if exclude_pk is not None:
+            accounts = accounts.exclude(pk=exclude_pk)
+
+        return accounts.exists()
+
+
+class PrincipalRepository:
+    """
+    Logic for `AccountPrincipal` of an account.
+
+    A principal is valid while the account and setting rows
+    keep the cache versions it was read at.
+    """
+    _account_cache = ModelObjectCache.for_model(
+        Account, MODEL_OBJECT_CACHE_TIMEOUT)
+    _setting_cache = ModelObjectCache.for_model(
+        Setting, MODEL_OBJECT_CACHE_TIMEOUT)
+
+    def get_versions(self, pk: int, setting_pk: int | None) -> tuple:
+        return ModelObjectCache.get_many_versions((
+            (self._account_cache, pk), (self._setting_cache, setting_pk)))
+
+    @staticmethod
+    def _get_version(model_object_cache: ModelObjectCache,
+                     pk: int | None) -> int | None:
+        if pk is None:
+            return None
+
+        try:
+            return model_object_cache.get_version(pk)
+        except RedisError:
+            return None
+
+    def get_principal(self, pk: int) -> AccountPrincipal:
+        # The account version is read before the query, so a concurrent
+        # write can only make the principal stale, never wrong.
+        account_version = self._get_version(self._account_cache, pk)
+        username, *flags, date_baned, setting_pk, language = (
+            Account.objects.filter(pk=pk).values_list(
+                'username', 'is_superuser', 'is_staff', 'is_administrator',
+                'is_active', 'date_baned', 'setting__id', 'setting__language'
+            ).get()
+        )
+        setting_version = self._get_version(self._setting_cache, setting_pk)
+
+        return AccountPrincipal(
+            pk, username, setting_pk, *flags, is_banned=date_baned is not None,
+            language=language or 'en',
+            versions=(account_version, setting_version)
+        )
+
+
+class AccountBulkCreate:
+    """
+    Logic for creating many accounts at once.
+
+    Every account gets its `Setting` and `Notification`
+    in the same transaction, like one created by `Account.save`.
+    """
+    @staticmethod
+    def get_taken(usernames: list[str], emails: list[str]) \
+            -> tuple[set[str], set[str]]:
+        taken_usernames = set(
+            Account.objects.annotate(upper_username=Upper('username'))
+            .filter(upper_username__in=[name.upper() for name in usernames])
+            .values_list('upper_username', flat=True)
+        )
+        taken_emails = set(
+            Account.objects.filter(email__in=emails)
+            .values_list('email', flat=True)
+        )
+        return taken_usernames, taken_emails
+
+    @staticmethod
+    @transaction.atomic(using=ACCOUNTS_DATABASE)
+    def bulk_create_accounts(
+            accounts_data: list[AccountImportData],
+            password_hashes: list[str], verified: bool = False
+    ) -> list[Account]:
+        accounts = Account.objects.bulk_create(
+            Account(
+                username=account_data.username,
+                email=account_data.email,
+                password=password_hash,
+                first_name=account_data.first_name,
+                last_name=account_data.last_name,
+            )
+            for account_data, password_hash in zip(
+                accounts_data, password_hashes)
+        )
+        settings = Setting.objects.bulk_create(
+            Setting(account=account) for account in accounts)
+        Notification.objects.bulk_create(
+            Notification(setting=setting, account=account)
+            for setting, account in zip(settings, accounts)
+        )
+
+        if verified:
+            EmailAddress.objects.bulk_create(
+                EmailAddress(user=account, email=account.email,
+                             primary=True, verified=True)
+                for account in accounts
             )
 
+        return accounts
+
 
-class AccountRepository(AccountGet, AccountUpdate):
+class AccountRepository(AccountGet, AccountUpdate, AccountBulkCreate):
     """Logic for account model."""
 
 
+class BanRepository:
+    """Logic for ids of banned accounts kept in every process."""
+    _banned_accounts = ReplicatedIdSet(
+        'accounts:banned',
+        lambda: Account.objects.filter(date_baned__isnull=False)
+        .values_list('pk', flat=True)
+    )
+
+    def is_banned(self, pk: int) -> bool:
+        return pk in self._banned_accounts
+
+    def add(self, pk: int) -> None:
+        self._banned_accounts.add(pk)
+
+    def discard(self, pk: int) -> None:
+        self._banned_accounts.discard(pk)
+
+
+class UsernameFilter:
+    """
+    Logic for the Redis bloom filter of taken usernames.
+
+    Any Redis error or a not yet built filter is reported
+    as "maybe taken", so callers fall back to the database.
+    """
+    _bloom_filter = RedisBloomFilter(
+        'accounts:usernames', capacity=10_000_000, error_rate=0.001)
+
+    @staticmethod
+    def _normalize(username: str) -> str:
+        return username.casefold()
+
+    def add(self, *usernames: str | None) -> None:
+        try:
+            self._bloom_filter.add_many(
+                self._normalize(username)
+                for username in usernames if username
+            )
+        except RedisError:
+            pass
+
+    def might_be_taken(self, username: str) -> bool:
+        try:
+            if not self._bloom_filter.is_ready():
+                return True
+            return self._normalize(username) in self._bloom_filter
+        except RedisError:
+            return True
+
+    def rebuild(self) -> int:
+        self._bloom_filter.clear()
+        count = 0
+        batch: list[str] = []
+        usernames = Account.objects.exclude(username=None).values_list(
+            'username', flat=True).iterator(chunk_size=10_000)
+
+        for username in usernames:
+            batch.append(self._normalize(username))
+
+            if len(batch) == 10_000:
+                self._bloom_filter.add_many(batch)
+                count += len(batch)
+                batch.clear()
+
+        self._bloom_filter.add_many(batch)
+        self._bloom_filter.mark_ready()
+
+        return count + len(batch)
+
+
 class SettingUpdate:
     """Logic for updating `Setting` model."""
-    _model_object = ModelObject(Setting)
+    _model_object = ModelObject(Setting, MODEL_OBJECT_CACHE_TIMEOUT)
 
     def update_fields_by_pk(self, pk: int, **kwargs) -> None:
         self._model_object.update_fields_by_pk(pk, **kwargs)
@@ -64,11 +268,122 @@ class SettingUpdate:
 
 class SettingGet:
     """Logic for getting `Setting` model."""
-    _model_object = ModelObject(Setting)
+    _model_object = ModelObject(Setting, MODEL_OBJECT_CACHE_TIMEOUT)
 
+    @replica_read
     def get_setting(self, fields: tuple, **kwargs) -> dict:
         return self._model_object.get_model_object(fields, **kwargs)
 
 
 class SettingRepository(SettingGet, SettingUpdate):
     """Logic for `Setting` model."""
+
+
+class ProfileRepository:
+    """
+    Logic for the whole profile of an account.
+
+    `Account`, `Setting` and `Notification` rows
+    are joined and read with one query. Snapshots are cached
+    together with the row versions they were read at.
+    """
+    _account_fields = AccountProfileData._fields
+    _setting_fields = SettingProfileData._fields
+    _notification_fields = NotificationProfileData._fields
+    _account_cache = ModelObjectCache.for_model(
+        Account, MODEL_OBJECT_CACHE_TIMEOUT)
+    _setting_cache = ModelObjectCache.for_model(
+        Setting, MODEL_OBJECT_CACHE_TIMEOUT)
+    _notification_cache = ModelObjectCache.for_model(
+        Notification, MODEL_OBJECT_CACHE_TIMEOUT)
+    cache_stats = CacheStats()
+
+    def _get_values(self, pk: int) -> tuple:
+        return Account.objects.filter(pk=pk).values_list(
+            *self._account_fields,
+            'setting__id',
+            *(f'setting__{field}' for field in self._setting_fields),
+            'setting__notification__id',
+            *(f'setting__notification__{field}'
+              for field in self._notification_fields),
+        ).get()
+
+    @staticmethod
+    def _get_avatar(name: str | None):
+        field = Account._meta.get_field('avatar')
+        return field.attr_class(None, field, name)
+
+    @staticmethod
+    def _get_cache_key(pk: int) -> str:
+        return f'profile_snapshot:{pk}'
+
+    def _get_versions(self, snapshot: ProfileSnapshot) -> tuple:
+        return ModelObjectCache.get_many_versions((
+            (self._account_cache, snapshot.pk),
+            (self._setting_cache, snapshot.setting_pk),
+            (self._notification_cache, snapshot.notification_pk),
+        ))
+
+    def _get_snapshot_from_db(self, pk: int) -> ProfileSnapshot:
+        values = self._get_values(pk)
+        setting_start = len(self._account_fields)
+        notification_start = setting_start + len(self._setting_fields) + 1
+
+        account = AccountProfileData._make(values[:setting_start])
+
+        return ProfileSnapshot(
+            pk=pk,
+            setting_pk=values[setting_start],
+            notification_pk=values[notification_start],
+            account=account._replace(avatar=self._get_avatar(account.avatar)),
+            setting=SettingProfileData._make(
+                values[setting_start + 1:notification_start]),
+            notification=NotificationProfileData._make(
+                values[notification_start + 1:]),
+        )
+
+    def _get_cached(
+            self, pk: int
+    ) -> tuple[tuple | None, ProfileSnapshot | None]:
+        """
+        Return versions to cache a new snapshot with
+        and the cached snapshot if it is fresh.
+        """
+        cached = cache.get(self._get_cache_key(pk))
+
+        if cached is None:
+            return None, None
+
+        cached_versions, cached_snapshot = cached
+        versions = self._get_versions(cached_snapshot)
+
+        if None not in versions and versions == cached_versions:
+            return versions, cached_snapshot
+
+        # Versions are read before the query, so a concurrent
+        # write can only make this entry stale, never wrong.
+        self._account_cache.get_version(pk)
+        self._setting_cache.get_version(cached_snapshot.setting_pk)
+        self._notification_cache.get_version(cached_snapshot.notification_pk)
+        return self._get_versions(cached_snapshot), None
+
+    def get_profile_snapshot(self, pk: int) -> ProfileSnapshot:
+        try:
+            versions, cached_snapshot = self._get_cached(pk)
+        except RedisError:
+            return self._get_snapshot_from_db(pk)
+
+        if cached_snapshot is not None:
+            self.cache_stats.hits += 1
+            return cached_snapshot
+
+        self.cache_stats.misses += 1
+        snapshot = self._get_snapshot_from_db(pk)
+
+        try:
+            cache.set(self._get_cache_key(pk), (versions, snapshot),
+                      timeout=MODEL_OBJECT_CACHE_TIMEOUT)
+        except RedisError:
+            pass
+
+        return snapshot
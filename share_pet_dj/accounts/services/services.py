@@ -4,20 +4,56 @@ application logic in the app.
 
 Repository + domain logic.
 """
-from typing import Callable, Sequence, Literal
-
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import PurePath
+from types import SimpleNamespace
+from typing import Callable, Iterable, Iterator, Literal, Sequence, TextIO
+
+import django
+from asgiref.sync import async_to_sync
 from allauth.account.views import SignupView, sensitive_post_parameters_m
 from allauth.exceptions import ImmediateHttpResponse
-from django.contrib.auth import get_user_model
+from channels.layers import get_channel_layer
+from django.contrib.auth import SESSION_KEY, get_user, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.base import SessionBase
+from django.core import signing
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.validators import validate_email
+from django.db import transaction
 from django.forms import BaseForm
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django.views.generic import FormView
+from redis import RedisError
 
+from config.settings import (
+    AVATAR_FORMATS, AVATAR_MAX_PIXELS, AVATAR_QUALITY, AVATAR_SIZES,
+    MODEL_OBJECT_CACHE_TIMEOUT, SESSION_ENGINE
+)
 from core.exceptions import NoKeyInResponseContextError
+from core.images import can_encode, encode_image, get_square, open_image
+from core.sessions import SessionStore
 from core.utils import FormUtil
 from notifications.forms import NotificationForm
 from notifications.services.repository import NotificationRepository
 from .domain import AccountDomain
-from .repository import AccountRepository, SettingRepository
+from .data_structures import (
+    AccountImportData, AccountImportReport, AccountPrincipal, ProfileSnapshot
+)
+from .repository import (
+    AccountRepository, BanRepository, PrincipalRepository,
+    ProfileRepository, SettingRepository, UsernameFilter
+)
 from accounts.forms import AccountForm, SettingForm
 
 Account = get_user_model()
@@ -38,16 +74,22 @@ class ProfileGet:
     _account_repository = AccountRepository()
     _setting_repository = SettingRepository()
     _notification_repository = NotificationRepository()
+    _profile_repository = ProfileRepository()
+    _snapshot_sections = {
+        'account_form': 'account',
+        'setting_form': 'setting',
+        'notification_form': 'notification',
+    }
 
-    def _get_pk_by_form_name(self, pk: int, form_name: str) -> int:
+    @staticmethod
+    def _get_pk_by_form_name(snapshot: ProfileSnapshot, form_name: str) \
+            -> int:
         if 'setting' in form_name:
-            pk = self._setting_repository.get_setting(
-                fields=('id',), account_id=pk).get('id')#type: ignore
+            return snapshot.setting_pk
         elif 'notification' in form_name:
-            pk = self._notification_repository.get_notification(
-                fields=('id',), setting__account_id=pk).get('id')#type: ignore
+            return snapshot.notification_pk
 
-        return pk
+        return snapshot.pk
 
     def _get_form_and_update_method(self, form_name: str) -> tuple:
         forms_and_update_methods = {
@@ -70,44 +112,20 @@ class ProfileGet:
         else:
             return result
 
-    def _get_profile_data(self, pk: int) -> dict:
-        account_dict = self._account_repository.get_account(fields=(
-            'username', 'first_name',
-            'last_name', 'email', 'avatar'
-        ), id=pk)
-
-        setting_dict = self._setting_repository.get_setting(fields=(
-            'language', 'status'
-        ), account_id=pk)
-
-        notification_dict = self._notification_repository.get_notification(
-            fields=(
-                'signup', 'login',
-                'changing_profile',
-                'changing_setting',
-                'sb_liked_comment',
-                'sb_replied_to_comment',
-                'sb_liked_article',
-                'new_comment', 'sb_liked_animal',
-                'new_message',
-                'deal_start', 'deal_timeout',
-                'deal_finish', 'refill'
-            ), setting__account_id=pk)
-
-        return {
-            'account': account_dict,
-            'setting': setting_dict,
-            'notification': notification_dict
-        }
+    def get_profile_snapshot(self, pk: int) -> ProfileSnapshot:
+        return self._profile_repository.get_profile_snapshot(pk)
 
-    def get_profile_forms(self, pk: int) -> dict:
-        fields_data = self._get_profile_data(pk)
+    def get_profile_forms(
+            self, pk: int, snapshot: ProfileSnapshot | None = None
+    ) -> dict:
+        if snapshot is None:
+            snapshot = self.get_profile_snapshot(pk)
 
         return {
-            'account_form': AccountForm(initial=fields_data['account']),
-            'setting_form': SettingForm(initial=fields_data['setting']),
+            'account_form': AccountForm(initial=snapshot.account._asdict()),
+            'setting_form': SettingForm(initial=snapshot.setting._asdict()),
             'notification_form': NotificationForm(
-                initial=fields_data['notification'])
+                initial=snapshot.notification._asdict())
         }
 
 
@@ -115,16 +133,17 @@ class ProfileService(ProfileGet, ProfileUpdate):
     """Logic for account profile."""
     _form_util = FormUtil()
     _account_domain = AccountDomain()
+    _username_filter = UsernameFilter()
 
     @staticmethod
-    def _is_email_changed(email: str, account: dict) -> bool:
-        if email == account.get('email'):
+    def _is_email_changed(email: str, snapshot: ProfileSnapshot) -> bool:
+        if email == snapshot.account.email:
             return False
 
         return True
 
     def _get_valid_data_errors(
-            self, pk: int, data_to_update: dict
+            self, snapshot: ProfileSnapshot, data_to_update: dict
     ) -> Sequence[
         dict[
             Literal['field'] | Literal['error_messages'],
@@ -138,15 +157,13 @@ class ProfileService(ProfileGet, ProfileUpdate):
         if username is None or email is None:
             return errors
 
-        accounts = self._account_repository.get_all_with_fields(
-            fields=('id', 'username'))
-        account = self._account_repository.get_account(
-            fields=('email',), pk=pk)
+        is_taken = self._account_repository.is_username_taken(
+            username, exclude_pk=snapshot.pk)
 
         errors.extend(self._account_domain.is_username_valid(
-            pk, username, accounts)
+            username, is_taken)
         )
-        if self._is_email_changed(email, account):
+        if self._is_email_changed(email, snapshot):
             errors.append({
                 'field': 'email',
                 'error_messages': ['You cannot change email right here!']
@@ -155,14 +172,14 @@ class ProfileService(ProfileGet, ProfileUpdate):
         return errors
 
     def _is_valid(
-            self, pk: int, form_class,
+            self, snapshot: ProfileSnapshot, form_class,
             data_to_update: dict
     ) -> tuple[bool, BaseForm]:
         result = True
 
         form = form_class(data_to_update)
         form = self._form_util.get_checked_form(form)
-        errors = self._get_valid_data_errors(pk, data_to_update)
+        errors = self._get_valid_data_errors(snapshot, data_to_update)
 
         if form.errors or errors:
             result = False
@@ -172,12 +189,27 @@ class ProfileService(ProfileGet, ProfileUpdate):
 
         return result, form
 
+    def _get_updated_snapshot(
+            self, snapshot: ProfileSnapshot, form: BaseForm,
+            form_name: str, data_to_update: dict
+    ) -> ProfileSnapshot:
+        """Apply saved form data without reading the profile again."""
+        section_name = self._snapshot_sections[form_name]
+        section = getattr(snapshot, section_name)
+        changes = {
+            field: form.cleaned_data[field]
+            for field in data_to_update if field in section._fields
+        }
+
+        return snapshot._replace(**{section_name: section._replace(**changes)})
+
     def _create_response_context(
-            self, pk: int, result: bool,
+            self, snapshot: ProfileSnapshot, result: bool,
             form: BaseForm, form_name: str
     ) -> dict:
         response_context = {'success': True}
-        response_context.update(self.get_profile_forms(pk))
+        response_context.update(
+            self.get_profile_forms(snapshot.pk, snapshot=snapshot))
 
         if not result:
             response_context.update({'success': False})
@@ -192,13 +224,408 @@ class ProfileService(ProfileGet, ProfileUpdate):
 
     def execute(self, pk: int, form_name: str, data_to_update: dict) -> dict:
         form_class, update_method = self._get_form_and_update_method(form_name)
-        result, form = self._is_valid(pk, form_class, data_to_update)
+        snapshot = self.get_profile_snapshot(pk)
+        result, form = self._is_valid(snapshot, form_class, data_to_update)
 
         if result:
-            pk_to_update = self._get_pk_by_form_name(pk, form_name)
+            pk_to_update = self._get_pk_by_form_name(snapshot, form_name)
             self._update(pk_to_update, data_to_update, update_method)
+            self._username_filter.add(data_to_update.get('username'))
+            snapshot = self._get_updated_snapshot(
+                snapshot, form, form_name, data_to_update)
+
+        return self._create_response_context(
+            snapshot, result, form, form_name)
+
+
+class UsernameAvailabilityService:
+    """
+    Logic for the live "is this username taken" check.
 
-        return self._create_response_context(pk, result, form, form_name)
+    The bloom filter answers most free usernames without
+    touching the database, the rest go to the indexed lookup.
+    """
+    _account_repository = AccountRepository()
+    _account_domain = AccountDomain()
+    _username_filter = UsernameFilter()
+
+    def is_available(self, username: str, pk: int | None = None) -> bool:
+        if self._account_domain.is_username_blacklisted(username):
+            return False
+
+        if not self._username_filter.might_be_taken(username):
+            return True
+
+        return not self._account_repository.is_username_taken(
+            username, exclude_pk=pk)
+
+
+class AccountImportService:
+    """
+    Logic for importing many accounts from CSV or NDJSON.
+
+    Rows are streamed in batches. Passwords of the next batch
+    are hashed in a process pool while the current batch
+    is written with `bulk_create`.
+    """
+    _account_repository = AccountRepository()
+    _username_filter = UsernameFilter()
+    _username_validator = UnicodeUsernameValidator()
+
+    def __init__(
+            self, batch_size: int = 1000, workers: int | None = None,
+            verified: bool = False,
+            on_batch: Callable[[AccountImportReport], None] | None = None
+    ):
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.verified = verified
+        self.on_batch = on_batch
+        self._seen_usernames: set[str] = set()
+        self._seen_emails: set[str] = set()
+
+    @staticmethod
+    def read_csv(file: TextIO) -> Iterator[dict]:
+        yield from csv.DictReader(file)
+
+    @staticmethod
+    def read_ndjson(file: TextIO) -> Iterator[dict]:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+    def _get_account_data(self, row: dict) -> AccountImportData | None:
+        username = (row.get('username') or '').strip() or None
+        email = Account.objects.normalize_email(
+            (row.get('email') or '').strip())
+
+        try:
+            validate_email(email)
+            if username is not None:
+                self._username_validator(username)
+        except ValidationError:
+            return None
+
+        if (email in self._seen_emails or
+                username and username.upper() in self._seen_usernames):
+            return None
+
+        self._seen_emails.add(email)
+        if username is not None:
+            self._seen_usernames.add(username.upper())
+
+        return AccountImportData(
+            username=username,
+            email=email,
+            password=row.get('password') or None,
+            first_name=row.get('first_name') or '',
+            last_name=row.get('last_name') or '',
+        )
+
+    def _get_batches(self, rows: Iterable[dict]) \
+            -> Iterator[tuple[list[AccountImportData], int]]:
+        rows = iter(rows)
+
+        while chunk := list(islice(rows, self.batch_size)):
+            batch = [account_data for account_data in
+                     map(self._get_account_data, chunk) if account_data]
+            yield batch, len(chunk) - len(batch)
+
+    def _exclude_taken(self, batch: list[AccountImportData]) \
+            -> list[AccountImportData]:
+        taken_usernames, taken_emails = self._account_repository.get_taken(
+            [data.username for data in batch if data.username],
+            [data.email for data in batch]
+        )
+        return [
+            data for data in batch
+            if data.email not in taken_emails and
+            (data.username or '').upper() not in taken_usernames
+        ]
+
+    def _write(self, batch: list[AccountImportData],
+               password_hashes: Iterable[str]) -> int:
+        password_hashes = list(password_hashes)
+        new_batch = self._exclude_taken(batch)
+
+        if new_batch:
+            hashes_by_email = {
+                data.email: password_hash
+                for data, password_hash in zip(batch, password_hashes)
+            }
+            self._account_repository.bulk_create_accounts(
+                new_batch, [hashes_by_email[data.email] for data in new_batch],
+                verified=self.verified
+            )
+            self._username_filter.add(*(data.username for data in new_batch))
+
+        return len(new_batch)
+
+    def execute(self, rows: Iterable[dict]) -> AccountImportReport:
+        start = time.perf_counter()
+        created = skipped = 0
+        pending = None
+
+        with ProcessPoolExecutor(self.workers, initializer=django.setup) \
+                as executor:
+            for batch, invalid in self._get_batches(rows):
+                chunksize = max(1, len(batch) // (self.workers * 4))
+                password_hashes = executor.map(
+                    make_password, [data.password for data in batch],
+                    chunksize=chunksize
+                )
+                skipped += invalid
+
+                if pending is not None:
+                    written = self._write(*pending)
+                    created += written
+                    skipped += len(pending[0]) - written
+                    self._report_batch(created, skipped, start)
+
+                pending = batch, password_hashes
+
+            if pending is not None:
+                written = self._write(*pending)
+                created += written
+                skipped += len(pending[0]) - written
+
+        return AccountImportReport(
+            created, skipped, time.perf_counter() - start)
+
+    def _report_batch(self, created: int, skipped: int, start: float):
+        if self.on_batch is not None:
+            self.on_batch(AccountImportReport(
+                created, skipped, time.perf_counter() - start))
+
+
+class AvatarService:
+    """
+    Logic for account avatars.
+
+    Only the original is stored during the request.
+    Square variants of every size and format are made
+    by the `process_avatar` task after the commit.
+    """
+    _account_repository = AccountRepository()
+    _extensions = {'jpeg': 'jpg'}
+
+    @staticmethod
+    def _delete_variants(variants: dict) -> None:
+        for variant_names in variants.values():
+            for name in variant_names.values():
+                default_storage.delete(name)
+
+    def update_avatar(self, account: Account, file) -> None:
+        from accounts.tasks import process_avatar
+
+        old_variants = account.avatar_variants
+        self._account_repository.update_avatar(account, file.name, file)
+        pk, name = account.pk, account.avatar.name
+
+        transaction.on_commit(lambda: process_avatar.delay(pk, name))
+        transaction.on_commit(lambda: self._delete_variants(old_variants))
+
+    def _save_variant(self, pk: int, avatar_name: str, size_name: str,
+                      image_format: str, content: bytes) -> str:
+        stem = PurePath(avatar_name).stem
+        extension = self._extensions.get(image_format, image_format)
+
+        return default_storage.save(
+            f'accounts/avatars/{pk}/{stem}_{size_name}.{extension}',
+            ContentFile(content)
+        )
+
+    def create_variants(self, pk: int, avatar_name: str) -> dict:
+        """
+        Return storage names of variants as `{size: {format: name}}`.
+
+        Formats that Pillow can't encode here are skipped.
+        """
+        with default_storage.open(avatar_name) as file:
+            image = open_image(file, AVATAR_MAX_PIXELS)
+
+        formats = [
+            image_format for image_format in AVATAR_FORMATS
+            if can_encode(image_format)
+        ]
+        variants: dict[str, dict[str, str]] = {}
+
+        for size_name, size in AVATAR_SIZES.items():
+            square = get_square(image, size)
+            variants[size_name] = {
+                image_format: self._save_variant(
+                    pk, avatar_name, size_name, image_format,
+                    encode_image(square, image_format, AVATAR_QUALITY)
+                )
+                for image_format in formats
+            }
+
+        return variants
+
+    def process_avatar(self, pk: int, avatar_name: str) -> bool:
+        variants = self.create_variants(pk, avatar_name)
+
+        if not self._account_repository.update_avatar_variants(
+                pk, avatar_name, variants):
+            self._delete_variants(variants)
+            return False
+
+        return True
+
+
+class LazyAccount(SimpleLazyObject):
+    """
+    Signed in account known by its principal.
+
+    Principal fields are read without a query,
+    any other attribute loads the whole account.
+    """
+    def __init__(self, principal: AccountPrincipal,
+                 load: Callable[[], Account]):
+        super().__init__(load)
+        self.__dict__.update(
+            principal._asdict(), id=principal.pk, principal=principal,
+            is_authenticated=True, is_anonymous=False
+        )
+
+
+class PrincipalService:
+    """
+    Logic for getting the account of a session.
+
+    The principal is kept signed in the session and is used
+    while the account and setting rows are not changed,
+    for at most `max_age` seconds: then the session is checked
+    in full again, with the hash of the password too.
+    """
+    PRINCIPAL_SESSION_KEY = '_account_principal'
+    max_age = MODEL_OBJECT_CACHE_TIMEOUT
+    _salt = 'accounts.principal'
+    _account_repository = AccountRepository()
+    _principal_repository = PrincipalRepository()
+
+    def _read_principal(self, session: SessionBase) -> AccountPrincipal | None:
+        value = session.get(self.PRINCIPAL_SESSION_KEY)
+
+        if value is None:
+            return None
+
+        try:
+            *fields, versions = signing.loads(
+                value, salt=self._salt, max_age=self.max_age)
+            return AccountPrincipal(*fields, versions=tuple(versions))
+        except (signing.BadSignature, TypeError):
+            return None
+
+    def _write_principal(self, session: SessionBase, pk: int) -> None:
+        principal = self._principal_repository.get_principal(pk)
+        session[self.PRINCIPAL_SESSION_KEY] = signing.dumps(
+            principal, salt=self._salt)
+
+    def _is_fresh(self, principal: AccountPrincipal, pk: int) -> bool:
+        if principal.pk != pk or principal.versions[0] is None:
+            return False
+
+        try:
+            versions = self._principal_repository.get_versions(
+                principal.pk, principal.setting_pk)
+        except RedisError:
+            return False
+
+        return versions == principal.versions
+
+    def get_user(self, session: SessionBase) -> Account | AnonymousUser:
+        try:
+            pk = Account._meta.pk.to_python(session[SESSION_KEY])
+        except KeyError:
+            return AnonymousUser()
+
+        principal = self._read_principal(session)
+
+        if principal is not None and self._is_fresh(principal, pk):
+            return LazyAccount(
+                principal,
+                lambda: self._account_repository.get_pure_account(pk=pk)
+            )
+
+        # Full check of the session, like `AuthenticationMiddleware` does.
+        user = get_user(SimpleNamespace(session=session))
+
+        if user.is_authenticated:
+            self._write_principal(session, user.pk)
+
+        return user
+
+
+class SessionRevocationService:
+    """
+    Logic for signing an account out of its sessions.
+
+    Works only with the `core.sessions` engine,
+    which keeps an index of sessions of every account.
+    """
+    def revoke(self, account_pk: int, keep: str | None = None) -> int:
+        """Return the number of revoked sessions, `keep` is left."""
+        if SESSION_ENGINE != 'core.sessions':
+            return 0
+
+        try:
+            return SessionStore.revoke_account_sessions(account_pk, keep)
+        except RedisError:
+            return 0
+
+
+class BanService:
+    """
+    Logic for banning accounts.
+
+    A banned account loses its sessions and live sockets,
+    other processes learn about the ban within a second.
+    Bans are applied once the transaction is committed.
+    """
+    _account_repository = AccountRepository()
+    _ban_repository = BanRepository()
+    _session_revocation_service = SessionRevocationService()
+
+    @staticmethod
+    def get_group_name(pk: int) -> str:
+        """Channel layer group of all sockets of the account."""
+        return f'account_{pk}'
+
+    def is_banned(self, pk: int) -> bool:
+        return self._ban_repository.is_banned(pk)
+
+    def _disconnect(self, pk: int) -> None:
+        try:
+            async_to_sync(get_channel_layer().group_send)(
+                self.get_group_name(pk), {'type': 'account.banned'})
+        except (RedisError, OSError):
+            pass
+
+    def sync(self, pk: int, banned: bool) -> None:
+        """Apply the ban state of the saved account after the commit."""
+        transaction.on_commit(lambda: self._apply(pk, banned))
+
+    def _apply(self, pk: int, banned: bool) -> None:
+        if banned == self.is_banned(pk):
+            return
+
+        if not banned:
+            self._ban_repository.discard(pk)
+            return
+
+        self._ban_repository.add(pk)
+        self._session_revocation_service.revoke(pk)
+        self._disconnect(pk)
+
+    def ban(self, pk: int) -> None:
+        self._account_repository.update_fields_by_pk(
+            pk, date_baned=timezone.now())
+        self.sync(pk, banned=True)
+
+    def unban(self, pk: int) -> None:
+        self._account_repository.update_fields_by_pk(pk, date_baned=None)
+        self.sync(pk, banned=False)
 
 
 class AdministratorSignup(SignupView):
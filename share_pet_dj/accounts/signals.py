@@ -0,0 +1,36 @@
+from allauth.account.signals import password_changed, password_reset
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .services.repository import UsernameFilter
+from .services.services import BanService, SessionRevocationService
+
+Account = get_user_model()
+
+
+@receiver(post_save, sender=Account)
+def add_username_to_filter(sender, instance, **kwargs):
+    """Keep the username bloom filter in sync with saved accounts."""
+    UsernameFilter().add(instance.username)
+
+
+@receiver(password_changed)
+@receiver(password_reset)
+def revoke_other_sessions(sender, request, user, **kwargs):
+    """Only the session the password was changed in stays."""
+    SessionRevocationService().revoke(
+        user.pk, keep=request.session.session_key)
+
+
+@receiver(post_save, sender=Account)
+def sync_ban(sender, instance, update_fields, **kwargs):
+    """Bans made by saving an account, for example in the admin."""
+    if update_fields is not None and 'date_baned' not in update_fields:
+        return
+
+    if instance.date_baned == instance.saved_date_baned:
+        return
+
+    instance.saved_date_baned = instance.date_baned
+    BanService().sync(instance.pk, banned=instance.date_baned is not None)
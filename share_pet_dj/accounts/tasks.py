@@ -1,6 +1,12 @@
+from accounts.services.services import AvatarService
 from config.celery import app
 
 
 @app.task
 def send():
     pass
+
+
+@app.task
+def process_avatar(pk: int, avatar_name: str) -> bool:
+    return AvatarService().process_avatar(pk, avatar_name)
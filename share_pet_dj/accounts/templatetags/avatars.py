@@ -0,0 +1,29 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from config.settings import AVATAR_SIZES
+
+register = template.Library()
+
+
+@register.inclusion_tag('accounts/avatar.html')
+def avatar(account, size: str = 'thumbnail') -> dict:
+    """
+    Picture of the avatar in `size` from `AVATAR_SIZES`.
+
+    Until variants are made the original is shown.
+    """
+    context = {'account': account, 'size': AVATAR_SIZES[size]}
+
+    if not account.avatar:
+        return context
+
+    variants = account.avatar_variants.get(size, {})
+    context['sources'] = [
+        (f'image/{image_format}', default_storage.url(name))
+        for image_format, name in variants.items() if image_format != 'jpeg'
+    ]
+    context['url'] = (default_storage.url(variants['jpeg'])
+                      if 'jpeg' in variants else account.avatar.url)
+
+    return context
@@ -6,6 +6,7 @@ from django.test import TestCase, override_settings
 
 from accounts.models import Account, Setting
 from config.settings import MEDIA_ROOT
+from notifications.models import Notification
 
 
 TEST_DIR = 'test_data'
@@ -77,6 +78,21 @@ class AccountModelTest(TestCase):
         self.assertEquals(str(account1), account1.username)
         self.assertEquals(str(account2), account2.email)
 
+    def test_save_creates_setting(self):
+        """
+        Setting and notification are created only
+        when the account is added.
+        """
+        setting = Setting.objects.get(account=self.account)
+        self.assertTrue(
+            Notification.objects.filter(setting=setting).exists())
+
+        self.account.first_name = 'Firstname'
+        self.account.save()
+
+        self.assertEquals(Setting.objects.count(), 1)
+        self.assertEquals(Notification.objects.count(), 1)
+
 
 class SettingModelTest(TestCase):
     @classmethod
@@ -85,8 +101,8 @@ class SettingModelTest(TestCase):
         cls.account = Account.objects.create()
 
     def test_create(self):
-        """Setting instance is created correctly."""
-        setting = Setting.objects.create(account=self.account)
+        """Setting instance is created together with the account."""
+        setting = self.account.setting
 
         self.assertEquals(Setting.objects.count(), 1)
         self.assertEquals(setting.account, self.account)
@@ -98,22 +114,19 @@ class SettingModelTest(TestCase):
         Model instance must have db table
         with particular name.
         """
-        setting = Setting.objects.create(account=self.account)
+        setting = self.account.setting
         self.assertEquals(setting._meta.db_table, 'setting')
 
     def test_ordering(self):
         """Model instances must be ordered by account date_joined."""
-        Setting.objects.create(account=self.account)
         account2 = self.Account.objects.create()
-        setting2 = Setting.objects.create(account=account2)
+        setting2 = account2.setting
 
         last_setting = Setting.objects.last()
 
         self.assertEquals(last_setting, setting2)
 
-        account3 = self.Account.objects.create(
-            date_joined=self.account.date_joined)
-        Setting.objects.create(account=account3)
+        self.Account.objects.create(date_joined=self.account.date_joined)
 
         last_setting = Setting.objects.last()
 
@@ -127,8 +140,8 @@ class SettingModelTest(TestCase):
         account1 = self.Account.objects.create(username='username1')
         account2 = self.Account.objects.create(email='email2')
 
-        setting1 = Setting.objects.create(account=account1)
-        setting2 = Setting.objects.create(account=account2)
+        setting1 = account1.setting
+        setting2 = account2.setting
 
         self.assertEquals(str(setting1), account1.username)
         self.assertEquals(str(setting2), account2.email)
@@ -0,0 +1,336 @@
+import io
+import shutil
+
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+)
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from accounts.models import Setting
+from accounts.services.repository import AccountRepository
+from accounts.services.services import (
+    AccountImportService, AvatarService, BanService, LazyAccount,
+    PrincipalService, ProfileService
+)
+from notifications.models import Notification
+
+Account = get_user_model()
+
+
+class ProfileServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = account = Account.objects.create(
+            username='username1', email='email1@gmail.com')
+        cls.setting = account.setting
+        cls.notification = notification = account.setting.notification
+        notification.refill = False
+        notification.save()
+
+    def setUp(self):
+        cache.clear()
+        self.profile_service = ProfileService()
+
+    def test_snapshot(self):
+        """Account, setting and notification are read with one query."""
+        with self.assertNumQueries(1):
+            snapshot = self.profile_service.get_profile_snapshot(
+                self.account.pk)
+
+        self.assertEquals(snapshot.pk, self.account.pk)
+        self.assertEquals(snapshot.setting_pk, self.setting.pk)
+        self.assertEquals(snapshot.notification_pk, self.notification.pk)
+        self.assertEquals(snapshot.account.username, 'username1')
+        self.assertEquals(snapshot.setting.language, 'en')
+        self.assertTrue(snapshot.notification.signup)
+        self.assertFalse(snapshot.notification.refill)
+
+    def test_get_profile_forms(self):
+        """Profile forms are built from one snapshot."""
+        with self.assertNumQueries(1):
+            forms = self.profile_service.get_profile_forms(self.account.pk)
+
+        self.assertEquals(forms['account_form'].initial['email'],
+                          'email1@gmail.com')
+        self.assertEquals(forms['setting_form'].initial['status'],
+                          'alone_is_fine')
+
+    def test_execute(self):
+        """Snapshot and update queries only, response is not reloaded."""
+        with self.assertNumQueries(2):
+            context = self.profile_service.execute(
+                self.account.pk, 'setting_form',
+                {'language': 'ru', 'status': 'actively_looking'}
+            )
+
+        self.assertTrue(context['success'])
+        self.assertEquals(context['setting_form'].initial['language'], 'ru')
+        self.assertEquals(
+            Setting.objects.get(pk=self.setting.pk).language, 'ru')
+
+    def test_cached_snapshot(self):
+        """Hot snapshot is read without queries until a row changes."""
+        for _ in range(2):
+            self.profile_service.get_profile_snapshot(self.account.pk)
+
+        with self.assertNumQueries(0):
+            snapshot = self.profile_service.get_profile_snapshot(
+                self.account.pk)
+        self.assertEquals(snapshot.setting.status, 'alone_is_fine')
+
+        self.profile_service.execute(
+            self.account.pk, 'setting_form',
+            {'language': 'ru', 'status': 'actively_looking'}
+        )
+
+        with self.assertNumQueries(1):
+            snapshot = self.profile_service.get_profile_snapshot(
+                self.account.pk)
+        self.assertEquals(snapshot.setting.status, 'actively_looking')
+
+
+class AccountImportServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Account.objects.create(username='taken', email='taken@gmail.com')
+
+    def setUp(self):
+        self.import_service = AccountImportService(batch_size=2, workers=1)
+
+    def test_execute(self):
+        """Every account gets its setting and notification."""
+        rows = self.import_service.read_csv(io.StringIO(
+            'username,email,password,first_name\n'
+            'username1,email1@gmail.com,password_,Firstname\n'
+            'username2,email2@gmail.com,,\n'
+            ',email3@gmail.com,password_,\n'
+        ))
+        report = self.import_service.execute(rows)
+
+        self.assertEquals((report.created, report.skipped), (3, 0))
+        account = Account.objects.get(username='username1')
+        self.assertTrue(account.check_password('password_'))
+        self.assertEquals(account.first_name, 'Firstname')
+        self.assertFalse(
+            Account.objects.get(username='username2').has_usable_password())
+        self.assertEquals(
+            Setting.objects.filter(account__email__startswith='email')
+            .count(), 3
+        )
+        self.assertEquals(
+            Notification.objects.filter(
+                setting__account__email__startswith='email').count(),
+            3
+        )
+
+    def test_skip(self):
+        """Invalid, repeated and already taken rows are skipped."""
+        rows = self.import_service.read_ndjson(io.StringIO(
+            '{"username": "TAKEN", "email": "new@gmail.com"}\n'
+            '{"username": "new", "email": "taken@gmail.com"}\n'
+            '{"username": "|||", "email": "email1@gmail.com"}\n'
+            '{"username": "username1", "email": "email"}\n'
+            '{"username": "username2", "email": "email2@gmail.com"}\n'
+            '\n'
+            '{"username": "Username2", "email": "email3@gmail.com"}\n'
+        ))
+        report = self.import_service.execute(rows)
+
+        self.assertEquals((report.created, report.skipped), (1, 5))
+        self.assertEquals(Account.objects.count(), 2)
+
+
+@override_settings(MEDIA_ROOT='test_avatars/media')
+class AvatarServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(username='username1')
+
+    def setUp(self):
+        self.avatar_service = AvatarService()
+        self.addCleanup(shutil.rmtree, 'test_avatars', ignore_errors=True)
+
+    @staticmethod
+    def _get_file() -> SimpleUploadedFile:
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 600), 'red').save(buffer, format='JPEG')
+        return SimpleUploadedFile(
+            'avatar.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_update_avatar(self):
+        """Original is stored and variants are made after the commit."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.avatar_service.update_avatar(self.account, self._get_file())
+
+        self.account.refresh_from_db()
+
+        self.assertEquals(len(callbacks), 2)
+        self.assertEquals(self.account.avatar_variants, {})
+        self.assertEquals(self.account.avatar.width, 1000)
+
+    def test_process_avatar(self):
+        """Every size is stored as a square in every format."""
+        with self.captureOnCommitCallbacks():
+            self.avatar_service.update_avatar(self.account, self._get_file())
+
+        self.assertTrue(self.avatar_service.process_avatar(
+            self.account.pk, self.account.avatar.name))
+        self.account.refresh_from_db()
+        variants = self.account.avatar_variants
+
+        self.assertEquals(set(variants), {'thumbnail', 'chat', 'profile'})
+
+        with default_storage.open(variants['chat']['jpeg']) as file:
+            self.assertEquals(Image.open(file).size, (128, 128))
+
+    def test_process_replaced_avatar(self):
+        """Variants of a replaced avatar are not saved."""
+        with self.captureOnCommitCallbacks():
+            self.avatar_service.update_avatar(self.account, self._get_file())
+
+        old_name = self.account.avatar.name
+
+        with self.captureOnCommitCallbacks():
+            self.avatar_service.update_avatar(self.account, self._get_file())
+
+        self.assertFalse(
+            self.avatar_service.process_avatar(self.account.pk, old_name))
+        self.account.refresh_from_db()
+        self.assertEquals(self.account.avatar_variants, {})
+
+
+class PrincipalServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(username='username1')
+        Setting.objects.filter(account=cls.account).update(language='ua')
+
+    def setUp(self):
+        cache.clear()
+        self.principal_service = PrincipalService()
+        self.session = SessionStore()
+        self.session[SESSION_KEY] = str(self.account.pk)
+        self.session[BACKEND_SESSION_KEY] = (
+            'django.contrib.auth.backends.ModelBackend')
+        self.session[HASH_SESSION_KEY] = (
+            self.account.get_session_auth_hash())
+
+    def test_get_user(self):
+        """Principal of the session is used without queries."""
+        user = self.principal_service.get_user(self.session)
+        self.assertEquals(user, self.account)
+
+        with self.assertNumQueries(0):
+            user = self.principal_service.get_user(self.session)
+
+            self.assertIsInstance(user.principal, tuple)
+            self.assertTrue(user.is_authenticated)
+            self.assertFalse(user.is_administrator)
+            self.assertFalse(user.is_banned)
+            self.assertEquals(user.language, 'ua')
+            self.assertEquals(user.username, 'username1')
+
+        with self.assertNumQueries(1):
+            self.assertEquals(user.email, self.account.email)
+
+    def test_changed_account(self):
+        """Principal is read again after the account is changed."""
+        self.principal_service.get_user(self.session)
+        AccountRepository().update_fields_by_pk(
+            self.account.pk, is_administrator=True)
+
+        user = self.principal_service.get_user(self.session)
+        self.assertNotIsInstance(user, LazyAccount)
+
+        user = self.principal_service.get_user(self.session)
+        self.assertIsInstance(user, LazyAccount)
+        self.assertTrue(user.is_administrator)
+
+    def test_expired_principal(self):
+        """Old principal is replaced after the full check of the session."""
+        self.principal_service.get_user(self.session)
+        self.principal_service.max_age = -1
+        Account.objects.filter(pk=self.account.pk).update(password='new')
+
+        user = self.principal_service.get_user(self.session)
+        self.assertFalse(user.is_authenticated)
+
+    def test_anonymous(self):
+        """Session without account gives an anonymous user."""
+        user = self.principal_service.get_user(SessionStore())
+        self.assertFalse(user.is_authenticated)
+
+    def test_tampered_principal(self):
+        """Principal with a wrong signature is ignored."""
+        self.principal_service.get_user(self.session)
+        self.session[PrincipalService.PRINCIPAL_SESSION_KEY] += 'x'
+
+        with self.assertNumQueries(2):
+            user = self.principal_service.get_user(self.session)
+
+        self.assertEquals(user, self.account)
+
+
+class BanServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(username='username1')
+
+    def setUp(self):
+        self.ban_service = BanService()
+        self.addCleanup(self._unban)
+
+    def _unban(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ban_service.unban(self.account.pk)
+
+    def test_ban(self):
+        """Ban is applied to the account and to the local set."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ban_service.ban(self.account.pk)
+        self.account.refresh_from_db()
+
+        self.assertIsNotNone(self.account.date_baned)
+        self.assertTrue(self.ban_service.is_banned(self.account.pk))
+
+        with self.assertNumQueries(0):
+            self.ban_service.is_banned(self.account.pk)
+
+    def test_unban(self):
+        """Unbanned account is removed from the local set."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ban_service.ban(self.account.pk)
+        self._unban()
+
+        self.assertFalse(self.ban_service.is_banned(self.account.pk))
+
+    def test_saved_ban(self):
+        """Ban made by saving the account is applied too."""
+        self.account.date_baned = self.account.date_joined
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.save()
+
+        self.assertTrue(self.ban_service.is_banned(self.account.pk))
+
+    def test_saved_without_ban(self):
+        """Saves which don't change the ban don't sync it."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.account.save()
+            Account.objects.get(pk=self.account.pk).save()
+            self.account.save(update_fields=('first_name',))
+
+        self.assertEquals(callbacks, [])
+
+    def test_ban_rolled_back(self):
+        """Ban of a rolled back transaction is not applied."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.ban_service.ban(self.account.pk)
+
+        self.assertEquals(len(callbacks), 1)
+        self.assertFalse(self.ban_service.is_banned(self.account.pk))
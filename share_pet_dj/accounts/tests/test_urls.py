@@ -61,3 +61,11 @@ class UrlsTest(SimpleTestCase):
     def test_profile_url_is_resolved(self):
         url = reverse('profile')
         self.assertEquals(resolve(url).func, views.profile)
+
+    def test_username_availability_url_is_resolved(self):
+        url = reverse('username_availability')
+        self.assertEquals(resolve(url).func, views.username_availability)
+
+    def test_logout_everywhere_url_is_resolved(self):
+        url = reverse('logout_everywhere')
+        self.assertEquals(resolve(url).func, views.logout_everywhere)
@@ -1,5 +1,6 @@
 import shutil
 import time
+from unittest import skipUnless
 
 from allauth.account.forms import (
     EmailAwarePasswordResetTokenGenerator, LoginForm)
@@ -12,8 +13,11 @@ from django.urls import reverse
 
 from accounts.forms import SignupAdministratorForm, SignupUserForm
 from accounts.models import Setting
+from accounts.services.repository import BanRepository
+from accounts.services.services import BanService
 from config.settings import MEDIA_ROOT
-from notifications.models import Notification
+from core.tests.test_rate_limit import clear_rate_limits
+from core.tests.test_sessions import is_redis_available
 
 Account = get_user_model()
 
@@ -26,14 +30,14 @@ class SignupUserViewTest(TestCase):
         cls.account = account = Account.objects.create(username='username1')
         account.set_password('password_')
         account.save()
-        setting = Setting.objects.create(account=account)
-        Notification.objects.create(setting=setting)
 
         cls.url = reverse('user_signup')
         cls.file_name = 'test'
 
     def setUp(self):
         self.client = Client()
+        clear_rate_limits('signup:')
+        self.addCleanup(clear_rate_limits, 'signup:')
         self.file_path = f'{MEDIA_ROOT}/tests/{self.file_name}.jpg'
 
     def tearDown(self):
@@ -95,7 +99,7 @@ class SignupUserViewTest(TestCase):
         localtime = time.localtime(time.time())
         date_path = time.strftime('%Y/%m/%d', localtime)
         self.assertEquals(account.avatar.url,
-                          f'/media/accounts/{date_path}/{self.file_name}.jpeg')
+                          f'/media/accounts/{date_path}/{self.file_name}.jpg')
 
     def test_POST_no_data(self):
         """Anonymous account sends POST request without data."""
@@ -170,13 +174,13 @@ class PasswordResetViewTest(TestCase):
             username='username1', email='email1@gmail.com')
         user.set_password('password_')
         user.save()
-        setting = Setting.objects.create(account=user)
-        Notification.objects.create(setting=setting)
 
         cls.url = reverse('password_reset')
 
     def setUp(self):
         self.client = Client()
+        clear_rate_limits('password_reset:')
+        self.addCleanup(clear_rate_limits, 'password_reset:')
 
     def test_GET(self):
         """Anonymous account sends GET request."""
@@ -256,8 +260,6 @@ class PasswordResetDoneViewTest(TestCase):
         cls.account = account = Account.objects.create(username='username1')
         account.set_password('password_')
         account.save()
-        setting = Setting.objects.create(account=account)
-        Notification.objects.create(setting=setting)
 
     def setUp(self):
         self.client = Client()
@@ -297,8 +299,6 @@ class PasswordResetFromKeyViewTest(TestCase):
             email='email@gmail.com')
         account.set_password('password_')
         account.save()
-        setting = Setting.objects.create(account=account)
-        Notification.objects.create(setting=setting)
 
     @override_settings(ACCOUNT_RATE_LIMITS={'reset_password_email': '6/m'})
     def setUp(self):
@@ -408,8 +408,6 @@ class PasswordResetFromKeyDoneViewTest(TestCase):
         cls.account = account = Account.objects.create(username='username1')
         account.set_password('password_')
         account.save()
-        setting = Setting.objects.create(account=account)
-        Notification.objects.create(setting=setting)
 
     def setUp(self):
         self.client = Client()
@@ -451,15 +449,11 @@ class PasswordChangeViewTest(TestCase):
         cls.user = user = Account.objects.create(username='username1')
         user.set_password('password_')
         user.save()
-        setting = Setting.objects.create(account=user)
-        Notification.objects.create(setting=setting)
 
         cls.account = account = Account.objects.create(
             username='username2', is_administrator=True)
         account.set_password('password_')
         account.save()
-        setting = Setting.objects.create(account=account)
-        Notification.objects.create(setting=setting)
 
     def setUp(self):
         self.client = Client()
@@ -559,11 +553,11 @@ class LoginViewTest(TestCase):
             username='username1', email='email1')
         account.set_password('password_')
         account.save()
-        setting = Setting.objects.create(account=account)
-        Notification.objects.create(setting=setting)
 
     def setUp(self):
         self.client = Client()
+        clear_rate_limits('login:')
+        self.addCleanup(clear_rate_limits, 'login:')
 
     def test_GET(self):
         """Anonymous account sends GET request."""
@@ -975,3 +969,183 @@ class ConfirmEmailViewTest(TestCase):
         response = self.client.post(self.url)
 
         self.assertRedirects(response, reverse('login'), 302)
+
+
+class ProfileViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse('profile')
+
+        cls.account = account = Account.objects.create(
+            username='username1', email='email1@gmail.com',
+            first_name='Firstname', last_name='Lastname')
+        account.set_password('password_')
+        account.save()
+
+        Account.objects.create(username='Username2')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.login(username=self.account.username, password='password_')
+
+    def _get_account_form_data(self, **kwargs) -> dict:
+        data = {
+            'csrfmiddlewaretoken': 'token',
+            'form-type': 'account_form',
+            'username': self.account.username,
+            'email': self.account.email,
+            'first_name': 'Newfirstname',
+            'last_name': 'Newlastname',
+        }
+        data.update(kwargs)
+        return data
+
+    def _unban(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            BanService().unban(self.account.pk)
+
+    def test_GET(self):
+        """Authenticated account sends GET request."""
+        response = self.client.get(self.url)
+
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, 'accounts/profile.html')
+        self.assertEquals(
+            response.context['account_form'].initial['username'],
+            self.account.username
+        )
+        self.assertEquals(
+            response.context['setting_form'].initial['language'], 'en')
+        self.assertTrue(
+            response.context['notification_form'].initial['signup'])
+
+    def test_anonymous_GET(self):
+        """Anonymous account sends GET request."""
+        self.client.logout()
+        response = self.client.get(self.url)
+
+        self.assertEquals(response.status_code, 302)
+
+    @skipUnless(is_redis_available(), 'Redis is not available')
+    def test_banned_GET(self):
+        """Sessions of the banned account are revoked."""
+        with self.captureOnCommitCallbacks(execute=True):
+            BanService().ban(self.account.pk)
+        self.addCleanup(self._unban)
+
+        response = self.client.get(self.url)
+        self.assertEquals(response.status_code, 302)
+
+    def test_banned_session_GET(self):
+        """Banned account with a session left is signed out by a request."""
+        BanRepository().add(self.account.pk)
+        self.addCleanup(BanRepository().discard, self.account.pk)
+
+        response = self.client.get(self.url)
+        self.assertEquals(response.status_code, 403)
+
+        response = self.client.get(self.url)
+        self.assertEquals(response.status_code, 302)
+
+    def test_POST(self):
+        """Account changes own profile with correct data."""
+        response = self.client.post(
+            self.url, data=self._get_account_form_data(username='username3'))
+
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(response.context['success'])
+        self.account.refresh_from_db()
+        self.assertEquals(self.account.username, 'username3')
+        self.assertEquals(self.account.first_name, 'Newfirstname')
+
+    def test_POST_own_username(self):
+        """Account keeps own username."""
+        response = self.client.post(
+            self.url, data=self._get_account_form_data())
+
+        self.assertTrue(response.context['success'])
+
+    def test_POST_taken_username(self):
+        """Username is taken by other account in other letter case."""
+        response = self.client.post(
+            self.url, data=self._get_account_form_data(username='USERNAME2'))
+
+        self.assertFalse(response.context['success'])
+        self.assertEquals(
+            response.context['account_form'].errors['username'],
+            ['A user with that username already exists.']
+        )
+
+    def test_POST_blacklisted_username(self):
+        """Username is in `ACCOUNT_USERNAME_BLACKLIST`."""
+        response = self.client.post(
+            self.url,
+            data=self._get_account_form_data(username='Ye11ow_Banana')
+        )
+
+        self.assertFalse(response.context['success'])
+        self.assertEquals(
+            response.context['account_form'].errors['username'],
+            ['Username can not be used. Please use other username.']
+        )
+
+    def test_POST_setting(self):
+        """Account changes own settings."""
+        response = self.client.post(self.url, data={
+            'csrfmiddlewaretoken': 'token',
+            'form-type': 'setting_form',
+            'language': 'ua',
+            'status': 'actively_looking',
+        })
+
+        self.assertTrue(response.context['success'])
+        self.assertEquals(
+            Setting.objects.get(account=self.account).language, 'ua')
+        self.assertEquals(
+            response.context['setting_form'].initial['language'], 'ua')
+
+
+class UsernameAvailabilityViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.url = reverse('username_availability')
+
+        cls.account = account = Account.objects.create(username='username1')
+        account.set_password('password_')
+        account.save()
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_available(self):
+        """Nobody uses the username."""
+        response = self.client.get(self.url, {'username': 'username2'})
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(
+            response.json(), {'username': 'username2', 'available': True})
+
+    def test_taken(self):
+        """Username is taken in any letter case."""
+        for username in 'username1', 'USERNAME1':
+            response = self.client.get(self.url, {'username': username})
+            self.assertFalse(response.json()['available'])
+
+    def test_blacklisted(self):
+        """Username is in `ACCOUNT_USERNAME_BLACKLIST`."""
+        response = self.client.get(self.url, {'username': 'YE11OW_BANANA'})
+
+        self.assertFalse(response.json()['available'])
+
+    def test_invalid(self):
+        """Username is too short or has forbidden symbols."""
+        for username in '', 'ab', '|||':
+            response = self.client.get(self.url, {'username': username})
+            self.assertFalse(response.json()['available'])
+
+    def test_authenticated_own_username(self):
+        """Own username is available for the profile form."""
+        self.client.login(username=self.account.username, password='password_')
+        response = self.client.get(self.url, {'username': 'username1'})
+
+        self.assertTrue(response.json()['available'])
@@ -21,6 +21,8 @@ urlpatterns = [
     path('user/', include(user_urlpatterns)),
     path('login/', views.login, name='login'),
     path('logout/', views.logout, name='logout'),
+    path('logout-everywhere/', views.logout_everywhere,
+         name='logout_everywhere'),
     path('administrator/signup/', views.signup_administrator,
          name='administrator_signup'),
     path('confirm-email-sent/', views.email_verification_sent,
@@ -28,4 +30,6 @@ urlpatterns = [
     re_path(r'^confirm-email/(?P<key>[-:\w]+)/$', views.confirm_email,
             name='account_confirm_email'),
     path('profile/', views.profile, name='profile'),
+    path('username-availability/', views.username_availability,
+         name='username_availability'),
 ]
@@ -8,21 +8,32 @@ from allauth.account.views import (
 )
 from django.contrib.auth.decorators import login_required
 
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.contrib.auth.views import LogoutView
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_POST
-from django.views.generic import TemplateView
+from django.views.generic import TemplateView, View
 
+from config.settings import (
+    ACCOUNT_USERNAME_MIN_LENGTH, ACCOUNTS_DATABASE, RATE_LIMITS
+)
 from .forms import ResetPasswordForm, SignupAdministratorForm, SignupUserForm
-from core.decorators import account_allower
+from core.decorators import account_allower, rate_limiter
 from .services.mixins import ContextDataMixin
-from .services.services import ProfileService, AdministratorSignup
+from .services.services import (
+    ProfileService, AdministratorSignup, SessionRevocationService,
+    UsernameAvailabilityService
+)
 
 
-@method_decorator(transaction.atomic, name='dispatch')
+@method_decorator(
+    (rate_limiter('signup', **RATE_LIMITS['signup']),
+     transaction.atomic(using=ACCOUNTS_DATABASE)), name='dispatch')
 class UserSignupView(ContextDataMixin, AllauthSignupView):
     """Registration view for regular user."""
     template_name = 'accounts/signup_user.html'
@@ -31,7 +42,7 @@ class UserSignupView(ContextDataMixin, AllauthSignupView):
 
 @method_decorator(
     (account_allower(redirect_url=reverse_lazy('login'), allow_to='admin'),
-     transaction.atomic), name='dispatch')
+     transaction.atomic(using=ACCOUNTS_DATABASE)), name='dispatch')
 class AdministratorSignupView(ContextDataMixin, AdministratorSignup):
     """Registration view for administrator."""
     template_name = 'accounts/signup_administrator.html'
@@ -55,14 +66,18 @@ class ConfirmEmailView(AllauthConfirmEmailView):
         return redirect(reverse_lazy('login'))
 
 
+@method_decorator(
+    rate_limiter('login', **RATE_LIMITS['login']), name='dispatch')
 class LoginView(ContextDataMixin, AllauthLoginView):
     """Login view."""
     template_name = 'accounts/login.html'
 
 
 @method_decorator(
-    account_allower(redirect_url=reverse_lazy('profile'),
-                    allow_to='anonymous'), name='dispatch')
+    (account_allower(redirect_url=reverse_lazy('profile'),
+                     allow_to='anonymous'),
+     rate_limiter('password_reset', **RATE_LIMITS['password_reset'])),
+    name='dispatch')
 class PasswordResetView(ContextDataMixin, AllauthPasswordResetView):
     """Page with email input if user forget a password."""
     template_name = 'accounts/password_reset.html'
@@ -133,15 +148,58 @@ class ProfileView(TemplateView):
         return render(request, 'accounts/profile.html', context)
 
 
+class UsernameAvailabilityView(View):
+    """
+    Tell signup and profile forms whether
+    the typed username can still be used.
+    """
+    _availability_service = UsernameAvailabilityService()
+    _username_validator = UnicodeUsernameValidator()
+
+    def _is_username_format_valid(self, username: str) -> bool:
+        if not ACCOUNT_USERNAME_MIN_LENGTH <= len(username) <= 150:
+            return False
+
+        try:
+            self._username_validator(username)
+        except ValidationError:
+            return False
+
+        return True
+
+    def get(self, request):
+        username = request.GET.get('username', '').strip()
+        available = False
+
+        if self._is_username_format_valid(username):
+            available = self._availability_service.is_available(
+                username, pk=request.user.pk)
+
+        return JsonResponse({'username': username, 'available': available})
+
+
+class LogoutEverywhereView(LogoutView):
+    """Logout from every session of the account."""
+    _session_revocation_service = SessionRevocationService()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            self._session_revocation_service.revoke(request.user.pk)
+
+        return super().dispatch(request, *args, **kwargs)
+
+
 signup_user = UserSignupView.as_view()
 signup_administrator = AdministratorSignupView.as_view()
 email_verification_sent = EmailVerificationSentView.as_view()
 confirm_email = ConfirmEmailView.as_view()
 login = LoginView.as_view()
 logout = require_POST(LogoutView.as_view())
+logout_everywhere = require_POST(LogoutEverywhereView.as_view())
 password_reset = PasswordResetView.as_view()
 password_reset_done = PasswordResetDoneView.as_view()
 password_reset_from_key = PasswordResetFromKeyView.as_view()
 password_reset_from_key_done = PasswordResetFromKeyDoneView.as_view()
 change_password = PasswordChangeView.as_view()
 profile = ProfileView.as_view()
+username_availability = UsernameAvailabilityView.as_view()
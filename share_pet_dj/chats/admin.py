@@ -1,11 +1,17 @@
 from django.contrib import admin
 
-from .models import Chat, Message
+from .models import Chat, ChatMember, Message
+
+
+class ChatMemberInline(admin.TabularInline):
+    model = ChatMember
+    fields = 'account',
+    raw_id_fields = 'account',
 
 
 @admin.register(Chat)
 class ChatAdmin(admin.ModelAdmin):
-    pass
+    inlines = ChatMemberInline,
 
 
 @admin.register(Message)
@@ -1,19 +1,84 @@
-import json
+import logging
 
 from asgiref.sync import async_to_sync, sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.generic.http import AsyncHttpConsumer
+from django.utils import timezone
+from redis import RedisError
 
+from accounts.services.services import BanService
+from config.settings import (
+    MESSAGE_BATCH_BACKLOG, MESSAGE_BATCH_INTERVAL, MESSAGE_BATCH_SIZE
+)
+from core.exceptions import (
+    ExecutorOverloadedError, WireProtocolError, WriteBufferFullError
+)
+from core.executors import database_executor
+from core.loaders import BatchLoaderConsumerMixin
+from core.write_buffer import WriteBuffer
 from .models import Chat, Message
+from .services.domain import make_message_event
+from .services.mixins import WireProtocolConsumerMixin
+from .services.repository import ChatMemberRepository, ChatRepository
+from .services.services import ChatReplayService, MessageService
 
+logger = logging.getLogger(__name__)
+
+message_buffer = WriteBuffer(
+    'consumers.messages', MessageService().save_messages,
+    MESSAGE_BATCH_SIZE, MESSAGE_BATCH_INTERVAL, MESSAGE_BATCH_BACKLOG
+)
+
+
+class ChatConsumer(BatchLoaderConsumerMixin, WireProtocolConsumerMixin,
+                   AsyncWebsocketConsumer):
+    _ban_service = BanService()
+    _chat_member_repository = ChatMemberRepository()
+    _chat_repository = ChatRepository()
+    _replay_service = ChatReplayService()
 
-class ChatConsumer(AsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(args, kwargs)
         self.room_name = None
+        self.account_group_name = None
+        self.chat_id = None
+
+    def _can_join(self, chat_id: int, account_pk: int) -> bool:
+        """Only members which are not banned use the chat."""
+        return (not self._ban_service.is_banned(account_pk) and
+                self._chat_member_repository.is_member(chat_id, account_pk))
 
     async def connect(self):
         self.room_name = self.scope['url_route']['kwargs']['chat_name']
+        user = self.scope.get('user')
+
+        try:
+            self.chat_id = await database_executor.run(
+                self._chat_repository.get_chat_id, self.room_name)
+            can_join = (
+                self.chat_id is not None and
+                user is not None and user.is_authenticated and
+                await database_executor.run(
+                    self._can_join, self.chat_id, user.pk)
+            )
+        except ExecutorOverloadedError:
+            # Try again later.
+            await self.close(code=1013)
+            return
+
+        if self.chat_id is None:
+            await self.close(code=4004)
+            return
+
+        if not can_join:
+            await self.close(code=4003)
+            return
+
+        self.account_group_name = self._ban_service.get_group_name(user.pk)
+        await self.channel_layer.group_add(
+            self.account_group_name,
+            self.channel_name
+        )
 
         await self.channel_layer.group_add(
             self.room_name,
@@ -28,20 +93,106 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
 
+        if self.account_group_name is not None:
+            await self.channel_layer.group_discard(
+                self.account_group_name,
+                self.channel_name
+            )
+
+        await super().disconnect(close_code)
+
+    async def account_banned(self, event):
+        await self.close(code=4003)
+
     async def receive(self, text_data=None, bytes_data=None):
-        await self.channel_layer.send(
-            self.channel_name,
-            {
-                'type': 'send.sdp',
-            },
-        )
+        try:
+            events = self.protocol.decode(text_data, bytes_data)
+        except WireProtocolError:
+            await self.close(code=1007)
+            return
+
+        for event in events:
+            if event.get('type') == 'message':
+                await self._send_message(str(event.get('text', '')).strip())
+            elif event.get('type') == 'resume':
+                await self._resume(event.get('seq'))
+
+    async def _append_event(self, event: dict) -> int | None:
+        """`seq` of the event, `None` if it can't be replayed."""
+        try:
+            return await database_executor.run(
+                self._replay_service.append, self.chat_id, event)
+        except (ExecutorOverloadedError, RedisError) as error:
+            logger.warning('Event of chat %s is not kept: %r',
+                           self.chat_id, error)
+            return None
+
+    async def _discard_event(self, seq: int | None) -> None:
+        if seq is None:
+            return
+
+        try:
+            await database_executor.run(
+                self._replay_service.discard, self.chat_id, seq)
+        except (ExecutorOverloadedError, RedisError) as error:
+            logger.warning('Event %s of chat %s is kept: %r',
+                           seq, self.chat_id, error)
+
+    async def _send_message(self, text: str) -> None:
+        """
+        Broadcast the message with its server id without waiting
+        for it to be saved, clients skip ids they have already got.
+        """
+        user = self.scope.get('user')
+
+        if user is None or not user.is_authenticated or not text:
+            return
+
+        if message_buffer.is_full:
+            await self.deliver(
+                {'type': 'error', 'error': 'Message is not sent, retry.'})
+            return
+
+        # `user` may load the account on access, so only its
+        # principal fields are used on the event loop.
+        message = Message(chat_id=self.chat_id, sender_id=user.pk,
+                          text=text, date_sent=timezone.now())
+        message.seq = await self._append_event(
+            make_message_event(message, user.username))
+
+        try:
+            message_buffer.add(message)
+        except WriteBufferFullError:
+            await self._discard_event(message.seq)
+            await self.deliver(
+                {'type': 'error', 'error': 'Message is not sent, retry.'})
+            return
 
         await self.channel_layer.group_send(
             self.room_name,
-            {
-                'type': 'send.sdp',
-            },
+            {'type': 'chat.message',
+             'event': make_message_event(message, user.username)},
         )
 
-    async def send_sdp(self, event):
-        await self.send(text_data=json.dumps({'f': 'f'}))
+    async def _resume(self, seq) -> None:
+        """Replay events missed after `seq`, or make the client reload."""
+        try:
+            events = await database_executor.run(
+                self._replay_service.get_missed, self.chat_id, int(seq))
+        except (TypeError, ValueError):
+            await self.close(code=1007)
+            return
+        except (ExecutorOverloadedError, RedisError) as error:
+            # Reloading would not help, only live events are sent.
+            logger.warning('Chat %s is not replayed: %r', self.chat_id, error)
+            return
+
+        if events is None:
+            await self.deliver({'type': 'reset'})
+            return
+
+        for event in events:
+            await self.deliver(event)
+
+    async def chat_message(self, event):
+        await self.deliver(event['event'])
@@ -0,0 +1,87 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from chats.models import Chat, Message
+from core.metrics import metrics
+
+Account = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare request latency of the profile and chat pages with '
+        'a connection per request and with pooled connections. '
+        'Created rows are deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1_000)
+
+    @staticmethod
+    def _create_data() -> tuple[Account, Chat]:
+        account = Account.objects.create(username='bench_db_pool_user')
+        chat = Chat.objects.create(name='bench_db_pool_chat')
+        Message.objects.bulk_create(
+            Message(chat=chat, sender=account, text=f'message {number}')
+            for number in range(20)
+        )
+
+        return account, chat
+
+    @staticmethod
+    def _set_pool(use_pool: bool) -> None:
+        for connection in connections.all():
+            connection.close()
+            connection.use_pool = use_pool
+
+    @staticmethod
+    def _time_requests(client: Client, url: str,
+                       requests: int) -> list[float]:
+        client.get(url)
+        timings = []
+
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get(url)
+            timings.append(time.perf_counter() - start)
+
+        return sorted(timings)
+
+    def _report(self, name: str, timings: list[float]) -> None:
+        average = sum(timings) / len(timings) * 1000
+        p95 = timings[int(len(timings) * 0.95) - 1] * 1000
+        self.stdout.write(
+            f'{name:>24}: average {average:7.2f} ms, p95 {p95:7.2f} ms')
+
+    def handle(self, *args, **options):
+        account, chat = self._create_data()
+        urls = {
+            'profile': reverse('profile'),
+            'chat': reverse('chat_detail', kwargs={'slug': chat.slug}),
+        }
+
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                client = Client()
+                client.force_login(account)
+
+                for use_pool in (False, True):
+                    self._set_pool(use_pool)
+                    mode = 'pooled' if use_pool else 'per request'
+
+                    for page, url in urls.items():
+                        timings = self._time_requests(
+                            client, url, options['requests'])
+                        self._report(f'{page} {mode}', timings)
+        finally:
+            chat.delete()
+            account.delete()
+
+        for name, meter in metrics.snapshot().items():
+            if name.startswith('db.'):
+                self.stdout.write(f'{name}: {meter}')
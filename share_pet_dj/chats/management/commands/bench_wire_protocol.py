@@ -0,0 +1,60 @@
+import time
+from uuid import uuid4
+
+import msgpack
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chats.services.domain import (
+    JSONWireProtocol, MsgpackWireProtocol, WireProtocol
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare bytes and encoding time per delivered chat message '
+        'of the websocket protocols for bursts of messages.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=10_000)
+        parser.add_argument('--burst', type=int, default=20)
+
+    @staticmethod
+    def _make_events(count: int) -> list[dict]:
+        return [{
+            'type': 'message',
+            'id': str(uuid4()),
+            'text': f'Message number {number} about a pet',
+            'sender': f'username{number % 10}',
+            'date_sent': timezone.now().isoformat(),
+            'seq': number + 1,
+        } for number in range(count)]
+
+    def _report(self, name: str, protocol: WireProtocol,
+                events: list[dict], burst: int) -> None:
+        size = 1 if not protocol.batches else burst
+        sent = 0
+        start = time.perf_counter()
+
+        for position in range(0, len(events), size):
+            frame = protocol.encode(events[position:position + size])
+            sent += len(next(iter(frame.values())))
+
+        seconds = time.perf_counter() - start
+        self.stdout.write(
+            f'{name:>12}: {sent / len(events):7.1f} bytes, '
+            f'{seconds / len(events) * 1_000_000:6.2f} us per message'
+        )
+
+    def handle(self, *args, **options):
+        events = self._make_events(options['messages'])
+
+        if msgpack.Packer is msgpack.fallback.Packer:
+            self.stdout.write(self.style.WARNING(
+                'msgpack runs without its C extension.'))
+
+        for name, protocol in (('v1 json', WireProtocol()),
+                               ('v2 json', JSONWireProtocol()),
+                               ('v2 msgpack', MsgpackWireProtocol())):
+            self._report(name, protocol, events, options['burst'])
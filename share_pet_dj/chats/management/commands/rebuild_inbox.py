@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from chats.services.services import InboxService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild last messages and unread counts of inboxes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chat', type=int, help='Only this chat id.')
+
+    def handle(self, *args, **options):
+        count = InboxService().rebuild(options['chat'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Inbox rebuilt for {count} chat members.'))
@@ -1,3 +1,5 @@
+from uuid import uuid4
+
 from django.db import models
 from django.template.defaultfilters import slugify
 from django.utils.translation import gettext_lazy as _
@@ -9,7 +11,8 @@ from config.settings import AUTH_USER_MODEL as Account
 class Chat(models.Model):
     name = models.CharField(_('name'), max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
-    accounts = models.ManyToManyField(Account, verbose_name=_('accounts'))
+    accounts = models.ManyToManyField(
+        Account, through='ChatMember', verbose_name=_('accounts'))
     date_created = models.DateTimeField(_('date created'), default=timezone.now)
 
     class Meta:
@@ -27,11 +30,68 @@ class Chat(models.Model):
 
     def get_absolute_url(self):
         from django.urls import reverse
-        return reverse('chat_detail', kwargs={'chat_name': self.slug})
+        return reverse('chat_detail', kwargs={'slug': self.slug})
+
+
+class ChatMember(models.Model):
+    """
+    Account of a chat and the chat in the inbox of the account.
+
+    Accounts may be stored in another database, so the account
+    is referenced without a constraint and memberships of
+    deleted accounts are deleted by a signal.
+
+    The last message and unread count are denormalized and
+    updated when messages are sent, so the inbox is one query.
+    """
+    chat = models.ForeignKey(
+        Chat, on_delete=models.CASCADE, verbose_name=_('chat'))
+    account = models.ForeignKey(
+        Account, on_delete=models.DO_NOTHING, db_constraint=False,
+        verbose_name=_('account')
+    )
+    last_message = models.ForeignKey(
+        'Message', on_delete=models.SET_NULL, blank=True, null=True,
+        related_name='+', verbose_name=_('last message')
+    )
+    last_message_text = models.CharField(
+        _('last message text'), max_length=100, blank=True)
+    last_message_sender = models.CharField(
+        _('last message sender'), max_length=150, blank=True)
+    date_last_activity = models.DateTimeField(
+        _('date of last activity'), default=timezone.now)
+    last_read_message = models.ForeignKey(
+        'Message', on_delete=models.SET_NULL, blank=True, null=True,
+        related_name='+', verbose_name=_('last read message')
+    )
+    unread_count = models.PositiveIntegerField(_('unread count'), default=0)
+
+    class Meta:
+        db_table = 'chat_member'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('chat', 'account'), name='chat_member_unique'),
+        ]
+        indexes = [
+            models.Index(fields=('account', '-date_last_activity', '-id'),
+                         name='chat_member_inbox_idx'),
+        ]
+        verbose_name = _('chat member')
+        verbose_name_plural = _('chat members')
+
+    def __str__(self):
+        return f'{self.account_id} - {self.chat_id}'
 
 
 class Message(models.Model):
-    sender = models.ForeignKey(Account, on_delete=models.DO_NOTHING)
+    uuid = models.UUIDField(
+        _('uuid'), default=uuid4, unique=True, editable=False)
+    # Accounts may be in another database, so messages of deleted
+    # accounts are detached by a signal instead of a constraint.
+    sender = models.ForeignKey(
+        Account, on_delete=models.DO_NOTHING, db_constraint=False,
+        blank=True, null=True
+    )
     text = models.TextField(_('text'), blank=True, null=True)
     chat = models.ForeignKey(
         Chat, on_delete=models.CASCADE,
@@ -40,10 +100,17 @@ class Message(models.Model):
     file = models.FileField(
         _('file'), upload_to='chats/%Y/%m/%d', blank=True, null=True)
     date_sent = models.DateTimeField(_('date sent'), default=timezone.now)
+    seq = models.PositiveBigIntegerField(
+        _('sequence number'), blank=True, null=True, editable=False)
 
     class Meta:
         db_table = 'message'
         ordering = 'date_sent',
+        indexes = [
+            models.Index(fields=('chat', 'date_sent', 'id'),
+                         name='message_chat_date_sent_id_idx'),
+            models.Index(fields=('chat', 'seq'), name='message_chat_seq_idx'),
+        ]
         verbose_name = _('message')
         verbose_name_plural = _('messages')
 
@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import NamedTuple
+
+from chats.models import Message
+
+
+class MessageKey(NamedTuple):
+    """Position of a message in the history of its chat."""
+    date_sent: datetime
+    pk: int
+
+
+class MessagePage(NamedTuple):
+    """Messages from old to new and the cursor of older ones."""
+    messages: list[Message]
+    next_cursor: str | None
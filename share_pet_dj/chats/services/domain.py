@@ -0,0 +1,158 @@
+"""
+This module is used for working with
+domain logic in the app.
+
+Wire protocols of the chat websocket. Clients choose one with
+a websocket subprotocol, clients without one get version 1.
+"""
+import json
+import zlib
+from typing import Any
+
+import msgpack
+
+from chats.models import Message
+from config.settings import WS_COMPRESS_MIN_SIZE, WS_MAX_FRAME_SIZE
+from core.exceptions import WireProtocolError
+
+PLAIN = b'\x00'
+DEFLATED = b'\x01'
+
+
+class WireProtocol:
+    """
+    Version 1: a JSON text frame by event.
+
+    Clients send `{"message": text}`.
+    """
+    subprotocol: str | None = None
+    batches = False
+
+    def decode(self, text_data: str | None,
+               bytes_data: bytes | None) -> list[dict[str, Any]]:
+        data = self._load(text_data, bytes_data)
+
+        if not isinstance(data, dict):
+            raise WireProtocolError
+
+        return [{'type': 'message', 'text': data.get('message', '')}]
+
+    def encode(self, events: list[dict[str, Any]]) -> dict[str, Any]:
+        """Keyword arguments of `send` for one frame."""
+        return {'text_data': json.dumps(events[0])}
+
+    @staticmethod
+    def _load(text_data: str | None, bytes_data: bytes | None) -> Any:
+        if text_data is None or len(text_data) > WS_MAX_FRAME_SIZE:
+            raise WireProtocolError
+
+        try:
+            return json.loads(text_data)
+        except ValueError:
+            raise WireProtocolError
+
+
+class JSONWireProtocol(WireProtocol):
+    """
+    Version 2 in JSON text frames for clients without msgpack:
+    `{"v": 2, "events": [...]}` in both directions.
+
+    Events kept for replay have a `seq` number of the chat,
+    clients send `{"type": "resume", "seq": seq}` after
+    connecting to get the events they have missed.
+    """
+    subprotocol = 'sharepet.v2.json'
+    batches = True
+
+    def decode(self, text_data: str | None,
+               bytes_data: bytes | None) -> list[dict[str, Any]]:
+        data = self._load(text_data, bytes_data)
+
+        if (not isinstance(data, dict) or
+                not isinstance(data.get('events'), list)):
+            raise WireProtocolError
+
+        return [event for event in data['events'] if isinstance(event, dict)]
+
+    def encode(self, events: list[dict[str, Any]]) -> dict[str, Any]:
+        return {'text_data': json.dumps({'v': 2, 'events': events})}
+
+
+class MsgpackWireProtocol(JSONWireProtocol):
+    """
+    Version 2 in msgpack binary frames.
+
+    The first byte of a frame tells if the rest is deflated,
+    only frames of at least `WS_COMPRESS_MIN_SIZE` bytes are.
+    """
+    subprotocol = 'sharepet.v2.msgpack'
+
+    def encode(self, events: list[dict[str, Any]]) -> dict[str, Any]:
+        data = msgpack.packb({'v': 2, 'events': events})
+
+        if len(data) >= WS_COMPRESS_MIN_SIZE:
+            return {'bytes_data': DEFLATED + zlib.compress(data)}
+
+        return {'bytes_data': PLAIN + data}
+
+    @staticmethod
+    def _load(text_data: str | None, bytes_data: bytes | None) -> Any:
+        if not bytes_data or len(bytes_data) > WS_MAX_FRAME_SIZE:
+            raise WireProtocolError
+
+        header, data = bytes_data[:1], bytes_data[1:]
+
+        try:
+            if header == DEFLATED:
+                decompress = zlib.decompressobj()
+                data = decompress.decompress(data, WS_MAX_FRAME_SIZE)
+
+                if decompress.unconsumed_tail:
+                    raise WireProtocolError
+            elif header != PLAIN:
+                raise WireProtocolError
+
+            return msgpack.unpackb(data)
+        except (ValueError, zlib.error):
+            raise WireProtocolError
+
+
+def get_sender_name(message: Message) -> str:
+    """Username of the sender, empty if the account is deleted."""
+    sender = message.sender
+    return '' if sender is None else sender.username
+
+
+def make_message_event(message: Message, sender: str) -> dict[str, Any]:
+    """
+    Event of a sent message for clients.
+
+    The name of the sender is passed, so the account is not loaded.
+    """
+    event: dict[str, Any] = {
+        'type': 'message',
+        'id': str(message.uuid),
+        'text': message.text,
+        'sender': sender,
+        'date_sent': message.date_sent.isoformat(),
+    }
+
+    if message.seq is not None:
+        event['seq'] = message.seq
+
+    return event
+
+
+PROTOCOLS = {
+    protocol.subprotocol: protocol
+    for protocol in (MsgpackWireProtocol(), JSONWireProtocol())
+}
+
+
+def choose_protocol(subprotocols: list[str]) -> WireProtocol:
+    """The first offered protocol which is known, else version 1."""
+    for subprotocol in subprotocols:
+        if subprotocol in PROTOCOLS:
+            return PROTOCOLS[subprotocol]
+
+    return WireProtocol()
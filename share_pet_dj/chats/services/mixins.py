@@ -1,8 +1,13 @@
+import asyncio
+from typing import Any
+
 from django.urls import reverse
 from django.views.generic import FormView
 
 from chats.forms import MessageForm
 from chats.models import Chat
+from chats.services.domain import WireProtocol, choose_protocol
+from config.settings import WS_BATCH_INTERVAL, WS_BATCH_SIZE
 from core.exceptions import EmptyMessageError
 
 
@@ -29,3 +34,50 @@ class ChatDetailFormMixin(FormView):
     def get_success_url(self):
         return reverse(
             'chat_detail', kwargs={'slug': self.kwargs['slug']})
+
+
+class WireProtocolConsumerMixin:
+    """
+    Encode events with the protocol chosen by the client.
+
+    Events of protocols with batches are sent together
+    in one frame during bursts.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.protocol: WireProtocol = WireProtocol()
+        self._outbox: list[dict[str, Any]] = []
+        self._flush_task: asyncio.Task | None = None
+
+    async def accept(self, subprotocol=None):
+        self.protocol = choose_protocol(self.scope.get('subprotocols', []))
+        await super().accept(self.protocol.subprotocol)
+
+    async def deliver(self, event: dict[str, Any]) -> None:
+        if not self.protocol.batches:
+            await self.send(**self.protocol.encode([event]))
+            return
+
+        self._outbox.append(event)
+
+        if len(self._outbox) >= WS_BATCH_SIZE:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(WS_BATCH_INTERVAL)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        events, self._outbox = self._outbox, []
+
+        if events:
+            await self.send(**self.protocol.encode(events))
+
+    async def disconnect(self, close_code):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+
+        await super().disconnect(close_code)
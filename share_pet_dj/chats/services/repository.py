@@ -0,0 +1,281 @@
+"""
+This module is used for working
+with data in the app.
+"""
+import json
+from typing import Any, Iterable
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, F, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from redis.commands.core import Script
+
+from accounts.services.repository import AccountRepository
+from chats.models import Chat, ChatMember, Message
+from chats.services.data_structures import MessageKey
+from config.settings import (
+    ACCOUNTS_DATABASE, CHAT_REPLAY_BUFFER_SIZE, CHAT_REPLAY_TTL
+)
+from core.db_routers import replica_read
+from core.redis_client import get_redis
+
+# KEYS are the sequence counter and the stream of a chat,
+# ARGV are `max_length, ttl, event`.
+APPEND_EVENT_SCRIPT = '''
+local seq = redis.call('INCR', KEYS[1])
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[1], seq .. '-0',
+           'event', ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return seq
+'''
+
+
+class MessageGet:
+    """Logic for getting `Message` model."""
+    _account_repository = AccountRepository()
+
+    def _attach_senders(self, messages: list[Message]) -> list[Message]:
+        """Set every `message.sender` with one batched query."""
+        sender_ids = list({
+            message.sender_id for message in messages
+            if message.sender_id is not None
+        })
+        senders: dict[int | None, Any] = dict(zip(
+            sender_ids, self._account_repository.load_accounts(sender_ids)))
+        sender_field = Message._meta.get_field('sender')
+
+        for message in messages:
+            sender_field.set_cached_value(
+                message, senders.get(message.sender_id))
+
+        return messages
+
+    @replica_read
+    def get_chat_messages_before(
+            self, chat_id: int, before: MessageKey | None,
+            limit: int) -> list[Message]:
+        """
+        Up to `limit` newest messages older than `before`, new first.
+
+        Served by `message_chat_date_sent_id_idx`, so the time
+        does not depend on the length of the chat.
+        """
+        messages = Message.objects.filter(chat_id=chat_id)
+
+        if before is not None:
+            messages = messages.filter(
+                date_sent__lte=before.date_sent
+            ).exclude(date_sent=before.date_sent, pk__gte=before.pk)
+
+        messages = messages.order_by('-date_sent', '-pk')[:limit]
+
+        # Accounts of another database can't be joined.
+        if ACCOUNTS_DATABASE == DEFAULT_DB_ALIAS:
+            return list(messages.select_related('sender'))
+
+        return self._attach_senders(list(messages))
+
+    @replica_read
+    def get_messages_by_seq(self, chat_id: int, after: int, before: int,
+                            limit: int) -> list[Message]:
+        """Up to `limit` messages with `seq` between the two, old first."""
+        messages = list(Message.objects.filter(
+            chat_id=chat_id, seq__gt=after, seq__lt=before
+        ).order_by('seq')[:limit])
+
+        return self._attach_senders(messages)
+
+    @staticmethod
+    def create_messages(messages: list[Message]) -> list[Message]:
+        """
+        Insert messages with `uuid` not inserted yet
+        and return them with ids.
+        """
+        inserted = set(Message.objects.filter(
+            uuid__in=[message.uuid for message in messages]
+        ).values_list('uuid', flat=True))
+        messages = [
+            message for message in messages if message.uuid not in inserted
+        ]
+        Message.objects.bulk_create(messages)
+        missing = {
+            message.uuid: message for message in messages if message.pk is None
+        }
+
+        # Not every database returns ids of inserted rows.
+        for uuid, pk in Message.objects.filter(
+                uuid__in=list(missing)).values_list('uuid', 'pk'):
+            missing[uuid].pk = pk
+
+        return messages
+
+    @staticmethod
+    def get_last_message(chat_id: int) -> Message | None:
+        return Message.objects.filter(
+            chat_id=chat_id).order_by('date_sent', 'pk').last()
+
+    @staticmethod
+    def detach_account_messages(account_pk: int) -> None:
+        Message.objects.filter(sender_id=account_pk).update(sender=None)
+
+    @staticmethod
+    def is_file_available(account_pk: int, file_name: str) -> bool:
+        """File was sent to a chat the account is a member of."""
+        return Message.objects.filter(
+            file=file_name, chat__accounts=account_pk).exists()
+
+
+class MessageRepository(MessageGet):
+    """Logic for `Message` model."""
+
+
+class ChatEventStream:
+    """
+    Bounded Redis Stream of recent events of every chat.
+
+    Events are numbered by a counter of the chat and
+    the number is the id of the entry: `{seq}-0`.
+    """
+    _script: Script | None = None
+
+    @staticmethod
+    def _get_keys(chat_id: int) -> list[str]:
+        return [f'chat:{chat_id}:seq', f'chat:{chat_id}:events']
+
+    @classmethod
+    def _get_script(cls) -> Script:
+        if cls._script is None:
+            cls._script = get_redis().register_script(APPEND_EVENT_SCRIPT)
+
+        return cls._script
+
+    def append(self, chat_id: int, event: dict[str, Any]) -> int:
+        """Add the event and return its `seq`."""
+        return self._get_script()(
+            keys=self._get_keys(chat_id),
+            args=[CHAT_REPLAY_BUFFER_SIZE, CHAT_REPLAY_TTL, json.dumps(event)]
+        )
+
+    def delete(self, chat_id: int, seq: int) -> None:
+        get_redis().xdel(self._get_keys(chat_id)[1], f'{seq}-0')
+
+    def get_after(self, chat_id: int,
+                  seq: int) -> tuple[int, list[dict[str, Any]]]:
+        """Last `seq` of the chat and its kept events after `seq`."""
+        seq_key, stream_key = self._get_keys(chat_id)
+        pipeline = get_redis().pipeline(transaction=True)
+        pipeline.get(seq_key)
+        pipeline.xrange(stream_key, min=f'{seq + 1}-0')
+        last_seq, entries = pipeline.execute()
+
+        return int(last_seq or 0), [
+            {**json.loads(fields[b'event']),
+             'seq': int(entry_id.split(b'-')[0])}
+            for entry_id, fields in entries
+        ]
+
+
+class ChatRepository:
+    """Logic for `Chat` model."""
+    @staticmethod
+    def get_chat_id(slug: str) -> int | None:
+        return Chat.objects.filter(
+            slug=slug).values_list('pk', flat=True).first()
+
+
+class ChatMemberRepository:
+    """Logic for `ChatMember` model."""
+    @staticmethod
+    def delete_account_memberships(account_pk: int) -> None:
+        ChatMember.objects.filter(account_id=account_pk).delete()
+
+    @staticmethod
+    def is_member(chat_id: int, account_pk: int) -> bool:
+        return ChatMember.objects.filter(
+            chat_id=chat_id, account_id=account_pk).exists()
+
+    @staticmethod
+    def get_inbox(account_pk: int) -> QuerySet[ChatMember]:
+        """Chats of the account, served by `chat_member_inbox_idx`."""
+        return ChatMember.objects.filter(
+            account_id=account_pk
+        ).select_related('chat').order_by('-date_last_activity', '-pk')
+
+    @staticmethod
+    def get_chat_members(chat_id: int | None = None) -> QuerySet[ChatMember]:
+        members = ChatMember.objects.all()
+
+        if chat_id is not None:
+            members = members.filter(chat_id=chat_id)
+
+        return members
+
+    @staticmethod
+    def _count_unread(after_pk: int | Coalesce) -> Coalesce:
+        """Messages of others newer than `after_pk` for every member."""
+        unread = Message.objects.filter(
+            chat_id=OuterRef('chat_id'), pk__gt=after_pk
+        ).exclude(
+            sender_id=OuterRef('account_id')
+        ).values('chat_id').annotate(count=Count('pk')).values('count')
+
+        return Coalesce(Subquery(unread), 0)
+
+    @staticmethod
+    def set_chat_last_message(message: Message, text: str,
+                              sender: str) -> None:
+        """Last message of the chat for all its members."""
+        ChatMember.objects.filter(
+            chat_id=message.chat_id,
+            date_last_activity__lte=message.date_sent
+        ).update(
+            last_message=message, last_message_text=text,
+            last_message_sender=sender,
+            date_last_activity=message.date_sent
+        )
+
+    @staticmethod
+    def add_unread(chat_id: int, count: int,
+                   exclude_accounts: Iterable[int]) -> None:
+        ChatMember.objects.filter(chat_id=chat_id).exclude(
+            account_id__in=exclude_accounts
+        ).update(unread_count=F('unread_count') + count)
+
+    @staticmethod
+    def set_read(chat_id: int, account_pk: int, message: Message,
+                 unread_count: int) -> None:
+        ChatMember.objects.filter(
+            chat_id=chat_id, account_id=account_pk
+        ).update(last_read_message=message, unread_count=unread_count)
+
+    def mark_read(self, chat_id: int, account_pk: int,
+                  message_pk: int) -> None:
+        """Messages up to `message_pk` were read, the cursor only grows."""
+        ChatMember.objects.filter(
+            Q(last_read_message__isnull=True) |
+            Q(last_read_message__lt=message_pk),
+            chat_id=chat_id, account_id=account_pk
+        ).update(
+            last_read_message_id=message_pk,
+            unread_count=self._count_unread(message_pk)
+        )
+
+    @staticmethod
+    def set_last_message(member: ChatMember, message: Message | None,
+                         text: str, sender: str) -> None:
+        member.last_message = message
+        member.last_message_text = text
+        member.last_message_sender = sender
+
+        if message is not None:
+            member.date_last_activity = message.date_sent
+
+        member.save(update_fields=(
+            'last_message', 'last_message_text',
+            'last_message_sender', 'date_last_activity'
+        ))
+
+    def count_unread(self, members: QuerySet[ChatMember]) -> None:
+        """Count unread messages again from the read cursors."""
+        members.update(unread_count=self._count_unread(
+            Coalesce(OuterRef('last_read_message_id'), 0)))
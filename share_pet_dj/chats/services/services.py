@@ -0,0 +1,190 @@
+"""
+This module is used for working with
+application logic in the app.
+
+Repository + domain logic.
+"""
+import base64
+import binascii
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
+from typing import Any
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils.text import Truncator
+from django.utils.translation import gettext
+
+from chats.models import ChatMember, Message
+from chats.services.data_structures import MessageKey, MessagePage
+from chats.services.domain import get_sender_name, make_message_event
+from chats.services.repository import (
+    ChatEventStream, ChatMemberRepository, MessageRepository
+)
+from config.settings import CHAT_HISTORY_PAGE_SIZE, CHAT_REPLAY_DB_LIMIT
+from core.exceptions import InvalidCursorError
+
+
+class ChatHistoryService:
+    """
+    Logic for reading the history of a chat page by page.
+
+    A cursor is the key of the oldest message of the page,
+    so pages stay correct while new messages are sent.
+    """
+    _message_repository = MessageRepository()
+
+    @staticmethod
+    def encode_cursor(key: MessageKey) -> str:
+        value = f'{key.date_sent.isoformat()}|{key.pk}'
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> MessageKey:
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode()).decode()
+            date_sent, pk = value.split('|')
+            return MessageKey(datetime.fromisoformat(date_sent), int(pk))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise InvalidCursorError
+
+    def get_page(self, chat_id: int, cursor: str | None = None,
+                 size: int = CHAT_HISTORY_PAGE_SIZE) -> MessagePage:
+        """Newest page without `cursor`, else the page older than it."""
+        before = None if cursor is None else self.decode_cursor(cursor)
+        messages = self._message_repository.get_chat_messages_before(
+            chat_id, before, size + 1)
+        next_cursor = None
+
+        if len(messages) > size:
+            messages = messages[:size]
+            oldest = messages[-1]
+            next_cursor = self.encode_cursor(
+                MessageKey(oldest.date_sent, oldest.pk))
+
+        messages.reverse()
+        return MessagePage(messages, next_cursor)
+
+
+class InboxService:
+    """
+    Logic for inboxes of accounts: chats with the last message
+    and the count of unread ones, recently active first.
+    """
+    _chat_member_repository = ChatMemberRepository()
+    _message_repository = MessageRepository()
+
+    def get_inbox(self, account_pk: int) -> QuerySet[ChatMember]:
+        return self._chat_member_repository.get_inbox(account_pk)
+
+    @staticmethod
+    def _get_preview(message: Message | None) -> tuple[str, str]:
+        """Text and sender of the message shown in inboxes."""
+        if message is None:
+            return '', ''
+
+        text = message.text or (gettext('File') if message.file else '')
+        return Truncator(text).chars(100), get_sender_name(message)
+
+    def _record_chat_messages(self, messages: list[Message]) -> None:
+        """Messages of one chat from old to new."""
+        last_message = messages[-1]
+        self._chat_member_repository.set_chat_last_message(
+            last_message, *self._get_preview(last_message))
+        last_sent = {
+            message.sender_id: position
+            for position, message in enumerate(messages)
+            if message.sender_id is not None
+        }
+        self._chat_member_repository.add_unread(
+            last_message.chat_id, len(messages), last_sent)
+
+        # Sending reads the chat, later messages of others stay unread.
+        for sender_id, position in last_sent.items():
+            unread_count = sum(message.sender_id != sender_id
+                               for message in messages[position + 1:])
+            self._chat_member_repository.set_read(
+                last_message.chat_id, sender_id,
+                messages[position], unread_count
+            )
+
+    def record_messages(self, messages: list[Message]) -> None:
+        """Put sent messages in inboxes with few queries by chat."""
+        messages = sorted(
+            messages, key=attrgetter('chat_id', 'date_sent', 'pk'))
+
+        for _, chat_messages in groupby(messages, attrgetter('chat_id')):
+            self._record_chat_messages(list(chat_messages))
+
+    def mark_read(self, chat_id: int, account_pk: int,
+                  message_pk: int) -> None:
+        self._chat_member_repository.mark_read(
+            chat_id, account_pk, message_pk)
+
+    def refresh(self, member: ChatMember) -> None:
+        """Fill the last message of a new member of the chat."""
+        message = self._message_repository.get_last_message(member.chat_id)
+        self._chat_member_repository.set_last_message(
+            member, message, *self._get_preview(message))
+
+    def rebuild(self, chat_id: int | None = None) -> int:
+        """Fill inboxes again from messages, return count of members."""
+        members = self._chat_member_repository.get_chat_members(chat_id)
+
+        for member in members.iterator():
+            self.refresh(member)
+
+        self._chat_member_repository.count_unread(members)
+        return members.count()
+
+
+class MessageService:
+    """Logic for saving messages sent through websockets."""
+    _message_repository = MessageRepository()
+    _inbox_service = InboxService()
+
+    def save_messages(self, messages: list[Message]) -> None:
+        """Save a batch, messages saved before are skipped."""
+        with transaction.atomic():
+            messages = self._message_repository.create_messages(messages)
+            self._inbox_service.record_messages(messages)
+
+
+class ChatReplayService:
+    """
+    Logic for catching up reconnected clients: missed events come
+    from the stream of the chat, only events already trimmed
+    from it come from the database.
+    """
+    _event_stream = ChatEventStream()
+    _message_repository = MessageRepository()
+
+    def append(self, chat_id: int, event: dict[str, Any]) -> int:
+        return self._event_stream.append(chat_id, event)
+
+    def discard(self, chat_id: int, seq: int) -> None:
+        self._event_stream.delete(chat_id, seq)
+
+    def get_missed(self, chat_id: int,
+                   seq: int) -> list[dict[str, Any]] | None:
+        """Events after `seq`, `None` if the client must reload."""
+        last_seq, events = self._event_stream.get_after(chat_id, seq)
+
+        # Counter was lost, numbers of the client mean nothing.
+        if seq > last_seq:
+            return None
+
+        first_seq = events[0]['seq'] if events else last_seq + 1
+        missed = first_seq - seq - 1
+
+        if missed > CHAT_REPLAY_DB_LIMIT:
+            return None
+
+        if missed:
+            messages = self._message_repository.get_messages_by_seq(
+                chat_id, seq, first_seq, missed)
+            events = [make_message_event(message, get_sender_name(message))
+                      for message in messages] + events
+
+        return events
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.settings import AUTH_USER_MODEL
+from .models import ChatMember, Message
+from .services.repository import ChatMemberRepository, MessageRepository
+from .services.services import InboxService
+
+
+@receiver(post_delete, sender=AUTH_USER_MODEL)
+def delete_memberships(sender, instance, **kwargs):
+    """Accounts may be in another database, without a cascade."""
+    ChatMemberRepository().delete_account_memberships(instance.pk)
+
+
+@receiver(post_delete, sender=AUTH_USER_MODEL)
+def detach_messages(sender, instance, **kwargs):
+    """Messages stay in chats without the deleted sender."""
+    MessageRepository().detach_account_messages(instance.pk)
+
+
+@receiver(post_save, sender=Message)
+def record_message(sender, instance, created, **kwargs):
+    if created:
+        InboxService().record_messages([instance])
+
+
+@receiver(post_save, sender=ChatMember)
+def refresh_inbox(sender, instance, created, **kwargs):
+    if created:
+        InboxService().refresh(instance)
@@ -0,0 +1 @@
+"""This package is for testing `chats` application."""
@@ -0,0 +1,131 @@
+import asyncio
+from unittest import skipUnless
+
+from channels.auth import UserLazyObject
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+
+from accounts.services.repository import PrincipalRepository
+from accounts.services.services import LazyAccount
+from chats.consumers import message_buffer
+from chats.models import Chat, Message
+from chats.routings import websocket_urlpatterns
+from chats.services.repository import ChatEventStream
+from core.redis_client import get_redis
+from core.tests.test_sessions import is_redis_available
+
+Account = get_user_model()
+
+
+class ChatConsumerTest(TransactionTestCase):
+    def setUp(self):
+        self.account = Account.objects.create(username='username')
+        self.chat = Chat.objects.create(name='Chat name')
+        self.chat.accounts.add(self.account)
+        self.application = URLRouter(websocket_urlpatterns)
+        self.principal = PrincipalRepository().get_principal(self.account.pk)
+
+    def _get_user(self) -> UserLazyObject:
+        """User of a session with a principal, like the middleware sets."""
+        user = UserLazyObject()
+        user._wrapped = LazyAccount(
+            self.principal, lambda: Account.objects.get(pk=self.account.pk))
+        return user
+
+    def _make_communicator(self, slug: str) -> WebsocketCommunicator:
+        communicator = WebsocketCommunicator(
+            self.application, f'/ws/chat/{slug}/',
+            subprotocols=['sharepet.v2.json']
+        )
+        communicator.scope['user'] = self._get_user()
+        return communicator
+
+    def test_connect(self):
+        """Chosen protocol is accepted, missing chats are refused."""
+        async def connect():
+            communicator = self._make_communicator(self.chat.slug)
+            connected = await communicator.connect()
+            await communicator.disconnect()
+            missing = await self._make_communicator('missing').connect()
+            return connected, missing
+
+        connected, missing = asyncio.run(connect())
+
+        self.assertEquals(connected, (True, 'sharepet.v2.json'))
+        self.assertEquals(missing, (False, 4004))
+
+    def test_not_member(self):
+        """Accounts out of the chat are refused."""
+        self.chat.accounts.remove(self.account)
+
+        async def connect():
+            return await self._make_communicator(self.chat.slug).connect()
+
+        connected = asyncio.run(connect())
+
+        self.assertEquals(connected, (False, 4003))
+
+    def test_send(self):
+        """Message is broadcast at once and saved by the buffer."""
+        async def send():
+            communicator = self._make_communicator(self.chat.slug)
+            await communicator.connect()
+            await communicator.send_json_to(
+                {'v': 2, 'events': [{'type': 'message', 'text': 'text'}]})
+            frame = await communicator.receive_json_from(timeout=3)
+            await communicator.disconnect()
+            await message_buffer.flush()
+            return frame
+
+        event, = asyncio.run(send())['events']
+        message = Message.objects.get()
+
+        self.assertEquals((event['text'], event['sender']),
+                          ('text', 'username'))
+        self.assertEquals(event['id'], str(message.uuid))
+        self.assertEquals(message.sender_id, self.account.pk)
+
+    def test_resume_invalid(self):
+        """Resume without a number is an invalid frame."""
+        async def resume():
+            communicator = self._make_communicator(self.chat.slug)
+            await communicator.connect()
+            await communicator.send_json_to(
+                {'v': 2, 'events': [{'type': 'resume', 'seq': 'x'}]})
+            return await communicator.receive_output(timeout=3)
+
+        self.assertEquals(asyncio.run(resume()),
+                          {'type': 'websocket.close', 'code': 1007})
+
+    @skipUnless(is_redis_available(), 'Redis is not available')
+    def test_resume(self):
+        """Events after the sent number are replayed."""
+        keys = ChatEventStream._get_keys(self.chat.pk)
+        get_redis().delete(*keys)
+        self.addCleanup(get_redis().delete, *keys)
+
+        async def resume():
+            communicator = self._make_communicator(self.chat.slug)
+            await communicator.connect()
+
+            for text in ('first', 'second'):
+                await communicator.send_json_to(
+                    {'v': 2, 'events': [{'type': 'message', 'text': text}]})
+                await communicator.receive_json_from(timeout=3)
+
+            await communicator.disconnect()
+            communicator = self._make_communicator(self.chat.slug)
+            await communicator.connect()
+            await communicator.send_json_to(
+                {'v': 2, 'events': [{'type': 'resume', 'seq': 1}]})
+            frame = await communicator.receive_json_from(timeout=3)
+            await communicator.disconnect()
+            await message_buffer.flush()
+            return frame
+
+        events = asyncio.run(resume())['events']
+
+        self.assertEquals([(event['text'], event['seq']) for event in events],
+                          [('second', 2)])
@@ -0,0 +1,89 @@
+import json
+import zlib
+
+import msgpack
+from django.test import SimpleTestCase
+
+from chats.models import Message
+from chats.services.domain import (
+    JSONWireProtocol, MsgpackWireProtocol, WireProtocol, choose_protocol,
+    make_message_event
+)
+from core.exceptions import WireProtocolError
+
+
+class MakeMessageEventTest(SimpleTestCase):
+    def test_make_message_event(self):
+        """Event has the sender name and `seq` only when it is kept."""
+        message = Message(sender_id=1, text='text')
+        event = make_message_event(message, 'sender')
+
+        self.assertEquals(event['sender'], 'sender')
+        self.assertEquals(event['id'], str(message.uuid))
+        self.assertNotIn('seq', event)
+
+        message.seq = 7
+        self.assertEquals(make_message_event(message, 'sender')['seq'], 7)
+
+
+class ChooseProtocolTest(SimpleTestCase):
+    def test_choose_protocol(self):
+        """First known offered protocol is chosen, else version 1."""
+        self.assertIsInstance(
+            choose_protocol(['unknown', 'sharepet.v2.json',
+                             'sharepet.v2.msgpack']),
+            JSONWireProtocol
+        )
+        self.assertEquals(type(choose_protocol([])), WireProtocol)
+
+
+class WireProtocolTest(SimpleTestCase):
+    def test_version_1(self):
+        """Old clients send and get a JSON frame by event."""
+        protocol = WireProtocol()
+
+        self.assertEquals(protocol.decode('{"message": "text"}', None),
+                          [{'type': 'message', 'text': 'text'}])
+        self.assertEquals(protocol.encode([{'type': 'message'}]),
+                          {'text_data': '{"type": "message"}'})
+
+        with self.assertRaises(WireProtocolError):
+            protocol.decode('[]', None)
+
+    def test_json(self):
+        """Events are sent in batches."""
+        protocol = JSONWireProtocol()
+        events = [{'seq': 1}, {'seq': 2}]
+
+        frame = protocol.encode(events)['text_data']
+
+        self.assertEquals(json.loads(frame), {'v': 2, 'events': events})
+        self.assertEquals(protocol.decode(frame, None), events)
+
+        with self.assertRaises(WireProtocolError):
+            protocol.decode('{"events": 1}', None)
+
+    def test_msgpack(self):
+        """Small frames are plain, large ones are deflated."""
+        protocol = MsgpackWireProtocol()
+        small = [{'text': 'text'}]
+        large = [{'text': 'text'}] * 200
+
+        small_frame = protocol.encode(small)['bytes_data']
+        large_frame = protocol.encode(large)['bytes_data']
+
+        self.assertEquals(small_frame[:1], b'\x00')
+        self.assertEquals(large_frame[:1], b'\x01')
+        self.assertLess(len(large_frame), len(json.dumps(large)) / 10)
+        self.assertEquals(protocol.decode(None, small_frame), small)
+        self.assertEquals(protocol.decode(None, large_frame), large)
+
+    def test_msgpack_invalid(self):
+        """Invalid and too large frames are errors."""
+        protocol = MsgpackWireProtocol()
+        bomb = b'\x01' + zlib.compress(
+            msgpack.packb({'events': ['a' * 1024 * 1024]}))
+
+        for frame in (None, b'\x02', b'\x00\xc1', b'\x01\x00', bomb):
+            with self.assertRaises(WireProtocolError):
+                protocol.decode(None, frame)
@@ -0,0 +1,64 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from chats.services.domain import JSONWireProtocol
+from chats.services.mixins import WireProtocolConsumerMixin
+
+
+class Consumer:
+    def __init__(self, *args, **kwargs):
+        self.scope = {'subprotocols': ['sharepet.v2.json']}
+        self.accepted = None
+        self.frames = []
+
+    async def accept(self, subprotocol=None):
+        self.accepted = subprotocol
+
+    async def send(self, text_data=None, bytes_data=None):
+        self.frames.append(text_data)
+
+
+class ProtocolConsumer(WireProtocolConsumerMixin, Consumer):
+    pass
+
+
+class WireProtocolConsumerMixinTest(SimpleTestCase):
+    def setUp(self):
+        self.consumer = ProtocolConsumer()
+
+    def test_accept(self):
+        """Protocol chosen by the client is accepted."""
+        asyncio.run(self.consumer.accept())
+
+        self.assertIsInstance(self.consumer.protocol, JSONWireProtocol)
+        self.assertEquals(self.consumer.accepted, 'sharepet.v2.json')
+
+    def test_deliver(self):
+        """Burst of events is sent in one frame."""
+        async def deliver():
+            await self.consumer.accept()
+
+            for number in range(3):
+                await self.consumer.deliver({'number': number})
+
+            await asyncio.sleep(0.1)
+
+        asyncio.run(deliver())
+
+        self.assertEquals(self.consumer.frames, [
+            '{"v": 2, "events": [{"number": 0}, {"number": 1}, '
+            '{"number": 2}]}'
+        ])
+
+    def test_deliver_version_1(self):
+        """Old clients get a frame by event without batching."""
+        self.consumer.scope['subprotocols'] = []
+
+        async def deliver():
+            await self.consumer.accept()
+            await self.consumer.deliver({'number': 0})
+
+        asyncio.run(deliver())
+
+        self.assertEquals(self.consumer.frames, ['{"number": 0}'])
@@ -0,0 +1,244 @@
+from datetime import datetime, timezone
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from chats.models import Chat, ChatMember, Message
+from chats.services.data_structures import MessageKey
+from chats.services.domain import make_message_event
+from chats.services.repository import ChatEventStream
+from chats.services.services import (
+    ChatHistoryService, ChatReplayService, InboxService, MessageService
+)
+from core.exceptions import InvalidCursorError
+from core.redis_client import get_redis
+from core.tests.test_sessions import is_redis_available
+
+Account = get_user_model()
+
+
+class ChatHistoryServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.chat = Chat.objects.create(name='Chat name')
+        account = Account.objects.create(username='username')
+        cls.messages = [
+            Message.objects.create(sender=account, chat=cls.chat, text=str(i))
+            for i in range(7)
+        ]
+        # Messages sent at the same time are ordered by `id`.
+        Message.objects.filter(
+            pk__in=[message.pk for message in cls.messages[2:5]]
+        ).update(date_sent=cls.messages[2].date_sent)
+        Message.objects.create(
+            sender=account, chat=Chat.objects.create(name='Other'), text='')
+
+    def setUp(self):
+        self.service = ChatHistoryService()
+
+    def _get_texts(self, page) -> list[str]:
+        return [message.text for message in page.messages]
+
+    def test_get_page(self):
+        """Pages go from new to old, every message once and in order."""
+        pages = [self.service.get_page(self.chat.pk, size=3)]
+
+        while pages[-1].next_cursor is not None:
+            pages.append(self.service.get_page(
+                self.chat.pk, pages[-1].next_cursor, size=3))
+
+        self.assertEquals([self._get_texts(page) for page in pages],
+                          [['4', '5', '6'], ['1', '2', '3'], ['0']])
+
+    def test_get_page_exact_size(self):
+        """Last full page has no cursor."""
+        page = self.service.get_page(self.chat.pk, size=7)
+
+        self.assertEquals(len(page.messages), 7)
+        self.assertIsNone(page.next_cursor)
+
+    def test_deleted_sender(self):
+        """Messages of a deleted account stay without the sender."""
+        Account.objects.get(username='username').delete()
+        page = self.service.get_page(self.chat.pk, size=3)
+
+        self.assertEquals(self._get_texts(page), ['4', '5', '6'])
+        self.assertEquals([message.sender for message in page.messages],
+                          [None] * 3)
+
+    def test_cursor(self):
+        """Cursor is decoded to the encoded key."""
+        key = MessageKey(datetime(2022, 1, 1, tzinfo=timezone.utc), 5)
+        cursor = self.service.encode_cursor(key)
+
+        self.assertEquals(self.service.decode_cursor(cursor), key)
+
+    def test_invalid_cursor(self):
+        """Cursor not made by the service raises an error."""
+        for cursor in ('invalid', 'aW52YWxpZA==', '!'):
+            with self.assertRaises(InvalidCursorError):
+                self.service.decode_cursor(cursor)
+
+
+class InboxServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = Account.objects.create(username='sender')
+        cls.reader = Account.objects.create(username='reader')
+        cls.chat = Chat.objects.create(name='Chat name')
+        cls.chat.accounts.add(cls.sender, cls.reader)
+
+    def setUp(self):
+        self.service = InboxService()
+
+    def _send(self, text: str) -> Message:
+        return Message.objects.create(
+            sender=self.sender, chat=self.chat, text=text)
+
+    def _get_member(self, account) -> ChatMember:
+        return ChatMember.objects.get(chat=self.chat, account=account)
+
+    def test_record_message(self):
+        """Members see the last message, only others count it unread."""
+        self._send('first')
+        message = self._send('second')
+        reader = self._get_member(self.reader)
+        sender = self._get_member(self.sender)
+
+        self.assertEquals(reader.last_message, message)
+        self.assertEquals(reader.last_message_text, 'second')
+        self.assertEquals(reader.last_message_sender, 'sender')
+        self.assertEquals(reader.date_last_activity, message.date_sent)
+        self.assertEquals(reader.unread_count, 2)
+        self.assertEquals(sender.unread_count, 0)
+        self.assertEquals(sender.last_read_message, message)
+
+    def test_mark_read(self):
+        """Messages after the read one stay unread, cursor only grows."""
+        first = self._send('first')
+        second = self._send('second')
+        self._send('third')
+
+        self.service.mark_read(self.chat.pk, self.reader.pk, second.pk)
+        self.service.mark_read(self.chat.pk, self.reader.pk, first.pk)
+        reader = self._get_member(self.reader)
+
+        self.assertEquals(reader.last_read_message, second)
+        self.assertEquals(reader.unread_count, 1)
+
+    def test_get_inbox(self):
+        """Recently active chats are first, in one query."""
+        other = Chat.objects.create(name='Other')
+        other.accounts.add(self.reader)
+        self._send('text')
+
+        with self.assertNumQueries(1):
+            chats = [member.chat for member in
+                     self.service.get_inbox(self.reader.pk)]
+
+        self.assertEquals(chats, [self.chat, other])
+
+    def test_rebuild(self):
+        """Inboxes are filled again from messages."""
+        message = self._send('text')
+        ChatMember.objects.update(
+            last_message=None, last_message_text='', unread_count=0)
+
+        self.assertEquals(self.service.rebuild(self.chat.pk), 2)
+        reader = self._get_member(self.reader)
+
+        self.assertEquals(reader.last_message, message)
+        self.assertEquals(reader.unread_count, 1)
+
+
+class MessageServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = Account.objects.create(username='sender')
+        cls.reader = Account.objects.create(username='reader')
+        cls.chat = Chat.objects.create(name='Chat name')
+        cls.chat.accounts.add(cls.sender, cls.reader)
+
+    def setUp(self):
+        self.service = MessageService()
+
+    def _make_messages(self, sender, count: int) -> list[Message]:
+        return [Message(sender=sender, chat=self.chat, text=str(i))
+                for i in range(count)]
+
+    def test_save_messages(self):
+        """Batch is saved once and put in inboxes."""
+        messages = self._make_messages(self.sender, 3)
+
+        self.service.save_messages(messages)
+        self.service.save_messages(messages)
+        member = ChatMember.objects.get(account=self.reader)
+
+        self.assertEquals(Message.objects.count(), 3)
+        self.assertEquals(member.unread_count, 3)
+        self.assertEquals(member.last_message, messages[-1])
+
+    def test_save_messages_read(self):
+        """Sending reads the chat, later messages of others are unread."""
+        messages = self._make_messages(self.reader, 1)
+        messages += self._make_messages(self.sender, 2)
+
+        self.service.save_messages(messages)
+        sender = ChatMember.objects.get(account=self.sender)
+        reader = ChatMember.objects.get(account=self.reader)
+
+        self.assertEquals((sender.unread_count, reader.unread_count), (0, 2))
+        self.assertEquals(reader.last_read_message, messages[0])
+
+
+@skipUnless(is_redis_available(), 'Redis is not available')
+class ChatReplayServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.chat = Chat.objects.create(name='Chat name')
+        cls.sender = Account.objects.create(username='sender')
+
+    def setUp(self):
+        self.service = ChatReplayService()
+        self.keys = ChatEventStream._get_keys(self.chat.pk)
+        get_redis().delete(*self.keys)
+        self.addCleanup(get_redis().delete, *self.keys)
+
+    def _send(self, count: int) -> list[dict]:
+        events = []
+
+        for number in range(count):
+            message = Message(
+                sender=self.sender, chat=self.chat, text=str(number))
+            message.seq = self.service.append(self.chat.pk, make_message_event(
+                message, self.sender.username))
+            message.save()
+            events.append(make_message_event(message, self.sender.username))
+
+        return events
+
+    def test_get_missed(self):
+        """Events after the seq are replayed from the stream."""
+        events = self._send(3)
+
+        self.assertEquals(self.service.get_missed(self.chat.pk, 1),
+                          events[1:])
+        self.assertEquals(self.service.get_missed(self.chat.pk, 3), [])
+
+    def test_get_missed_trimmed(self):
+        """Events trimmed from the stream are read from the database."""
+        events = self._send(5)
+        get_redis().xtrim(self.keys[1], maxlen=2)
+
+        self.assertEquals(self.service.get_missed(self.chat.pk, 1),
+                          events[1:])
+
+    def test_get_missed_reset(self):
+        """Lost counter and too large gaps make the client reload."""
+        self._send(1)
+
+        self.assertIsNone(self.service.get_missed(self.chat.pk, 5))
+
+        get_redis().set(self.keys[0], 10_000)
+        self.assertIsNone(self.service.get_missed(self.chat.pk, 1))
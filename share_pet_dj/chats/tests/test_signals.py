@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from chats.models import Chat, ChatMember
+
+Account = get_user_model()
+
+
+class DeleteMembershipsTest(TestCase):
+    def test_delete_account(self):
+        """Memberships of a deleted account are deleted too."""
+        account = Account.objects.create(username='username1')
+        chat = Chat.objects.create(name='Chat name')
+        chat.accounts.add(account)
+
+        account.delete()
+
+        self.assertFalse(ChatMember.objects.exists())
+        self.assertTrue(Chat.objects.exists())
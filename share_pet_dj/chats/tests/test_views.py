@@ -0,0 +1,169 @@
+import os
+import shutil
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from chats.models import Chat, ChatMember, Message
+
+Account = get_user_model()
+
+
+class ChatDetailViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.chat = Chat.objects.create(name='Chat name')
+        cls.accounts = [
+            Account.objects.create(username=f'username{i}') for i in range(5)
+        ]
+
+        for account in cls.accounts * 2:
+            Message.objects.create(
+                sender=account, chat=cls.chat, text=f'from {account}')
+
+        cls.url = reverse('chat_detail', kwargs={'slug': cls.chat.slug})
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_GET(self):
+        """Messages are rendered with their senders."""
+        response = self.client.get(self.url)
+
+        self.assertEquals(response.status_code, 200)
+        self.assertTemplateUsed(response, 'chats/chat.html')
+        self.assertEquals(len(response.context['chat_messages']), 10)
+        self.assertContains(response, '<b>username4</b>', count=2)
+
+    def test_senders_are_joined(self):
+        """Chat and the page of messages with senders take two queries."""
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_GET_newest_page(self):
+        """Only the newest page is rendered with the cursor of older."""
+        Message.objects.bulk_create(
+            Message(sender=self.accounts[0], chat=self.chat, text='old')
+            for _ in range(50)
+        )
+        response = self.client.get(self.url)
+
+        self.assertEquals(len(response.context['chat_messages']), 50)
+        self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_GET_marks_read(self):
+        """Opening the chat reads its messages."""
+        self.chat.accounts.add(self.accounts[1])
+        Message.objects.create(
+            sender=self.accounts[0], chat=self.chat, text='unread')
+        self.client.force_login(self.accounts[1])
+        self.client.get(self.url)
+
+        member = ChatMember.objects.get(account=self.accounts[1])
+        self.assertEquals(member.unread_count, 0)
+
+
+class ChatHistoryViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        chat = Chat.objects.create(name='Chat name')
+        account = Account.objects.create(username='username')
+        Message.objects.bulk_create(
+            Message(sender=account, chat=chat, text=f'text {i}')
+            for i in range(60)
+        )
+        cls.detail_url = reverse('chat_detail', kwargs={'slug': chat.slug})
+        cls.url = reverse('chat_history', kwargs={'slug': chat.slug})
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_GET(self):
+        """Page older than the cursor is returned without next cursor."""
+        cursor = self.client.get(self.detail_url).context['next_cursor']
+        response = self.client.get(self.url, {'cursor': cursor})
+        data = response.json()
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(data['html'].count('class="message"'), 10)
+        self.assertIsNone(data['next'])
+
+    def test_GET_invalid_cursor(self):
+        """Cursor not made by the app is a bad request."""
+        response = self.client.get(self.url, {'cursor': 'invalid'})
+
+        self.assertEquals(response.status_code, 400)
+
+
+class ChatListViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(username='username')
+        Chat.objects.create(name='Not member')
+
+        for name in ('First', 'Second'):
+            Chat.objects.create(name=name).accounts.add(cls.account)
+
+        cls.url = reverse('chat_list')
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_GET(self):
+        """Only chats of the account are listed."""
+        self.client.force_login(self.account)
+        response = self.client.get(self.url)
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(
+            [member.chat.name for member in response.context['chat_members']],
+            ['Second', 'First']
+        )
+
+    def test_GET_anonymous(self):
+        """Anonymous accounts are redirected to login."""
+        self.assertEquals(self.client.get(self.url).status_code, 302)
+
+
+@override_settings(MEDIA_ROOT='test_chat_files')
+class ChatFileViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = Account.objects.create(username='member')
+        cls.stranger = Account.objects.create(username='stranger')
+        chat = Chat.objects.create(name='Chat name')
+        chat.accounts.add(cls.member)
+        Message.objects.create(
+            sender=cls.member, chat=chat, file='chats/2022/01/01/file.txt')
+        cls.url = '/media/chats/2022/01/01/file.txt'
+
+    def setUp(self):
+        self.client = Client()
+        os.makedirs('test_chat_files/chats/2022/01/01', exist_ok=True)
+        self.addCleanup(shutil.rmtree, 'test_chat_files', ignore_errors=True)
+
+        with open('test_chat_files/chats/2022/01/01/file.txt', 'w') as file:
+            file.write('content')
+
+    def test_member(self):
+        """Member of the chat gets the file."""
+        self.client.force_login(self.member)
+        response = self.client.get(self.url)
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(b''.join(response.streaming_content), b'content')
+        self.assertIn('private', response.headers['Cache-Control'])
+
+    def test_not_member(self):
+        """Anonymous and other accounts are denied."""
+        self.assertEquals(self.client.get(self.url).status_code, 403)
+
+        self.client.force_login(self.stranger)
+        self.assertEquals(self.client.get(self.url).status_code, 403)
+
+    def test_other_url(self):
+        """File is not served through the other media URLs."""
+        for url in ('/media/./chats/2022/01/01/file.txt',
+                    '/media/accounts/../chats/2022/01/01/file.txt'):
+            self.assertEquals(self.client.get(url).status_code, 404)
@@ -5,4 +5,6 @@ from . import views
 urlpatterns = [
     path('', views.chat_list, name='chat_list'),
     path('chat/<slug:slug>', views.chat_detail, name='chat_detail'),
+    path('chat/<slug:slug>/history', views.chat_history,
+         name='chat_history'),
 ]
@@ -1,20 +1,90 @@
-from django.views.generic import ListView, DetailView
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.utils.decorators import method_decorator
+from django.views.generic import DetailView, ListView, View
+from django.views.generic.detail import SingleObjectMixin
 
+from config.settings import INBOX_PAGE_SIZE
+from core.exceptions import InvalidCursorError
+from core.media import MediaView
 from .forms import MessageForm
 from .models import Chat
 from .services.mixins import ChatDetailFormMixin
+from .services.repository import MessageRepository
+from .services.services import ChatHistoryService, InboxService
 
 
+@method_decorator(login_required, name='dispatch')
 class ChatListView(ListView):
-    model = Chat
+    """Inbox of the account, recently active chats first."""
+    _inbox_service = InboxService()
+    context_object_name = 'chat_members'
+    paginate_by = INBOX_PAGE_SIZE
     template_name = 'chats/chats.html'
 
+    def get_queryset(self):
+        return self._inbox_service.get_inbox(self.request.user.pk)
+
 
 class ChatDetailView(ChatDetailFormMixin, DetailView):
+    """Chat with the newest page of its history."""
+    _chat_history_service = ChatHistoryService()
+    _inbox_service = InboxService()
     form_class = MessageForm
     model = Chat
     template_name = 'chats/chat.html'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = self._chat_history_service.get_page(self.object.pk)
+        context['chat_messages'] = page.messages
+        context['next_cursor'] = page.next_cursor
+        # Clients resume from it to get messages not saved yet.
+        context['last_seq'] = max(
+            (message.seq for message in page.messages
+             if message.seq is not None), default=None)
+
+        if page.messages and self.request.user.is_authenticated:
+            self._inbox_service.mark_read(
+                self.object.pk, self.request.user.pk, page.messages[-1].pk)
+
+        return context
+
+
+class ChatHistoryView(SingleObjectMixin, View):
+    """Page of the history of a chat older than `cursor`."""
+    _chat_history_service = ChatHistoryService()
+    model = Chat
+
+    def get(self, request, *args, **kwargs):
+        chat = self.get_object()
+
+        try:
+            page = self._chat_history_service.get_page(
+                chat.pk, request.GET.get('cursor'))
+        except InvalidCursorError:
+            return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+        html = render_to_string(
+            'chats/messages.html', {'chat_messages': page.messages}, request)
+
+        return JsonResponse({'html': html, 'next': page.next_cursor})
+
+
+class ChatFileView(MediaView):
+    """Files of chat messages only for members of the chat."""
+    _message_repository = MessageRepository()
+    prefix = 'chats/'
+    cache_control = 'private, max-age=31536000, immutable'
+
+    def has_access(self, request, name: str) -> bool:
+        return (request.user.is_authenticated and
+                self._message_repository.is_file_available(
+                    request.user.pk, name))
+
 
 chat_list = ChatListView.as_view()
 chat_detail = ChatDetailView.as_view()
+chat_history = ChatHistoryView.as_view()
+chat_file = ChatFileView.as_view()
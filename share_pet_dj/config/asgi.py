@@ -1,17 +1,18 @@
 import os
 
-from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 
 from django.core.asgi import get_asgi_application
 
-from chats import routings
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django_asgi_application = get_asgi_application()
+
+from accounts.middleware import PrincipalAuthMiddlewareStack  # noqa: E402
+from chats import routings  # noqa: E402
 
 application = ProtocolTypeRouter({
-    'http': get_asgi_application(),
-    'websocket': AuthMiddlewareStack(
+    'http': django_asgi_application,
+    'websocket': PrincipalAuthMiddlewareStack(
         URLRouter(
             routings.websocket_urlpatterns
         )
@@ -1,9 +1,17 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_process_shutdown
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 app = Celery('config')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+
+
+@worker_process_shutdown.connect
+def close_email_connections(**kwargs):
+    from core.email_backends import SMTPConnectionPool
+
+    SMTPConnectionPool.clear_all()
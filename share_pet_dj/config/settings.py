@@ -36,13 +36,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.PrincipalAuthenticationMiddleware',
+    'accounts.middleware.BanMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
+    'core.middleware.BatchLoaderMiddleware',
     'core.middleware.Process500',
 ]
 
@@ -70,15 +73,53 @@ WSGI_APPLICATION = 'config.wsgi.application'
 DATABASES = {
     'default': {
         'NAME': 'share_pet',
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db_backends.postgresql',
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
     },
 }
 
-# DATABASE_ROUTERS = [
-#     'core.db_routers.ServiceRouter',
-# ]
+# Connections are returned to the pool of the process after
+# every request, see `core.db_backends.postgresql`.
+DB_POOL_SIZE = 10
+DB_POOL_TIMEOUT = 5
+DB_POOL_HEALTH_CHECK_INTERVAL = 30
+DB_POOL_MAX_AGE = 60 * 30
+
+# Identity data and sessions on their own Postgres,
+# for example ACCOUNTS_DB_HOST=localhost ACCOUNTS_DB_PORT=5433
+if os.getenv('ACCOUNTS_DB_HOST'):
+    DATABASES['accounts_db'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('ACCOUNTS_DB_NAME', 'share_pet_accounts'),
+        'HOST': os.getenv('ACCOUNTS_DB_HOST'),
+        'PORT': os.getenv('ACCOUNTS_DB_PORT', ''),
+    }
+
+ACCOUNTS_DATABASE = 'accounts_db' if 'accounts_db' in DATABASES else 'default'
+
+# Read replicas, for example DB_REPLICA_HOSTS=localhost:5433,localhost:5434
+for number, address in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    host, port = address.split(':') if ':' in address else (address, '')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [
+    alias for alias in DATABASES if alias.startswith('replica_')]
+REPLICA_MAX_LAG = 2
+REPLICA_LAG_CHECK_INTERVAL = 5
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE_NAME = 'primary_pin'
+
+DATABASE_ROUTERS = [
+    'core.db_routers.AccountsRouter',
+    'core.db_routers.ReplicaRouter',
+]
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -134,15 +175,33 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+# `python`, `x-accel` for nginx or `x-sendfile` for Apache.
+MEDIA_SERVE_MODE = os.getenv('MEDIA_SERVE_MODE', 'python')
+# Internal nginx location with `alias` to `MEDIA_ROOT`.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
 
 DJANGORESIZED_DEFAULT_QUALITY = 75
 
+AVATAR_SIZES = {
+    'thumbnail': 64,
+    'chat': 128,
+    'profile': 512,
+}
+AVATAR_FORMATS = 'webp', 'jpeg'
+AVATAR_QUALITY = 80
+AVATAR_MAX_PIXELS = 40_000_000
+
 EMAIL_BACKEND = 'djcelery_email.backends.CeleryEmailBackend'
 EMAIL_USE_TLS = True
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_PORT = os.getenv('EMAIL_PORT')
+EMAIL_POOL_SIZE = 4
+EMAIL_POOL_HEALTH_CHECK_INTERVAL = 30
+EMAIL_POOL_MAX_AGE = 60 * 10
+EMAIL_POOL_MAX_MESSAGES = 1000
+EMAIL_SEND_RETRIES = 2
 
 LOGOUT_REDIRECT_URL = reverse_lazy('login')
 
@@ -150,7 +209,8 @@ ACCOUNT_EMAIL_CONFIRMATION_EXPIRE_DAYS = 3
 ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_EMAIL_VERIFICATION = 'mandatory'
 ACCOUNT_MAX_EMAIL_ADDRESSES = 1
-ACCOUNT_LOGIN_ATTEMPTS_LIMIT = 3
+# Login attempts are limited by `RATE_LIMITS`.
+ACCOUNT_LOGIN_ATTEMPTS_LIMIT = None
 ACCOUNT_USERNAME_BLACKLIST = 'ye11ow_banana',
 ACCOUNT_USER_DISPLAY = lambda user: user.username or user.email
 ACCOUNT_USERNAME_MIN_LENGTH = 3
@@ -158,6 +218,72 @@ ACCOUNT_AUTHENTICATION_METHOD = 'username_email'
 
 REDIS_HOST = os.getenv('REDIS_HOST')
 REDIS_PORT = os.getenv('REDIS_PORT')
+REDIS_SOCKET_TIMEOUT = 0.5
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': (
+            f'redis://{REDIS_HOST or "localhost"}:{REDIS_PORT or 6379}/1'
+        ),
+        'OPTIONS': {
+            'socket_timeout': REDIS_SOCKET_TIMEOUT,
+            'socket_connect_timeout': REDIS_SOCKET_TIMEOUT,
+            'LOCAL_MAX_ENTRIES': 10000,
+            'LOCAL_TIMEOUT': 30,
+            'FILL_TIMEOUT': 5,
+        },
+    },
+}
+
+MODEL_OBJECT_CACHE_TIMEOUT = 60 * 5
+
+# Hits and seconds of sliding windows by kind of key.
+RATE_LIMITS = {
+    'login': {'ip': (30, 60 * 5), 'account': (5, 60 * 5)},
+    'signup': {'ip': (10, 60 * 60), 'email': (3, 60 * 60)},
+    'password_reset': {'ip': (10, 60 * 60), 'email': (3, 60 * 60)},
+}
+# `request.META` key of the client address set by the proxy in front,
+# like `HTTP_X_FORWARDED_FOR`, without it `REMOTE_ADDR` is used.
+RATE_LIMIT_TRUSTED_PROXY_HEADER = os.getenv('RATE_LIMIT_TRUSTED_PROXY_HEADER')
+
+SESSION_ENGINE = 'core.sessions'
+
+# Threads for database work of consumers and calls allowed to wait.
+CONSUMER_DB_WORKERS = 8
+CONSUMER_DB_BACKLOG = 200
+
+# Messages of websockets are saved in batches of at most
+# `MESSAGE_BATCH_SIZE` every `MESSAGE_BATCH_INTERVAL` seconds,
+# at most `MESSAGE_BATCH_BACKLOG` wait to be saved.
+MESSAGE_BATCH_SIZE = 100
+MESSAGE_BATCH_INTERVAL = 0.05
+MESSAGE_BATCH_BACKLOG = 5000
+
+# Events sent to a websocket of protocol version 2 wait at most
+# `WS_BATCH_INTERVAL` seconds to be sent in one frame with others,
+# frames have at most `WS_BATCH_SIZE` events. Frames of at least
+# `WS_COMPRESS_MIN_SIZE` bytes are deflated, clients may send
+# frames of at most `WS_MAX_FRAME_SIZE` bytes.
+WS_BATCH_INTERVAL = 0.02
+WS_BATCH_SIZE = 50
+WS_COMPRESS_MIN_SIZE = 1024
+WS_MAX_FRAME_SIZE = 64 * 1024
+
+# Recent events of every chat are kept in a Redis Stream of about
+# `CHAT_REPLAY_BUFFER_SIZE` events for `CHAT_REPLAY_TTL` seconds.
+# Reconnected clients which missed more events get at most
+# `CHAT_REPLAY_DB_LIMIT` of them from the database.
+CHAT_REPLAY_BUFFER_SIZE = 500
+CHAT_REPLAY_TTL = 60 * 60 * 24
+CHAT_REPLAY_DB_LIMIT = 500
+
+# Messages in one page of the history of a chat.
+CHAT_HISTORY_PAGE_SIZE = 50
+
+# Chats in one page of the inbox of an account.
+INBOX_PAGE_SIZE = 30
 
 CHANNEL_LAYERS = {
     'default': {
@@ -173,3 +299,16 @@ CELERY_BROKER_TRANSPORT_OPTIONS = {
     'visibility_timeout': 3600
 }
 CELERY_RESULT_BACKEND = f'redis://{REDIS_HOST}:{REDIS_PORT}/0'
+CELERY_EMAIL_BACKEND = 'core.email_backends.PooledSMTPEmailBackend'
+CELERY_EMAIL_CHUNK_SIZE = 50
+CELERY_BEAT_SCHEDULE = {
+    'send-notification-digests': {
+        'task': 'notifications.tasks.send_notification_digests',
+        'schedule': 60 * 60,
+    },
+}
+
+NOTIFICATION_BATCH_SIZE = 500
+NOTIFICATION_DIGEST_EVENTS = (
+    'sb_liked_comment', 'sb_liked_article', 'sb_liked_animal',
+)
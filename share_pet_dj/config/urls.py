@@ -1,20 +1,26 @@
 from django.conf.urls.i18n import i18n_patterns
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from chats.views import chat_file
 from config import settings
+from core.media import media
+from core.metrics import metrics_view
+
+MEDIA_PREFIX = settings.MEDIA_URL.strip('/')
 
 
 handler404 = 'core.pages.handler404'
 handler400 = 'core.pages.handler400'
 
 urlpatterns = [
-
+    path(f'{MEDIA_PREFIX}/chats/<path:path>', chat_file, name='chat_file'),
+    path(f'{MEDIA_PREFIX}/<path:path>', media, name='media'),
 ] + i18n_patterns(
     path('i18n/', include('django.conf.urls.i18n')),
+    path('admin/metrics/', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('chats/', include('chats.urls')),
     prefix_default_language=False
-) + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+)
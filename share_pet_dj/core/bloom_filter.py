@@ -0,0 +1,64 @@
+import math
+from hashlib import blake2b
+from typing import Iterable
+
+from core.redis_client import get_redis
+
+
+class RedisBloomFilter:
+    """
+    Bloom filter stored in a Redis bitmap.
+
+    Answers "definitely not added" or "maybe added"
+    with one round trip and without any Redis module.
+    """
+    def __init__(self, key: str, capacity: int, error_rate: float = 0.01):
+        self.key = key
+        self.ready_key = f'{key}:ready'
+        self.size = self._get_size(capacity, error_rate)
+        self.hash_count = self._get_hash_count(self.size, capacity)
+
+    @staticmethod
+    def _get_size(capacity: int, error_rate: float) -> int:
+        return math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+
+    @staticmethod
+    def _get_hash_count(size: int, capacity: int) -> int:
+        return max(1, round(size / capacity * math.log(2)))
+
+    def _get_offsets(self, item: str) -> list[int]:
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+
+        return [(first + i * second) % self.size
+                for i in range(self.hash_count)]
+
+    def add(self, *items: str) -> None:
+        self.add_many(items)
+
+    def add_many(self, items: Iterable[str]) -> None:
+        pipeline = get_redis().pipeline(transaction=False)
+
+        for item in items:
+            for offset in self._get_offsets(item):
+                pipeline.setbit(self.key, offset, 1)
+
+        pipeline.execute()
+
+    def __contains__(self, item: str) -> bool:
+        pipeline = get_redis().pipeline(transaction=False)
+
+        for offset in self._get_offsets(item):
+            pipeline.getbit(self.key, offset)
+
+        return all(pipeline.execute())
+
+    def is_ready(self) -> bool:
+        return bool(get_redis().exists(self.ready_key))
+
+    def mark_ready(self) -> None:
+        get_redis().set(self.ready_key, 1)
+
+    def clear(self) -> None:
+        get_redis().delete(self.key, self.ready_key)
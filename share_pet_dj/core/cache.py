@@ -0,0 +1,388 @@
+"""
+This module is a two-tier cache backend: a bounded LRU
+in the memory of the process in front of Redis.
+
+Writes publish the changed keys on a Redis pub/sub channel
+and other processes drop them from their memory.
+While the channel is not listened to, the memory tier
+is skipped, so values are never served stale for longer
+than `LOCAL_TIMEOUT` seconds.
+"""
+import json
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+from uuid import uuid4
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+from django.utils.functional import cached_property
+from redis.commands.core import Script
+
+from core.metrics import metrics
+from core.repository import CacheStats
+from core.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+# Delete the lock in KEYS[1] only if it is still held by ARGV[1].
+RELEASE_LOCK_SCRIPT = '''
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+
+return 0
+'''
+
+
+class LocalTier:
+    """
+    LRU of pickled values with a TTL shared by all threads
+    of the process, kept coherent through `channel`.
+    """
+    _instances: dict[str, 'LocalTier'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, name: str, get_client, max_entries: int,
+                 timeout: int, retry_interval: float = 5):
+        self.name = name
+        self.channel = f'{name}:invalidations'
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.origin = uuid4().hex
+        self.stats = {'local': CacheStats(), 'redis': CacheStats()}
+        self.flights = SingleFlight()
+        self._get_client = get_client
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        for tier, stats in self.stats.items():
+            metrics.register(f'{name}.{tier}', stats)
+
+    @classmethod
+    def for_cache(cls, name: str, *args, **kwargs) -> 'LocalTier':
+        with cls._instances_lock:
+            if name not in cls._instances:
+                cls._instances[name] = cls(name, *args, **kwargs)
+            return cls._instances[name]
+
+    def get(self, key: str) -> Any:
+        if self._thread is None:
+            self.start()
+
+        if not self._synced.is_set():
+            return MISSING
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+            else:
+                entry = None
+
+        if entry is None:
+            self.stats['local'].misses += 1
+            return MISSING
+
+        self.stats['local'].hits += 1
+        return pickle.loads(entry[1])
+
+    def set(self, key: str, value: Any, timeout: int | None) -> None:
+        if not self._synced.is_set() or timeout == 0:
+            return
+
+        timeout = self.timeout if timeout is None else min(
+            timeout, self.timeout)
+        entry = (time.monotonic() + timeout,
+                 pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def publish(self, keys: list[str] | None) -> None:
+        """Make other processes drop `keys`, or everything if `None`."""
+        self._get_client().publish(self.channel, json.dumps({
+            'origin': self.origin, 'keys': keys}))
+
+    def _handle(self, message: dict) -> None:
+        data = json.loads(message['data'])
+
+        if data['origin'] == self.origin:
+            return
+
+        if data['keys'] is None:
+            self.clear()
+        else:
+            self.delete_many(data['keys'])
+
+    def _listen(self) -> None:
+        pubsub = self._get_client().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+
+        try:
+            # Invalidations may have been missed while
+            # the channel was not listened to.
+            self.clear()
+            self._synced.set()
+
+            while True:
+                message = pubsub.get_message(timeout=1)
+
+                if message is not None:
+                    self._handle(message)
+        finally:
+            self._synced.clear()
+            pubsub.close()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._listen()
+            except Exception as error:
+                logger.warning('%s is not synced: %r', self.name, error)
+
+            time.sleep(self.retry_interval)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+
+class TwoTierCache(RedisCache):
+    """
+    Redis cache with `LocalTier` in front of it.
+
+    Options besides the ones of `RedisCache`:
+    `LOCAL_MAX_ENTRIES`, `LOCAL_TIMEOUT` and `FILL_TIMEOUT`,
+    seconds a process waits for another one to fill a missed key
+    in `get_or_set` before filling it itself,
+    `socket_timeout` and `socket_connect_timeout` of connections.
+    """
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        options = dict(self._options)
+        self.fill_timeout = options.pop('FILL_TIMEOUT', 5)
+        max_entries = options.pop('LOCAL_MAX_ENTRIES', 10000)
+        local_timeout = options.pop('LOCAL_TIMEOUT', 30)
+        self._connection_options = {
+            name: options.pop(name)
+            for name in ('socket_timeout', 'socket_connect_timeout')
+            if name in options
+        }
+        self._options = options
+        self._release_lock_script: Script | None = None
+
+        self._local = LocalTier.for_cache(
+            f'cache:{self.key_prefix or "default"}',
+            lambda: self._cache.get_client(write=True),
+            max_entries, local_timeout
+        )
+
+    @cached_property
+    def _cache(self):
+        # The client of Django 4.0 doesn't pass options to connections.
+        client = self._class(self._servers, **self._options)
+        client._pool_options.update(self._connection_options)
+        return client
+
+    @property
+    def stats(self) -> dict[str, CacheStats]:
+        return self._local.stats
+
+    def _get(self, key: str) -> Any:
+        value = self._local.get(key)
+
+        if value is not MISSING:
+            return value
+
+        value = self._cache.get(key, MISSING)
+
+        if value is MISSING:
+            self.stats['redis'].misses += 1
+        else:
+            self.stats['redis'].hits += 1
+            self._local.set(key, value, None)
+
+        return value
+
+    def _changed(self, values: dict[str, Any], timeout) -> None:
+        for key, value in values.items():
+            self._local.set(key, value, timeout)
+
+        self._local.publish(list(values))
+
+    def _deleted(self, keys: list[str]) -> None:
+        self._local.delete_many(keys)
+        self._local.publish(keys)
+
+    def get(self, key, default=None, version=None):
+        value = self._get(self.make_and_validate_key(key, version=version))
+        return default if value is MISSING else value
+
+    def get_many(self, keys, version=None):
+        key_map = {
+            self.make_and_validate_key(key, version=version): key
+            for key in keys
+        }
+        values = {}
+
+        for key in key_map:
+            value = self._local.get(key)
+
+            if value is not MISSING:
+                values[key] = value
+
+        missed = [key for key in key_map if key not in values]
+
+        if missed:
+            found = self._cache.get_many(missed)
+            self.stats['redis'].hits += len(found)
+            self.stats['redis'].misses += len(missed) - len(found)
+
+            for key, value in found.items():
+                self._local.set(key, value, None)
+
+            values.update(found)
+
+        return {key_map[key]: value for key, value in values.items()}
+
+    def has_key(self, key, version=None):
+        return self.get(key, MISSING, version=version) is not MISSING
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        added = self._cache.add(key, value, timeout)
+
+        if added:
+            self._changed({key: value}, timeout)
+
+        return added
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        self._cache.set(key, value, timeout)
+        self._changed({key: value}, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        data = {
+            self.make_and_validate_key(key, version=version): value
+            for key, value in data.items()
+        }
+        timeout = self.get_backend_timeout(timeout)
+        self._cache.set_many(data, timeout)
+        self._changed(data, timeout)
+        return []
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        deleted = self._cache.delete(key)
+        self._deleted([key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version)
+                for key in keys]
+        self._cache.delete_many(keys)
+        self._deleted(keys)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._cache.incr(key, delta)
+        self._deleted([key])
+        return value
+
+    def clear(self):
+        cleared = self._cache.clear()
+        self._local.clear()
+        self._local.publish(None)
+        return cleared
+
+    def _wait_for_fill(self, key: str) -> Any:
+        deadline = time.monotonic() + self.fill_timeout
+
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self._cache.get(key, MISSING)
+
+            if value is not MISSING:
+                return value
+
+        return MISSING
+
+    def _get_release_lock_script(self, client) -> Script:
+        if self._release_lock_script is None:
+            self._release_lock_script = client.register_script(
+                RELEASE_LOCK_SCRIPT)
+
+        return self._release_lock_script
+
+    def _fill(self, key, default, timeout, version) -> Any:
+        made_key = self.make_and_validate_key(key, version=version)
+        value = self._get(made_key)
+
+        if value is not MISSING:
+            return value
+
+        lock_key = f'{made_key}:fill'
+        client = self._cache.get_client(lock_key, write=True)
+
+        if not client.set(lock_key, self._local.origin, nx=True,
+                          ex=self.fill_timeout):
+            value = self._wait_for_fill(made_key)
+
+            if value is not MISSING:
+                return value
+
+        try:
+            value = default() if callable(default) else default
+            self.add(key, value, timeout=timeout, version=version)
+        finally:
+            # The lock may have expired and be taken by another process.
+            self._get_release_lock_script(client)(
+                keys=[lock_key], args=[self._local.origin])
+
+        return self.get(key, value, version=version)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Misses of one key are filled once: by one thread
+        of the process and, through a Redis lock, by one process.
+        """
+        value = self.get(key, MISSING, version=version)
+
+        if value is not MISSING:
+            return value
+
+        return self._local.flights.do(
+            self.make_and_validate_key(key, version=version),
+            lambda: self._fill(key, default, timeout, version)
+        )
@@ -0,0 +1,241 @@
+"""
+This module is a PostgreSQL backend with a pool
+of connections in every process.
+
+Django closes connections after every request and around
+every `database_sync_to_async` call; here closing only
+returns the connection to the pool, so WSGI workers
+and the ASGI thread pool reuse the same connections.
+Use `close_all` to close idle pooled connections too.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+from django.db import connections
+from django.db.backends.postgresql import base
+from psycopg2 import Error, OperationalError
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN, connection
+)
+
+from config.settings import (
+    DB_POOL_HEALTH_CHECK_INTERVAL, DB_POOL_MAX_AGE, DB_POOL_SIZE,
+    DB_POOL_TIMEOUT
+)
+from core.db_backends.postgresql.creation import DatabaseCreation
+from core.metrics import metrics
+
+# psycopg2 reports the default isolation level as `None`.
+UNSET = object()
+
+
+class PooledConnection:
+    def __init__(self, connection: connection):
+        self.connection = connection
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.isolation_level: Any = UNSET
+
+
+class DatabaseConnectionPool:
+    """
+    Bounded pool of connections to one database.
+
+    An idle connection is checked with `SELECT 1` before reuse
+    if it was not used for `health_check_interval` seconds.
+    Connections older than `max_age` seconds are replaced.
+    """
+    _pools: dict[tuple, 'DatabaseConnectionPool'] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, alias: str, size: int = DB_POOL_SIZE,
+                 health_check_interval: float = DB_POOL_HEALTH_CHECK_INTERVAL,
+                 max_age: float = DB_POOL_MAX_AGE):
+        self.alias = alias
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.max_age = max_age
+        self._idle: deque[PooledConnection] = deque()
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(size)
+
+    @classmethod
+    def for_database(cls, alias: str,
+                     conn_params: dict) -> 'DatabaseConnectionPool':
+        """Pool by parameters too, test databases get their own pools."""
+        key = (alias, *sorted(
+            (name, str(value)) for name, value in conn_params.items()))
+
+        with cls._pools_lock:
+            if key not in cls._pools:
+                cls._pools[key] = cls(alias)
+            return cls._pools[key]
+
+    @classmethod
+    def clear_database(cls, alias: str | None = None) -> None:
+        """Close idle connections of pools of `alias` or all pools."""
+        with cls._pools_lock:
+            pools = [
+                pool for pool in cls._pools.values()
+                if alias is None or pool.alias == alias
+            ]
+
+        for pool in pools:
+            pool.clear()
+
+    def _mark(self, name: str) -> None:
+        metrics.rate(f'db.{self.alias}.{name}').mark()
+
+    def _discard(self, pooled: PooledConnection) -> None:
+        self._mark('connections_discarded')
+
+        try:
+            pooled.connection.close()
+        except Error:
+            pass
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        now = time.monotonic()
+
+        if pooled.connection.closed or now - pooled.created > self.max_age:
+            return False
+
+        if now - pooled.last_used < self.health_check_interval:
+            return True
+
+        try:
+            with pooled.connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Error:
+            return False
+
+        return True
+
+    def _get_idle(self) -> PooledConnection | None:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                pooled = self._idle.pop()
+
+            if self._is_healthy(pooled):
+                return pooled
+
+            self._discard(pooled)
+
+    def acquire(self, connect: Callable[[], connection],
+                timeout: float | None = DB_POOL_TIMEOUT) -> PooledConnection:
+        """
+        Return an idle connection or a new one from `connect`.
+
+        Blocks while `size` connections are in use.
+        """
+        start = time.perf_counter()
+
+        if not self._semaphore.acquire(timeout=timeout):
+            raise OperationalError(
+                f'No free connection in the pool of {self.alias}.')
+
+        metrics.timer(f'db.{self.alias}.pool_wait').observe(
+            time.perf_counter() - start)
+
+        try:
+            pooled = self._get_idle()
+
+            if pooled is None:
+                self._mark('connections_opened')
+                pooled = PooledConnection(connect())
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        return pooled
+
+    @staticmethod
+    def _reset(pooled: PooledConnection) -> bool:
+        """Roll back an unfinished transaction, `False` if impossible."""
+        status = pooled.connection.info.transaction_status
+
+        if status == TRANSACTION_STATUS_IDLE:
+            return True
+
+        if status == TRANSACTION_STATUS_UNKNOWN:
+            return False
+
+        try:
+            pooled.connection.rollback()
+        except Error:
+            return False
+
+        return True
+
+    def release(self, pooled: PooledConnection, broken: bool = False) -> None:
+        pooled.last_used = time.monotonic()
+
+        if broken or pooled.connection.closed or not self._reset(pooled):
+            self._discard(pooled)
+        else:
+            with self._lock:
+                self._idle.append(pooled)
+
+        self._semaphore.release()
+
+    def clear(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+
+        for pooled in idle:
+            self._discard(pooled)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend on top of `DatabaseConnectionPool`.
+
+    Set `POOL` to `False` in the database settings
+    to open a connection for every request again.
+    """
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_pool = self.settings_dict.get('POOL', True)
+        self._pool: DatabaseConnectionPool | None = None
+        self._pooled: PooledConnection | None = None
+
+    def get_new_connection(self, conn_params):
+        if not self.use_pool:
+            return super().get_new_connection(conn_params)
+
+        self._pool = DatabaseConnectionPool.for_database(
+            self.alias, conn_params)
+        self._pooled = pooled = self._pool.acquire(
+            lambda: self._connect(conn_params))
+
+        # Set by `_connect` only for new connections.
+        if pooled.isolation_level is UNSET:
+            pooled.isolation_level = self.isolation_level
+
+        self.isolation_level = pooled.isolation_level
+        return pooled.connection
+
+    def _connect(self, conn_params: dict) -> connection:
+        return super().get_new_connection(conn_params)
+
+    def _close(self):
+        if self._pooled is None:
+            return super()._close()
+
+        pooled, self._pooled = self._pooled, None
+        self._pool.release(pooled, broken=self.errors_occurred)
+
+
+def close_all() -> None:
+    """
+    Close connections of the current thread like `connections.close_all`
+    and idle pooled connections, which it only returns to pools.
+    """
+    connections.close_all()
+    DatabaseConnectionPool.clear_database()
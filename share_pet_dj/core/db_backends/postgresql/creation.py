@@ -0,0 +1,24 @@
+from django.db.backends.postgresql import creation
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """
+    Test database creation which closes idle pooled connections first,
+    PostgreSQL can't drop or copy a database with open connections.
+    """
+    def _clear_pool(self) -> None:
+        from core.db_backends.postgresql.base import DatabaseConnectionPool
+
+        DatabaseConnectionPool.clear_database(self.connection.alias)
+
+    def _create_test_db(self, verbosity, autoclobber, keepdb=False):
+        self._clear_pool()
+        return super()._create_test_db(verbosity, autoclobber, keepdb)
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        self._clear_pool()
+        return super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        self._clear_pool()
+        return super()._destroy_test_db(test_database_name, verbosity)
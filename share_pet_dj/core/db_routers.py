@@ -1,19 +1,182 @@
+"""
+This module is used for choosing databases of queries.
+
+`AccountsRouter` keeps identity data in `ACCOUNTS_DATABASE`.
+`ReplicaRouter` sends reads made inside `replica_reads`
+to a replica that is not lagging. After a write the request,
+and the next requests for `REPLICA_PIN_SECONDS`, read
+from the primary, so an account always sees own changes.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from config.settings import (
+    ACCOUNTS_DATABASE, DATABASE_REPLICAS, REPLICA_LAG_CHECK_INTERVAL,
+    REPLICA_MAX_LAG
+)
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_replica_reads: ContextVar[bool] = ContextVar('replica_reads', default=False)
+_primary_pin: ContextVar['PrimaryPin | None'] = ContextVar(
+    'primary_pin', default=None)
+
+
+class PrimaryPin:
+    """Whether reads of the scope must go to the primary."""
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.written = False
+
+
+@contextmanager
+def primary_pin_scope(pinned: bool = False):
+    pin = PrimaryPin(pinned)
+    token = _primary_pin.set(pin)
+
+    try:
+        yield pin
+    finally:
+        _primary_pin.reset(token)
+
+
+@contextmanager
+def replica_reads(enabled: bool = True):
+    token = _replica_reads.set(enabled)
+
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_read(func):
+    """Let reads of the decorated function go to a replica."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaMonitor:
+    """Replication lag of replicas read at most every `interval`."""
+    def __init__(self, interval: float = REPLICA_LAG_CHECK_INTERVAL):
+        self.interval = interval
+        self._lags: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_lag(alias: str) -> float:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                return float(cursor.fetchone()[0])
+        except DatabaseError:
+            return float('inf')
+
+    def get_cached_lag(self, alias: str) -> float:
+        now = time.monotonic()
+        checked, lag = self._lags.get(alias, (0, 0))
+
+        if now - checked < self.interval:
+            return lag
+
+        lag = self.get_lag(alias)
+
+        with self._lock:
+            self._lags[alias] = (now, lag)
+
+        return lag
+
+
+class ReplicaRouter:
+    """
+    Reads of `replica_reads` go to a random replica
+    with lag under `REPLICA_MAX_LAG` seconds, everything
+    else goes to the primary.
+    """
+    replicas = DATABASE_REPLICAS
+    max_lag = REPLICA_MAX_LAG
+    monitor = ReplicaMonitor()
+
+    def _get_replica(self) -> str | None:
+        replicas = [
+            alias for alias in self.replicas
+            if self.monitor.get_cached_lag(alias) <= self.max_lag
+        ]
+        return random.choice(replicas) if replicas else None
+
+    def db_for_read(self, model, **hints):
+        pin = _primary_pin.get()
+
+        if (not self.replicas or not _replica_reads.get() or
+                (pin is not None and pin.pinned) or
+                connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return None
+
+        return self._get_replica()
+
+    def db_for_write(self, model, **hints):
+        pin = _primary_pin.get()
+
+        if pin is not None:
+            pin.pinned = pin.written = True
+
+        # Otherwise objects read from a replica are saved there.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *self.replicas}
+
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self.replicas:
+            return False
+
+
 class AccountsRouter:
     """
     A router to control all database operations
     on models of accounts data.
+
+    Models of other apps may point to identity models only
+    by id: without a database constraint and a cascade,
+    see `accounts.checks.check_identity_relations`.
     """
     route_app_labels = {
-        'auth', 'contenttypes', 'admin', 'sessions'
+        'auth', 'contenttypes', 'admin', 'sessions', 'sites',
+        'account', 'accounts', 'notifications'
     }
+    database = ACCOUNTS_DATABASE
+
+    def _get_database(self, model) -> str | None:
+        """`None` without the partition, so replicas are used."""
+        if (self.database != DEFAULT_DB_ALIAS and
+                model._meta.app_label in self.route_app_labels):
+            return self.database
+
+        return None
 
     def db_for_read(self, model, **hints):
-        if model._meta.app_label in self.route_app_labels:
-            return 'accounts_db'
+        return self._get_database(model)
 
     def db_for_write(self, model, **hints):
-        if model._meta.app_label in self.route_app_labels:
-            return 'accounts_db'
+        return self._get_database(model)
 
     def allow_relation(self, obj1, obj2, **hints):
         if (obj1._meta.app_label in self.route_app_labels or
@@ -21,5 +184,8 @@ class AccountsRouter:
             return True
 
     def allow_migrate(self, db, app_label, model_name=None, **hints):
-        if app_label in self.route_app_labels:
-            return db == 'accounts_db'
+        if (self.database == DEFAULT_DB_ALIAS or
+                db not in (DEFAULT_DB_ALIAS, self.database)):
+            return None
+
+        return (app_label in self.route_app_labels) == (db == self.database)
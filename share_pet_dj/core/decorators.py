@@ -1,6 +1,15 @@
+import logging
 from functools import wraps
 
+from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
+from django.utils.translation import gettext as _
+from redis import RedisError
+
+from config.settings import RATE_LIMIT_TRUSTED_PROXY_HEADER
+from core.rate_limit import SlidingWindowLimiter
+
+logger = logging.getLogger(__name__)
 
 
 class AccountAllower:
@@ -32,3 +41,71 @@ class AccountAllower:
 
 
 account_allower = AccountAllower
+
+
+class RateLimiter:
+    """
+    Class-decorator for views that limits POST requests
+    by IP, account and email with limits like `ip=(20, 300)`.
+
+    Limits are not checked while Redis is not available.
+    """
+    trusted_proxy_header = RATE_LIMIT_TRUSTED_PROXY_HEADER
+
+    def __init__(self, name: str, **limits: tuple[int, int]):
+        self.limiter = SlidingWindowLimiter(name, **limits)
+
+    @staticmethod
+    def _normalize(value: str | None) -> str | None:
+        return value.strip().lower() if value else None
+
+    def get_ip(self, request: HttpRequest) -> str | None:
+        """
+        Address the trusted proxy got the request from. Clients may send
+        the header too, so only the last address, added by the proxy,
+        is used.
+        """
+        if self.trusted_proxy_header is not None:
+            addresses = request.META.get(self.trusted_proxy_header, '')
+
+            if ip := addresses.rsplit(',', 1)[-1].strip():
+                return ip
+
+        return request.META.get('REMOTE_ADDR')
+
+    def get_values(self, request: HttpRequest) -> dict[str, str | None]:
+        account = request.POST.get('login') or request.POST.get('username')
+
+        if not account and request.user.is_authenticated:
+            account = str(request.user.pk)
+
+        return {
+            'ip': self.get_ip(request),
+            'account': self._normalize(account),
+            'email': self._normalize(request.POST.get('email')),
+        }
+
+    def _get_retry_after(self, request: HttpRequest) -> int:
+        try:
+            return self.limiter.hit(**self.get_values(request))
+        except RedisError as error:
+            logger.warning('%s is not limited: %r', self.limiter.name, error)
+            return 0
+
+    def __call__(self, view_func):
+        @wraps(view_func)
+        def check(request, *args, **kwargs):
+            if request.method == 'POST':
+                retry_after = self._get_retry_after(request)
+
+                if retry_after:
+                    response = HttpResponse(
+                        _('Too many attempts, try again later.'), status=429)
+                    response.headers['Retry-After'] = retry_after
+                    return response
+
+            return view_func(request, *args, **kwargs)
+        return check
+
+
+rate_limiter = RateLimiter
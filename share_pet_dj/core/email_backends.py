@@ -0,0 +1,296 @@
+"""
+This module is used for sending emails
+over a pool of persistent SMTP connections.
+
+`PooledSMTPEmailBackend` is meant for `CELERY_EMAIL_BACKEND`:
+every task of `djcelery_email` opens and closes its backend,
+which here only takes a connection from the pool and returns it,
+so TLS handshakes and logins happen once per connection.
+"""
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+from django.core.mail.message import sanitize_address
+
+from config.settings import (
+    EMAIL_POOL_HEALTH_CHECK_INTERVAL, EMAIL_POOL_MAX_AGE,
+    EMAIL_POOL_MAX_MESSAGES, EMAIL_POOL_SIZE, EMAIL_SEND_RETRIES
+)
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the connection can't be used any more.
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+class PooledConnection:
+    def __init__(self, connection: smtplib.SMTP):
+        self.connection = connection
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.sent = 0
+
+
+class SMTPConnectionPool:
+    """
+    Bounded pool of SMTP connections to one server.
+
+    An idle connection is checked with `NOOP` before reuse
+    if it was not used for `health_check_interval` seconds.
+    Connections older than `max_age` seconds or with
+    `max_messages` sent are replaced by new ones.
+    """
+    _pools: dict[tuple, 'SMTPConnectionPool'] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, size: int = EMAIL_POOL_SIZE,
+                 health_check_interval: float =
+                 EMAIL_POOL_HEALTH_CHECK_INTERVAL,
+                 max_age: float = EMAIL_POOL_MAX_AGE,
+                 max_messages: int = EMAIL_POOL_MAX_MESSAGES):
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.max_age = max_age
+        self.max_messages = max_messages
+        self._idle: deque[PooledConnection] = deque()
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(size)
+
+    @classmethod
+    def for_server(cls, key: tuple) -> 'SMTPConnectionPool':
+        with cls._pools_lock:
+            if key not in cls._pools:
+                cls._pools[key] = cls()
+            return cls._pools[key]
+
+    @staticmethod
+    def _close(pooled: PooledConnection) -> None:
+        try:
+            pooled.connection.quit()
+        except (smtplib.SMTPException, OSError):
+            pooled.connection.close()
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        now = time.monotonic()
+
+        if (now - pooled.created > self.max_age or
+                pooled.sent >= self.max_messages):
+            return False
+
+        if now - pooled.last_used < self.health_check_interval:
+            return True
+
+        try:
+            return pooled.connection.noop()[0] == 250
+        except CONNECTION_ERRORS:
+            return False
+
+    def _get_idle(self) -> PooledConnection | None:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                pooled = self._idle.pop()
+
+            if self._is_healthy(pooled):
+                return pooled
+
+            metrics.rate('email.connections_discarded').mark()
+            self._close(pooled)
+
+    def acquire(self, connect: Callable[[], smtplib.SMTP],
+                timeout: float | None = None) -> PooledConnection:
+        """
+        Return an idle connection or a new one from `connect`.
+
+        Blocks while `size` connections are in use.
+        """
+        start = time.perf_counter()
+
+        if not self._semaphore.acquire(timeout=timeout):
+            raise smtplib.SMTPConnectError(
+                421, 'No free connection in the SMTP pool.')
+
+        metrics.timer('email.pool_wait').observe(time.perf_counter() - start)
+
+        try:
+            pooled = self._get_idle()
+
+            if pooled is None:
+                metrics.rate('email.connections_opened').mark()
+                pooled = PooledConnection(connect())
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        return pooled
+
+    def release(self, pooled: PooledConnection, broken: bool = False) -> None:
+        pooled.last_used = time.monotonic()
+
+        if broken:
+            metrics.rate('email.connections_discarded').mark()
+            self._close(pooled)
+        else:
+            with self._lock:
+                self._idle.append(pooled)
+
+        self._semaphore.release()
+
+    def clear(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+
+        for pooled in idle:
+            self._close(pooled)
+
+    @classmethod
+    def clear_all(cls) -> None:
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+
+        for pool in pools:
+            pool.clear()
+
+
+class PooledSMTPEmailBackend(EmailBackend):
+    """
+    SMTP backend on top of `SMTPConnectionPool`.
+
+    Every message is retried on its own on a fresh
+    connection when the current one fails.
+    Rejected messages are not retried.
+    """
+    def __init__(self, *args, retries: int = EMAIL_SEND_RETRIES, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retries = retries
+        self._pool = SMTPConnectionPool.for_server((
+            self.host, self.port, self.username, self.use_tls, self.use_ssl))
+        self._pooled: PooledConnection | None = None
+
+    def _connect(self) -> smtplib.SMTP:
+        super().open()
+        connection, self.connection = self.connection, None
+
+        if connection is None:
+            raise smtplib.SMTPConnectError(
+                421, f'Cannot connect to {self.host}:{self.port}.')
+
+        return connection
+
+    def open(self) -> bool | None:
+        if self.connection:
+            return False
+
+        try:
+            self._pooled = self._pool.acquire(self._connect, self.timeout)
+        except (smtplib.SMTPException, OSError):
+            if not self.fail_silently:
+                raise
+            return None
+
+        self.connection = self._pooled.connection
+        return True
+
+    def close(self, broken: bool = False) -> None:
+        if self._pooled is None:
+            return
+
+        pooled, self._pooled = self._pooled, None
+        self.connection = None
+        self._pool.release(pooled, broken)
+
+    def _sendmail(self, email_message) -> bool:
+        """Like `_send`, but errors are always raised."""
+        if not email_message.recipients():
+            return False
+
+        encoding = email_message.encoding or settings.DEFAULT_CHARSET
+        from_email = sanitize_address(email_message.from_email, encoding)
+        recipients = [
+            sanitize_address(address, encoding)
+            for address in email_message.recipients()
+        ]
+        self.connection.sendmail(
+            from_email, recipients,
+            email_message.message().as_bytes(linesep='\r\n')
+        )
+        self._pooled.sent += 1
+
+        return True
+
+    def _send_once(self, email_message) -> bool:
+        if self.connection is None and not self.open():
+            return False
+
+        try:
+            return self._sendmail(email_message)
+        except CONNECTION_ERRORS:
+            raise
+        except smtplib.SMTPException:
+            if not self.fail_silently:
+                raise
+            return False
+
+    def _send_with_retries(self, email_message) -> bool:
+        for attempt in range(self.retries):
+            try:
+                return self._send_once(email_message)
+            except CONNECTION_ERRORS as error:
+                self.close(broken=True)
+                metrics.rate('email.retried').mark()
+                logger.warning('Retrying email to %r after %r.',
+                               email_message.to, error)
+                time.sleep(0.1 * 2 ** attempt)
+
+        try:
+            return self._send_once(email_message)
+        except CONNECTION_ERRORS:
+            self.close(broken=True)
+
+            if not self.fail_silently:
+                raise
+            return False
+
+    def send_messages(self, email_messages) -> int:
+        if not email_messages:
+            return 0
+
+        with self._lock:
+            new_conn_created = self.open()
+
+            if not self.connection or new_conn_created is None:
+                return 0
+
+            num_sent = 0
+            start = time.perf_counter()
+
+            try:
+                for message in email_messages:
+                    if self._send_with_retries(message):
+                        num_sent += 1
+                    else:
+                        metrics.rate('email.failed').mark()
+            finally:
+                if new_conn_created:
+                    self.close()
+
+            seconds = time.perf_counter() - start
+            sent_rate = metrics.rate('email.sent')
+            sent_rate.mark(num_sent)
+            metrics.timer('email.send_messages').observe(seconds)
+            logger.info(
+                'Sent %d of %d emails in %.3f s, %.1f emails/s '
+                'over the last minute.', num_sent, len(email_messages),
+                seconds, sent_rate.rate
+            )
+
+        return num_sent
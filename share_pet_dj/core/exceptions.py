@@ -11,3 +11,30 @@ class EmptyMessageError(Exception):
 
 class NoKeyInResponseContextError(KeyError):
     """`KeyError` in `response_context` dict."""
+
+
+class ImageTooLargeError(ValueError):
+    """Image has more pixels than allowed, it is not decoded."""
+    def __init__(self, pixels: int, max_pixels: int):
+        super().__init__(f'Image has {pixels} pixels, '
+                         f'only {max_pixels} are allowed.')
+
+
+class ExecutorOverloadedError(RuntimeError):
+    """Executor has more waiting calls than allowed."""
+    def __init__(self, name: str, backlog: int):
+        super().__init__(f'Executor `{name}` has {backlog} waiting calls.')
+
+
+class InvalidCursorError(ValueError):
+    """Cursor of a page was not made by the app."""
+
+
+class WriteBufferFullError(RuntimeError):
+    """Write buffer has more waiting rows than allowed."""
+    def __init__(self, name: str, size: int):
+        super().__init__(f'Write buffer `{name}` has {size} waiting rows.')
+
+
+class WireProtocolError(ValueError):
+    """Websocket frame can not be decoded by the protocol."""
@@ -0,0 +1,111 @@
+"""
+This module is used for running blocking work
+of async consumers, like database queries, in thread pools
+of their own instead of the default one of the ASGI app.
+
+Slow queries then wait only for each other, and calls
+beyond the backlog are rejected instead of queued forever.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable
+
+from asgiref.sync import SyncToAsync
+from django.db import close_old_connections
+
+from config.settings import CONSUMER_DB_BACKLOG, CONSUMER_DB_WORKERS
+from core.exceptions import ExecutorOverloadedError
+from core.metrics import metrics
+
+
+class BoundedExecutor:
+    """
+    Thread pool of `max_workers` threads which accepts at most
+    `max_backlog` calls waiting for a free thread.
+    """
+    def __init__(self, name: str, max_workers: int, max_backlog: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_backlog = max_backlog
+        self.queued = 0
+        self.running = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name)
+        metrics.register(name, self)
+
+    def as_dict(self) -> dict:
+        return {
+            'queued': self.queued,
+            'running': self.running,
+            'rejected': self.rejected,
+        }
+
+    def _reserve(self) -> None:
+        with self._lock:
+            if self.queued >= self.max_backlog:
+                self.rejected += 1
+                raise ExecutorOverloadedError(self.name, self.queued)
+
+            self.queued += 1
+
+    def _dequeue(self, call_state: dict) -> None:
+        """Count a call as not waiting any more, only once."""
+        with self._lock:
+            if not call_state['dequeued']:
+                call_state['dequeued'] = True
+                self.queued -= 1
+
+    def _call(self, func: Callable, call_state: dict, *args, **kwargs) \
+            -> Any:
+        self._dequeue(call_state)
+        metrics.timer(f'{self.name}.wait').observe(
+            time.perf_counter() - call_state['submitted'])
+
+        with self._lock:
+            self.running += 1
+
+        close_old_connections()
+        start = time.perf_counter()
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+            metrics.timer(f'{self.name}.run').observe(
+                time.perf_counter() - start)
+
+            with self._lock:
+                self.running -= 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Call `func` in the pool.
+
+        Raise `ExecutorOverloadedError` right away if the backlog
+        is full, so the caller can shed load.
+        """
+        self._reserve()
+        call_state = {'submitted': time.perf_counter(), 'dequeued': False}
+        call = SyncToAsync(
+            self._call, thread_sensitive=False, executor=self._executor)
+
+        try:
+            return await call(func, call_state, *args, **kwargs)
+        finally:
+            # The call may be cancelled before it was started.
+            self._dequeue(call_state)
+
+    def wrap(self, func: Callable) -> Callable:
+        """Decorator for sync functions called from async code."""
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+        return wrapper
+
+
+database_executor = BoundedExecutor(
+    'consumers.db', CONSUMER_DB_WORKERS, CONSUMER_DB_BACKLOG)
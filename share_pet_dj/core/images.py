@@ -0,0 +1,51 @@
+"""
+This module is used for decoding and encoding images.
+
+Images are opened lazily, so their size is checked
+before any pixel is decoded.
+"""
+import io
+from typing import BinaryIO
+
+from PIL import Image, ImageOps, features
+
+from core.exceptions import ImageTooLargeError
+
+
+def can_encode(image_format: str) -> bool:
+    return image_format == 'jpeg' or bool(features.check(image_format))
+
+
+def open_image(file: BinaryIO, max_pixels: int) -> Image.Image:
+    """Decode the image or raise `ImageTooLargeError` without decoding."""
+    try:
+        image = Image.open(file)
+    except Image.DecompressionBombError:
+        raise ImageTooLargeError(Image.MAX_IMAGE_PIXELS * 2, max_pixels)
+
+    width, height = image.size
+
+    if width * height > max_pixels:
+        raise ImageTooLargeError(width * height, max_pixels)
+
+    image.load()
+    image = ImageOps.exif_transpose(image)
+
+    return image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+
+def get_square(image: Image.Image, size: int) -> Image.Image:
+    """Crop the center square and scale it to `size` pixels."""
+    return ImageOps.fit(image, (size, size), method=Image.LANCZOS)
+
+
+def encode_image(image: Image.Image, image_format: str, quality: int) \
+        -> bytes:
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format.upper(), quality=quality,
+               optimize=image_format == 'jpeg')
+
+    return buffer.getvalue()
@@ -0,0 +1,102 @@
+"""
+This module is used for batching single-row reads
+made during one request or one consumer event.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterable
+
+from django.db.models import Model
+from django.utils.functional import SimpleLazyObject
+
+_loaders: ContextVar[dict | None] = ContextVar('batch_loaders', default=None)
+
+
+class BatchLoader:
+    """
+    Collect `load(pk)` calls and resolve all of them with
+    one `in_bulk` query when the first result is touched.
+    Loaded rows stay in an identity map, so the same row
+    is never read twice in one scope.
+    """
+    def __init__(self, model: type[Model]):
+        self.model = model
+        self._identity_map: dict[Any, Model | None] = {}
+        self._pending: set = set()
+
+    def prime(self, model_object: Model) -> None:
+        self._identity_map[model_object.pk] = model_object
+
+    def dispatch(self) -> None:
+        pending = self._pending - self._identity_map.keys()
+        self._pending.clear()
+
+        if not pending:
+            return
+
+        model_objects = self.model.objects.in_bulk(pending)
+
+        for pk in pending:
+            self._identity_map[pk] = model_objects.get(pk)
+
+    def _get(self, pk: Any) -> Model:
+        if pk not in self._identity_map:
+            self._pending.add(pk)
+            self.dispatch()
+
+        model_object = self._identity_map[pk]
+
+        if model_object is None:
+            raise self.model.DoesNotExist(
+                f'{self.model.__name__} with pk={pk} does not exist.')
+
+        return model_object
+
+    def load(self, pk: Any) -> Model:
+        """Return a lazy object, the query runs on first access."""
+        if pk not in self._identity_map:
+            self._pending.add(pk)
+
+        return SimpleLazyObject(lambda: self._get(pk))
+
+    def load_many(self, pks: Iterable[Any]) -> list[Model | None]:
+        pks = list(pks)
+        self._pending.update(pks)
+        self.dispatch()
+
+        return [self._identity_map[pk] for pk in pks]
+
+
+def get_loader(model: type[Model]) -> BatchLoader:
+    """
+    Return the loader of the current scope.
+
+    Outside of `loader_scope` every call gets a new loader,
+    so nothing is kept between unrelated calls.
+    """
+    loaders = _loaders.get()
+
+    if loaders is None:
+        return BatchLoader(model)
+
+    if model not in loaders:
+        loaders[model] = BatchLoader(model)
+
+    return loaders[model]
+
+
+@contextmanager
+def loader_scope():
+    token = _loaders.set({})
+
+    try:
+        yield
+    finally:
+        _loaders.reset(token)
+
+
+class BatchLoaderConsumerMixin:
+    """Give every consumer event its own loader scope."""
+    async def dispatch(self, message):
+        with loader_scope():
+            await super().dispatch(message)
@@ -0,0 +1,213 @@
+"""
+This module is used for serving files of `MEDIA_ROOT`.
+
+Access is checked by Django. With `MEDIA_SERVE_MODE`
+`x-accel` or `x-sendfile` bytes are sent by the front proxy,
+otherwise by `MediaView` itself with range requests
+and conditional GETs.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from typing import BinaryIO, Iterator
+from urllib.parse import quote
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse, HttpRequest, HttpResponse, HttpResponseForbidden,
+    HttpResponseNotFound, HttpResponseNotModified, StreamingHttpResponse
+)
+from django.utils.http import http_date, parse_etags
+from django.views import View
+
+from config.settings import MEDIA_ACCEL_PREFIX, MEDIA_SERVE_MODE
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def get_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def is_not_modified(request: HttpRequest, etag: str) -> bool:
+    if_none_match = request.headers.get('If-None-Match')
+
+    if if_none_match is None:
+        return False
+
+    etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+    return '*' in etags or etag in etags
+
+
+def get_range(request: HttpRequest, etag: str, size: int) \
+        -> tuple[int, int] | None:
+    """
+    Return `(start, stop)` of the only requested range.
+
+    `None` means the whole file, for example with many ranges.
+    Raise `ValueError` if the range can't be satisfied.
+    """
+    header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+
+    if header is None or (if_range is not None and if_range != etag):
+        return None
+
+    match = RANGE_RE.match(header.replace(' ', ''))
+
+    if match is None:
+        return None
+
+    first, last = match.groups()
+
+    if first:
+        start = int(first)
+        stop = min(int(last) + 1, size) if last else size
+    elif last:
+        start, stop = max(size - int(last), 0), size
+    else:
+        return None
+
+    if start >= stop:
+        raise ValueError(f'Range {header} is out of {size} bytes.')
+
+    return start, stop
+
+
+def get_content_type(name: str) -> str:
+    content_type, _ = mimetypes.guess_type(name)
+    return content_type or 'application/octet-stream'
+
+
+def read_range(file: BinaryIO, start: int, stop: int) -> Iterator[bytes]:
+    with file:
+        file.seek(start)
+        remaining = stop - start
+
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+
+            if not chunk:
+                break
+
+            remaining -= len(chunk)
+            yield chunk
+
+
+class MediaView(View):
+    """
+    Serve a file of `MEDIA_ROOT` if `has_access` allows it.
+
+    Errors are returned, not raised, so `Process500`
+    does not turn them into the error page.
+
+    Stored names never change their content, so responses
+    are cached as immutable. Names are served only as stored:
+    with `.` or `..` segments they are not found, so a name can't
+    leave the `prefix` or reach `refused_prefixes`, which are served
+    by views of their own.
+    """
+    prefix = ''
+    refused_prefixes: tuple[str, ...] = ()
+    cache_control = 'public, max-age=31536000, immutable'
+    serve_mode = MEDIA_SERVE_MODE
+
+    def has_access(self, request: HttpRequest, name: str) -> bool:
+        return True
+
+    def _get_name(self, path: str) -> str | None:
+        name = self.prefix + path
+        segments = name.split('/')
+
+        if ('.' in segments or '..' in segments or
+                posixpath.normpath(name) != name or
+                name.startswith(self.refused_prefixes)):
+            return None
+
+        return name
+
+    @staticmethod
+    def _get_path(name: str) -> str | None:
+        try:
+            path = default_storage.path(name)
+        except SuspiciousFileOperation:
+            return None
+
+        return path if os.path.isfile(path) else None
+
+    def _set_headers(self, response: HttpResponse, etag: str,
+                     stat: os.stat_result) -> HttpResponse:
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(stat.st_mtime)
+        response.headers['Cache-Control'] = self.cache_control
+        response.headers['Accept-Ranges'] = 'bytes'
+
+        return response
+
+    def _get_proxy_response(self, name: str, path: str) -> HttpResponse:
+        response = HttpResponse(content_type=get_content_type(name))
+
+        if self.serve_mode == 'x-accel':
+            response.headers['X-Accel-Redirect'] = (
+                MEDIA_ACCEL_PREFIX + quote(name))
+        else:
+            response.headers['X-Sendfile'] = path
+
+        return response
+
+    @staticmethod
+    def _get_file_response(request: HttpRequest, name: str, path: str,
+                           etag: str, size: int) -> HttpResponse:
+        try:
+            byte_range = get_range(request, etag, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range is None:
+            return FileResponse(open(path, 'rb'))
+
+        start, stop = byte_range
+        response = StreamingHttpResponse(
+            read_range(open(path, 'rb'), start, stop), status=206,
+            content_type=get_content_type(name)
+        )
+        response.headers['Content-Length'] = stop - start
+        response.headers['Content-Range'] = (
+            f'bytes {start}-{stop - 1}/{size}')
+
+        return response
+
+    def get(self, request: HttpRequest, path: str) -> HttpResponse:
+        name = self._get_name(path)
+
+        if name is None:
+            return HttpResponseNotFound()
+
+        if not self.has_access(request, name):
+            return HttpResponseForbidden()
+
+        file_path = self._get_path(name)
+
+        if file_path is None:
+            return HttpResponseNotFound()
+
+        stat = os.stat(file_path)
+        etag = get_etag(stat)
+
+        if is_not_modified(request, etag):
+            response = HttpResponseNotModified()
+        elif self.serve_mode in ('x-accel', 'x-sendfile'):
+            response = self._get_proxy_response(name, file_path)
+        else:
+            response = self._get_file_response(
+                request, name, file_path, etag, stat.st_size)
+
+        return self._set_headers(response, etag, stat)
+
+
+media = MediaView.as_view(refused_prefixes=('chats/',))
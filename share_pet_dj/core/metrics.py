@@ -0,0 +1,128 @@
+"""
+This module is used for counting what happens
+in the current process, for example sent emails.
+
+Every process has its own numbers.
+"""
+import threading
+import time
+from collections import deque
+from typing import TypeVar
+
+from django.http import HttpRequest, JsonResponse
+from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.views import View
+
+from core.decorators import account_allower
+
+
+class RateMeter:
+    """Total count of events and their rate over the last `window` seconds."""
+    def __init__(self, window: int = 60):
+        self.window = window
+        self.total = 0
+        self._buckets: deque[list[int]] = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: int) -> None:
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+
+    def mark(self, count: int = 1) -> None:
+        now = int(time.monotonic())
+
+        with self._lock:
+            self.total += count
+
+            if self._buckets and self._buckets[-1][0] == now:
+                self._buckets[-1][1] += count
+            else:
+                self._buckets.append([now, count])
+
+            self._trim(now)
+
+    @property
+    def rate(self) -> float:
+        with self._lock:
+            self._trim(int(time.monotonic()))
+            return sum(count for _, count in self._buckets) / self.window
+
+    def as_dict(self) -> dict:
+        return {'total': self.total, 'per_second': self.rate}
+
+
+class Timer:
+    """Count, total and maximum of measured durations in seconds."""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'average': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+        }
+
+
+Meter = TypeVar('Meter', RateMeter, Timer)
+
+
+class MetricsRegistry:
+    """Named meters of the process, created on first use."""
+    def __init__(self):
+        self._meters: dict[str, RateMeter | Timer] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, meter_class: type[Meter]) -> Meter:
+        with self._lock:
+            if name not in self._meters:
+                self._meters[name] = meter_class()
+            meter = self._meters[name]
+
+        if not isinstance(meter, meter_class):
+            raise TypeError(f'{name} is a {type(meter).__name__}.')
+
+        return meter
+
+    def rate(self, name: str) -> RateMeter:
+        return self._get(name, RateMeter)
+
+    def timer(self, name: str) -> Timer:
+        return self._get(name, Timer)
+
+    def register(self, name: str, meter) -> None:
+        """Report any object with `as_dict`, for example cache stats."""
+        with self._lock:
+            self._meters[name] = meter
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            meters = dict(self._meters)
+
+        return {
+            name: meter.as_dict() for name, meter in sorted(meters.items())}
+
+
+metrics = MetricsRegistry()
+
+
+@method_decorator(
+    account_allower(redirect_url=reverse_lazy('login'), allow_to='admin'),
+    name='dispatch')
+class MetricsView(View):
+    """Numbers of the process that served the request."""
+    def get(self, request: HttpRequest) -> JsonResponse:
+        return JsonResponse(metrics.snapshot())
+
+
+metrics_view = MetricsView.as_view()
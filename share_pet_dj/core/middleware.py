@@ -1,6 +1,11 @@
 # import logging
 # logger = logging.Logger(__name__)
 
+import time
+
+from config.settings import REPLICA_PIN_COOKIE_NAME, REPLICA_PIN_SECONDS
+from core.db_routers import primary_pin_scope
+from core.loaders import loader_scope
 from core.pages import handler500
 
 
@@ -17,3 +22,45 @@ class Process500:
         # logger.error(f'url: {request.path}, error: {exception}')
 
         return handler500(request, error=exception)
+
+
+class BatchLoaderMiddleware:
+    """Give every request its own batch loaders and identity maps."""
+    def __init__(self, get_response):
+        self._get_response = get_response
+
+    def __call__(self, request):
+        with loader_scope():
+            return self._get_response(request)
+
+
+class PrimaryPinMiddleware:
+    """
+    Keep reads of a client on the primary for
+    `REPLICA_PIN_SECONDS` after its last write.
+    """
+    def __init__(self, get_response):
+        self._get_response = get_response
+
+    @staticmethod
+    def _is_pinned(request) -> bool:
+        try:
+            pinned_until = float(
+                request.COOKIES.get(REPLICA_PIN_COOKIE_NAME, 0))
+        except ValueError:
+            return False
+
+        return pinned_until > time.time()
+
+    def __call__(self, request):
+        with primary_pin_scope(self._is_pinned(request)) as pin:
+            response = self._get_response(request)
+
+        if pin.written:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE_NAME,
+                str(time.time() + REPLICA_PIN_SECONDS),
+                max_age=REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+
+        return response
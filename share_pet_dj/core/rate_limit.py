@@ -0,0 +1,105 @@
+"""
+This module is used for limiting how often something
+is done, shared by all processes through Redis.
+
+Limits are sliding windows approximated by two fixed windows:
+the previous window counts in proportion to its part
+still inside the sliding one. All limits of a check are
+tested and counted by one Lua script, so a check is
+one round trip and is atomic.
+"""
+import math
+import time
+from hashlib import blake2b
+from typing import NamedTuple
+
+from redis.commands.core import Script
+
+from core.redis_client import get_redis
+
+KEY_PREFIX = 'rate_limit:'
+
+# KEYS are pairs of current and previous window counters,
+# ARGV are `limit, weight, ttl, retry_after` for every pair.
+SLIDING_WINDOW_SCRIPT = '''
+local retry_after = 0
+
+for i = 1, #KEYS, 2 do
+    local arg = (i - 1) * 2
+    local current = tonumber(redis.call('GET', KEYS[i]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[i + 1]) or '0')
+
+    if current + previous * tonumber(ARGV[arg + 2]) >= tonumber(ARGV[arg + 1])
+    then
+        retry_after = math.max(retry_after, tonumber(ARGV[arg + 4]))
+    end
+end
+
+if retry_after > 0 then
+    return retry_after
+end
+
+for i = 1, #KEYS, 2 do
+    redis.call('INCR', KEYS[i])
+    redis.call('EXPIRE', KEYS[i], ARGV[(i - 1) * 2 + 3])
+end
+
+return 0
+'''
+
+
+class RateLimit(NamedTuple):
+    """At most `limit` hits in `window` seconds."""
+    limit: int
+    window: int
+
+
+class SlidingWindowLimiter:
+    """
+    Named group of limits, one limit by kind of key,
+    for example by IP and by email.
+    """
+    _script: Script | None = None
+
+    def __init__(self, name: str, **limits: tuple[int, int]):
+        self.name = name
+        self.limits = {
+            kind: RateLimit(*limit) for kind, limit in limits.items()}
+
+    @classmethod
+    def _get_script(cls) -> Script:
+        if cls._script is None:
+            cls._script = get_redis().register_script(SLIDING_WINDOW_SCRIPT)
+
+        return cls._script
+
+    def _get_key(self, kind: str, value: str, number: int) -> str:
+        """Values are hashed, so emails are not stored in keys."""
+        digest = blake2b(value.encode(), digest_size=12).hexdigest()
+        return f'{KEY_PREFIX}{self.name}:{kind}:{digest}:{number}'
+
+    def hit(self, **values: str | None) -> int:
+        """
+        Count a hit for every given value and return 0,
+        or return seconds to wait if any limit is reached.
+
+        Nothing is counted for a rejected hit.
+        """
+        now = time.time()
+        keys, args = [], []
+
+        for kind, value in values.items():
+            if not value or kind not in self.limits:
+                continue
+
+            limit, window = self.limits[kind]
+            number, elapsed = divmod(now, window)
+            keys += [self._get_key(kind, value, int(number)),
+                     self._get_key(kind, value, int(number) - 1)]
+            args += [limit, 1 - elapsed / window, window * 2,
+                     math.ceil(window - elapsed)]
+
+        if not keys:
+            return 0
+
+        return int(self._get_script()(keys=keys, args=args))
@@ -0,0 +1,23 @@
+"""
+This module is used for sharing one Redis
+connection pool across the project.
+
+Redis is an accelerator here, so timeouts are short:
+callers are expected to fall back to the database
+when `redis.RedisError` is raised.
+"""
+from functools import lru_cache
+
+import redis
+
+from config.settings import REDIS_HOST, REDIS_PORT, REDIS_SOCKET_TIMEOUT
+
+
+@lru_cache(maxsize=None)
+def get_redis() -> redis.Redis:
+    return redis.Redis(
+        host=REDIS_HOST or 'localhost',
+        port=int(REDIS_PORT or 6379),
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+    )
@@ -0,0 +1,132 @@
+"""
+This module is used for keeping a set of ids
+in the memory of every process.
+
+The set is loaded from the database and then changed
+by messages of a Redis pub/sub channel, so checks
+never leave the process.
+"""
+import json
+import logging
+import threading
+import time
+from typing import Callable, Iterable
+
+from django.db import close_old_connections
+from redis import RedisError
+
+from core.metrics import metrics
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicatedIdSet:
+    """
+    In-memory set of ids kept in sync through Redis pub/sub.
+
+    A daemon thread listens to `channel`. While Redis is not
+    reachable the set is loaded again every `reload_interval`
+    seconds, and after every reconnect, so no change is lost.
+    """
+    def __init__(self, name: str, load: Callable[[], Iterable[int]],
+                 reload_interval: float = 60, poll_timeout: float = 1):
+        self.name = name
+        self.channel = f'{name}:changes'
+        self.reload_interval = reload_interval
+        self.poll_timeout = poll_timeout
+        self._load = load
+        self._ids: frozenset = frozenset()
+        self._loaded = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def _reload(self) -> None:
+        close_old_connections()
+
+        try:
+            ids = frozenset(self._load())
+        finally:
+            close_old_connections()
+
+        with self._lock:
+            self._ids = ids
+
+        self._loaded.set()
+
+    def _apply(self, action: str, item_id: int) -> None:
+        with self._lock:
+            if action == 'add':
+                self._ids = self._ids | {item_id}
+            else:
+                self._ids = self._ids - {item_id}
+
+    def _handle(self, message: dict) -> None:
+        data = json.loads(message['data'])
+        self._apply(data['action'], data['id'])
+        metrics.timer(f'{self.name}.propagation').observe(
+            max(time.time() - data['sent_at'], 0))
+
+    def _listen(self) -> None:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+
+        try:
+            # Loaded after subscribing, so changes made
+            # in between are received as messages.
+            self._reload()
+
+            while True:
+                message = pubsub.get_message(timeout=self.poll_timeout)
+
+                if message is not None:
+                    self._handle(message)
+        finally:
+            pubsub.close()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._listen()
+            except Exception as error:
+                logger.warning('%s is not synced: %r', self.name, error)
+
+            try:
+                self._reload()
+            except Exception:
+                logger.exception('%s is not loaded.', self.name)
+
+            time.sleep(self.reload_interval)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def __contains__(self, item_id: int) -> bool:
+        if self._thread is None:
+            self.start()
+            self._loaded.wait(self.poll_timeout)
+
+        return item_id in self._ids
+
+    def publish(self, action: str, item_id: int) -> None:
+        """Apply the change here and send it to other processes."""
+        self._apply(action, item_id)
+        metrics.rate(f'{self.name}.published').mark()
+
+        try:
+            get_redis().publish(self.channel, json.dumps({
+                'action': action, 'id': item_id, 'sent_at': time.time()}))
+        except RedisError as error:
+            logger.warning('%s change is not published: %r', self.name, error)
+
+    def add(self, item_id: int) -> None:
+        self.publish('add', item_id)
+
+    def discard(self, item_id: int) -> None:
+        self.publish('discard', item_id)
@@ -1,11 +1,157 @@
-from typing import TypeVar
+import time
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Iterable, NamedTuple, TypeVar
 
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField
 from django.db.models.base import ModelBase, Model
+from django.db.models.signals import post_delete, post_save
 from django.forms import model_to_dict
+from redis import RedisError
+
+from core.db_routers import replica_reads
+from core.loaders import get_loader
+from core.single_flight import flights
 
 T = TypeVar('T', bound=Model)
 
 
+class CacheStats:
+    """Hit and miss counters of one cache in this process."""
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hit_ratio,
+        }
+
+
+class ModelObjectCache:
+    """
+    Cache-aside storage for rows of one model.
+
+    Every row has a version key and row entries are stored
+    under the current version. Writes replace the version,
+    so entries of an old version are never read again
+    and simply expire with their TTL. Version keys outlive
+    the entries stored under them.
+    """
+    _instances: dict[Any, 'ModelObjectCache'] = {}
+
+    def __init__(self, model: T, timeout: int):
+        self.model = model
+        self.timeout = timeout
+        self.version_timeout = timeout * 2
+        self.prefix = f'model_object:{model._meta.label_lower}'
+        self.stats = CacheStats()
+
+        post_save.connect(
+            self._invalidate_instance, sender=model, weak=False,
+            dispatch_uid=f'{self.prefix}:post_save'
+        )
+        post_delete.connect(
+            self._invalidate_instance, sender=model, weak=False,
+            dispatch_uid=f'{self.prefix}:post_delete'
+        )
+
+    @classmethod
+    def for_model(cls, model: T, timeout: int) -> 'ModelObjectCache':
+        if model not in cls._instances:
+            cls._instances[model] = cls(model, timeout)
+        return cls._instances[model]
+
+    @classmethod
+    def invalidate_model_object(cls, model: T, pk: Any) -> None:
+        model_object_cache = cls._instances.get(model)
+
+        if model_object_cache is not None:
+            model_object_cache.invalidate(pk)
+
+    @staticmethod
+    def _get_new_version() -> int:
+        return time.time_ns()
+
+    def get_version_key(self, pk: Any) -> str:
+        return f'{self.prefix}:{pk}:version'
+
+    def _get_lookup_key(self, lookup: dict) -> str:
+        lookup_string = '&'.join(
+            f'{key}={value}' for key, value in sorted(lookup.items()))
+        return f'{self.prefix}:lookup:{lookup_string}'
+
+    def get_flight_key(self, lookup: dict, fields: tuple,
+                       version: int | None) -> str:
+        """
+        Queries are shared only by readers of the same version,
+        a query started before a write is not stored under a newer one.
+        """
+        return (f'{self._get_lookup_key(lookup)}:{version}:'
+                f'{",".join(fields)}')
+
+    def _get_row_key(self, pk: Any, version: int, fields: tuple) -> str:
+        return f'{self.prefix}:{pk}:{version}:{",".join(fields)}'
+
+    @staticmethod
+    def get_many_versions(
+            keys: Iterable[tuple['ModelObjectCache', Any]]) -> tuple:
+        version_keys = [
+            model_object_cache.get_version_key(pk)
+            for model_object_cache, pk in keys
+        ]
+        versions = cache.get_many(version_keys)
+        return tuple(versions.get(key) for key in version_keys)
+
+    def get_version(self, pk: Any) -> int:
+        key = self.get_version_key(pk)
+        version = cache.get(key)
+
+        if version is None:
+            version = self._get_new_version()
+            if not cache.add(key, version, timeout=self.version_timeout):
+                version = cache.get(key, version)
+
+        return version
+
+    def invalidate(self, pk: Any) -> None:
+        try:
+            cache.set(self.get_version_key(pk), self._get_new_version(),
+                      timeout=self.version_timeout)
+        except RedisError:
+            pass
+
+    def _invalidate_instance(self, sender, instance: Model, **kwargs):
+        self.invalidate(instance.pk)
+
+    def get_pk(self, lookup: dict) -> Any:
+        if len(lookup) == 1:
+            key, value = next(iter(lookup.items()))
+            if key in ('pk', self.model._meta.pk.attname):
+                return value
+
+        return cache.get(self._get_lookup_key(lookup))
+
+    def set_pk(self, lookup: dict, pk: Any) -> None:
+        cache.set(self._get_lookup_key(lookup), pk, timeout=self.timeout)
+
+    def get_row(self, pk: Any, version: int, fields: tuple) -> dict | None:
+        return cache.get(self._get_row_key(pk, version, fields))
+
+    def set_row(self, pk: Any, version: int, fields: tuple, row: dict):
+        cache.set(self._get_row_key(pk, version, fields), row,
+                  timeout=self.timeout)
+
+
 class ModelObjectUpdate:
     """Logic for updating model object."""
     def __init__(self, model: T):
@@ -13,12 +159,53 @@ class ModelObjectUpdate:
 
     def update_fields_by_pk(self, pk: int, **kwargs) -> None:
         self.model.objects.filter(pk=pk).update(**kwargs)
+        ModelObjectCache.invalidate_model_object(self.model, pk)
 
 
 class ModelObjectGet:
-    """Logic for getting model object."""
-    def __init__(self, model: T):
+    """
+    Logic for getting model object.
+
+    Concrete fields are read with a projection query into
+    lightweight named tuples, without a model instance.
+    With `cache_timeout` rows read by `get_model_object`
+    are kept in the cache for that many seconds.
+    """
+    def __init__(self, model: T, cache_timeout: int | None = None):
         self.model = model
+        self._cache = None
+
+        if cache_timeout is not None:
+            self._cache = ModelObjectCache.for_model(model, cache_timeout)
+
+    @property
+    def cache_stats(self) -> CacheStats | None:
+        return None if self._cache is None else self._cache.stats
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_projection(model: T, fields: tuple) -> tuple | None:
+        """Return the model fields to project or `None` if impossible."""
+        model_fields = []
+
+        for name in fields:
+            try:
+                field = (model._meta.pk if name == 'pk'
+                         else model._meta.get_field(name))
+            except FieldDoesNotExist:
+                return None
+
+            if not field.concrete or field.many_to_many:
+                return None
+
+            model_fields.append(field)
+
+        return tuple(model_fields)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_row_class(model: T, fields: tuple) -> type[NamedTuple]:
+        return namedtuple(f'{model.__name__}Row', fields)
 
     def _get_model_object(self, *args, **kwargs) -> ModelBase:
         return self.model.objects.get(*args, **kwargs)
@@ -28,13 +215,100 @@ class ModelObjectGet:
             model_object: ModelBase, fields: tuple) -> dict:
         return model_to_dict(model_object, fields=fields)
 
+    def _get_projected_values(self, fields: tuple, **kwargs) -> tuple:
+        return self.model.objects.values_list(*fields).get(**kwargs)
+
+    @staticmethod
+    def _convert_values(model_fields: tuple, values: tuple) -> tuple:
+        """Give file fields the same `FieldFile` as `model_to_dict`."""
+        return tuple(
+            field.attr_class(None, field, value)
+            if isinstance(field, FileField) else value
+            for field, value in zip(model_fields, values)
+        )
+
+    def _get_row_with_pk(self, fields: tuple, **kwargs) -> tuple[Any, dict]:
+        model_fields = self._get_projection(self.model, fields)
+
+        if model_fields is None:
+            model_object = self._get_model_object(**kwargs)
+            return (model_object.pk,
+                    self._get_model_object_with_fields(model_object, fields))
+
+        pk, *values = self._get_projected_values(('pk', *fields), **kwargs)
+        values = self._convert_values(model_fields, tuple(values))
+
+        return pk, dict(zip(fields, values))
+
+    def _get_cached_model_object(self, model_object_cache: ModelObjectCache,
+                                 fields: tuple, **kwargs) -> dict:
+        version = row = None
+
+        try:
+            pk = model_object_cache.get_pk(kwargs)
+
+            if pk is not None:
+                version = model_object_cache.get_version(pk)
+                row = model_object_cache.get_row(pk, version, fields)
+        except RedisError:
+            return self._get_row_with_pk(fields, **kwargs)[1]
+
+        if row is not None:
+            model_object_cache.stats.hits += 1
+            return row
+
+        model_object_cache.stats.misses += 1
+        # Concurrent misses of the row in this process make one query.
+        # Cached rows are read from the primary, so a lagging replica
+        # never stores an old row under a new version.
+        with replica_reads(enabled=False):
+            row_pk, row = flights.do(
+                model_object_cache.get_flight_key(kwargs, fields, version),
+                lambda: self._get_row_with_pk(fields, **kwargs)
+            )
+        row = dict(row)
+
+        try:
+            if version is None or row_pk != pk:
+                # The version of the row was not read before the query,
+                # so only the lookup is remembered this time.
+                model_object_cache.set_pk(kwargs, row_pk)
+            else:
+                model_object_cache.set_row(pk, version, fields, row)
+        except RedisError:
+            pass
+
+        return row
+
     def get_model_object(self, fields: tuple, **kwargs) -> dict:
-        model_object = self._get_model_object(**kwargs)
-        return self._get_model_object_with_fields(model_object, fields)
+        if self._cache is not None:
+            return self._get_cached_model_object(self._cache, fields, **kwargs)
+
+        return self._get_row_with_pk(fields, **kwargs)[1]
+
+    def get_model_row(self, fields: tuple, **kwargs) -> NamedTuple:
+        """Read only `fields` of one row into a named tuple."""
+        model_fields = self._get_projection(self.model, fields)
+
+        if model_fields is None:
+            raise FieldDoesNotExist(
+                f'{self.model.__name__} has no concrete fields {fields}.')
+
+        values = self._get_projected_values(fields, **kwargs)
+        row_class = self._get_row_class(self.model, fields)
+
+        return row_class._make(self._convert_values(model_fields, values))
 
     def get_pure_model_object(self, *args, **kwargs) -> ModelBase:
         return self._get_model_object(*args, **kwargs)
 
+    def load_model_object(self, pk: Any) -> ModelBase:
+        """Lazy model object batched with other loads of the scope."""
+        return get_loader(self.model).load(pk)
+
+    def load_model_objects(self, pks: Iterable[Any]) -> list:
+        return get_loader(self.model).load_many(pks)
+
 
 class ModelObject(ModelObjectGet, ModelObjectUpdate):
     """Logic for model object."""
@@ -0,0 +1,136 @@
+"""
+This module is a session engine storing sessions in Redis.
+
+Every account has a sorted set of its session keys
+scored by their expiry time, so all sessions of an account
+are found and revoked without scanning any table.
+"""
+import time
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.base import CreateError, SessionBase
+from redis import RedisError
+
+from core.redis_client import get_redis
+
+KEY_PREFIX = 'session:'
+INDEX_PREFIX = 'session:account:'
+
+
+class SessionStore(SessionBase):
+    """Redis session store with the per-account index."""
+    @staticmethod
+    def _get_key(session_key: str) -> str:
+        return f'{KEY_PREFIX}{session_key}'
+
+    @staticmethod
+    def get_index_key(account_pk) -> str:
+        return f'{INDEX_PREFIX}{account_pk}'
+
+    def load(self) -> dict:
+        if self.session_key is None:
+            return {}
+
+        try:
+            session_data = get_redis().get(self._get_key(self.session_key))
+        except RedisError:
+            session_data = None
+
+        if session_data is None:
+            self._session_key = None
+            return {}
+
+        return self.decode(session_data.decode())
+
+    def exists(self, session_key: str) -> bool:
+        return bool(get_redis().exists(self._get_key(session_key)))
+
+    def create(self) -> None:
+        while True:
+            self._session_key = self._get_new_session_key()
+
+            try:
+                self.save(must_create=True)
+            except CreateError:
+                continue
+
+            self.modified = True
+            return
+
+    def save(self, must_create: bool = False) -> None:
+        if self.session_key is None:
+            return self.create()
+
+        session = self._get_session(no_load=must_create)
+        age = self.get_expiry_age()
+        account_pk = session.get(SESSION_KEY)
+        pipeline = get_redis().pipeline(transaction=True)
+        pipeline.set(self._get_key(self.session_key), self.encode(session),
+                     ex=age, nx=must_create)
+
+        if account_pk is not None:
+            index_key = self.get_index_key(account_pk)
+            now = time.time()
+            pipeline.zadd(index_key, {self.session_key: now + age})
+            pipeline.zremrangebyscore(index_key, '-inf', now)
+
+        if not pipeline.execute()[0] and must_create:
+            raise CreateError
+
+    def delete(self, session_key: str | None = None) -> None:
+        account_pk = None
+
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+            account_pk = self._get_session().get(SESSION_KEY)
+
+        pipeline = get_redis().pipeline(transaction=True)
+        pipeline.delete(self._get_key(session_key))
+
+        if account_pk is not None:
+            pipeline.zrem(self.get_index_key(account_pk), session_key)
+
+        pipeline.execute()
+
+    @classmethod
+    def get_account_session_keys(cls, account_pk) -> list[str]:
+        session_keys = get_redis().zrangebyscore(
+            cls.get_index_key(account_pk), time.time(), '+inf')
+        return [session_key.decode() for session_key in session_keys]
+
+    @classmethod
+    def revoke_account_sessions(
+            cls, account_pk, keep: str | None = None) -> int:
+        """Delete all sessions of the account except `keep`."""
+        session_keys = [
+            session_key
+            for session_key in cls.get_account_session_keys(account_pk)
+            if session_key != keep
+        ]
+
+        if not session_keys:
+            return 0
+
+        pipeline = get_redis().pipeline(transaction=True)
+        pipeline.delete(*(cls._get_key(key) for key in session_keys))
+        pipeline.zrem(cls.get_index_key(account_pk), *session_keys)
+
+        return pipeline.execute()[0]
+
+    @classmethod
+    def clear_expired(cls) -> None:
+        """Sessions expire in Redis, only indexes are pruned here."""
+        redis = get_redis()
+        now = time.time()
+        pipeline = redis.pipeline(transaction=False)
+
+        for number, index_key in enumerate(
+                redis.scan_iter(f'{INDEX_PREFIX}*', count=1000), 1):
+            pipeline.zremrangebyscore(index_key, '-inf', now)
+
+            if number % 1000 == 0:
+                pipeline.execute()
+
+        pipeline.execute()
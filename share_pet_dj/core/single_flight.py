@@ -0,0 +1,56 @@
+"""
+This module is used for coalescing concurrent calls
+that compute the same thing, for example misses of one
+cache key: one thread computes, the others wait for it.
+"""
+import threading
+from typing import Any, Callable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Exception | None = None
+
+
+class SingleFlight:
+    """Run at most one call by key at a time in the process."""
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Call `func` or wait for the running call with the same key
+        and share its result or exception.
+        """
+        with self._lock:
+            running = self._calls.get(key)
+
+            if running is None:
+                call = self._calls[key] = _Call()
+
+        if running is not None:
+            running.done.wait()
+
+            if running.error is not None:
+                raise running.error
+
+            return running.value
+
+        try:
+            call.value = func()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.done.set()
+
+        return call.value
+
+
+flights = SingleFlight()
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+from core.cache import TwoTierCache
+from core.redis_client import get_redis
+from core.single_flight import SingleFlight
+from core.tests.test_sessions import is_redis_available
+
+
+class SingleFlightTest(SimpleTestCase):
+    def test_do(self):
+        """Concurrent calls with one key share one result."""
+        single_flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                single_flight.do('key', compute)))
+            for _ in range(10)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(len(calls), 1)
+        self.assertEquals(results, ['value'] * 10)
+
+    def test_error(self):
+        """Exception of the call is raised and not remembered."""
+        single_flight = SingleFlight()
+
+        with self.assertRaises(ValueError):
+            single_flight.do('key', lambda: int('x'))
+
+        self.assertEquals(single_flight.do('key', lambda: 1), 1)
+
+
+@skipUnless(is_redis_available(), 'Redis is not available')
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = TwoTierCache('redis://localhost:6379/15', {
+            'KEY_PREFIX': 'two_tier_test',
+            'OPTIONS': {'LOCAL_MAX_ENTRIES': 2},
+        })
+        self.cache.get('start')
+        self.cache._local._synced.wait(1)
+        self.addCleanup(self.cache.clear)
+
+    def test_local_hit(self):
+        """Values are read from memory after the first read."""
+        self.cache.set('key', {'a': 1})
+        local_hits = self.cache.stats['local'].hits
+
+        self.assertEquals(self.cache.get('key'), {'a': 1})
+        self.assertEquals(self.cache.stats['local'].hits, local_hits + 1)
+
+    def test_invalidation(self):
+        """Keys changed by another process are dropped from memory."""
+        self.cache.set('key', 1)
+        get_redis().publish(self.cache._local.channel, json.dumps({
+            'origin': 'other', 'keys': [self.cache.make_key('key')]}))
+        time.sleep(0.2)
+        self.cache._cache.set(self.cache.make_key('key'), 2, None)
+
+        self.assertEquals(self.cache.get('key'), 2)
+
+    def test_get_or_set(self):
+        """Concurrent misses of one key compute the value once."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        threads = [
+            threading.Thread(
+                target=self.cache.get_or_set, args=('key', compute))
+            for _ in range(10)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(len(calls), 1)
+        self.assertEquals(self.cache.get('key'), 'value')
@@ -0,0 +1,140 @@
+import threading
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+from psycopg2 import OperationalError
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+)
+
+from core.db_backends.postgresql.base import (
+    DatabaseConnectionPool, DatabaseWrapper
+)
+
+
+class FakeCursor:
+    def __init__(self, connection: 'FakeConnection'):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql: str):
+        if not self.connection.healthy:
+            raise OperationalError('server closed the connection')
+
+
+class FakeConnection:
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeDatabaseWrapper(DatabaseWrapper):
+    def _connect(self, conn_params: dict) -> FakeConnection:
+        # Like psycopg2 with the default isolation level of the server.
+        self.isolation_level = None
+        return FakeConnection()
+
+
+class DatabaseWrapperTest(SimpleTestCase):
+    def _get_wrapper(self) -> FakeDatabaseWrapper:
+        return FakeDatabaseWrapper(
+            {'NAME': 'test', 'OPTIONS': {}, 'TIME_ZONE': None}, 'wrapper')
+
+    def test_reuse_in_other_thread(self):
+        """Connection of another thread is reused with its isolation."""
+        self.addCleanup(DatabaseConnectionPool.clear_database, 'wrapper')
+        wrapper = self._get_wrapper()
+        connection = wrapper.get_new_connection({'port': 1})
+        wrapper._close()
+        reused = {}
+
+        def reuse() -> None:
+            other_wrapper = self._get_wrapper()
+            reused['connection'] = other_wrapper.get_new_connection(
+                {'port': 1})
+            reused['isolation_level'] = other_wrapper.isolation_level
+            other_wrapper._close()
+
+        thread = threading.Thread(target=reuse)
+        thread.start()
+        thread.join()
+
+        self.assertEquals(reused, {
+            'connection': connection, 'isolation_level': None})
+
+
+class DatabaseConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        self.pool = DatabaseConnectionPool(
+            'test', size=1, health_check_interval=0)
+
+    def test_reuse(self):
+        """Released connection is given again instead of a new one."""
+        pooled = self.pool.acquire(FakeConnection)
+        self.pool.release(pooled)
+
+        self.assertIs(self.pool.acquire(FakeConnection), pooled)
+
+    def test_health_check(self):
+        """Dead idle connection is closed and replaced."""
+        pooled = self.pool.acquire(lambda: FakeConnection(healthy=False))
+        self.pool.release(pooled)
+        new_pooled = self.pool.acquire(FakeConnection)
+
+        self.assertIsNot(new_pooled, pooled)
+        self.assertTrue(pooled.connection.closed)
+
+    def test_rollback(self):
+        """Unfinished transaction is rolled back before reuse."""
+        pooled = self.pool.acquire(FakeConnection)
+        pooled.connection.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        self.pool.release(pooled)
+
+        self.assertEquals(pooled.connection.info.transaction_status,
+                          TRANSACTION_STATUS_IDLE)
+        self.assertIs(self.pool.acquire(FakeConnection), pooled)
+
+    def test_broken(self):
+        """Broken connection is not returned to the pool."""
+        pooled = self.pool.acquire(FakeConnection)
+        self.pool.release(pooled, broken=True)
+
+        self.assertTrue(pooled.connection.closed)
+        self.assertIsNot(self.pool.acquire(FakeConnection), pooled)
+
+    def test_size(self):
+        """No more than `size` connections are in use at once."""
+        self.pool.acquire(FakeConnection)
+
+        with self.assertRaises(OperationalError):
+            self.pool.acquire(FakeConnection, timeout=0.01)
+
+    def test_clear_database(self):
+        """Idle connections of the pools of only one database are closed."""
+        pooled = {}
+
+        for alias in ('clear_first', 'clear_second'):
+            pool = DatabaseConnectionPool.for_database(alias, {'port': 1})
+            pooled[alias] = pool.acquire(FakeConnection)
+            pool.release(pooled[alias])
+
+        DatabaseConnectionPool.clear_database('clear_first')
+
+        self.assertTrue(pooled['clear_first'].connection.closed)
+        self.assertFalse(pooled['clear_second'].connection.closed)
+        DatabaseConnectionPool.clear_database('clear_second')
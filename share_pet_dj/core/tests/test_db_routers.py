@@ -0,0 +1,132 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.checks import run_checks
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from config.settings import REPLICA_PIN_COOKIE_NAME
+from chats.models import Chat, Message
+from core.db_routers import (
+    AccountsRouter, ReplicaMonitor, ReplicaRouter, primary_pin_scope,
+    replica_read, replica_reads
+)
+from core.middleware import PrimaryPinMiddleware
+
+Account = get_user_model()
+
+
+class FixedLagMonitor(ReplicaMonitor):
+    def __init__(self, lags: dict[str, float]):
+        super().__init__(interval=0)
+        self.lags = lags
+
+    def get_lag(self, alias: str) -> float:
+        return self.lags[alias]
+
+
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.router.replicas = ['replica_1', 'replica_2']
+        self.router.monitor = FixedLagMonitor(
+            {'replica_1': 0, 'replica_2': 0})
+
+    def test_primary_reads(self):
+        """Reads outside `replica_reads` go to the primary."""
+        self.assertIsNone(self.router.db_for_read(Account))
+
+    def test_replica_reads(self):
+        """Reads of `replica_read` functions go to a replica."""
+        read = replica_read(lambda: self.router.db_for_read(Account))
+        self.assertIn(read(), self.router.replicas)
+
+    def test_lagging_replica(self):
+        """Replicas with too big lag are skipped."""
+        self.router.monitor.lags['replica_1'] = 60
+
+        with replica_reads():
+            self.assertEquals(self.router.db_for_read(Account), 'replica_2')
+
+            self.router.monitor.lags['replica_2'] = 60
+            self.assertIsNone(self.router.db_for_read(Account))
+
+    def test_pinned_after_write(self):
+        """Reads after a write of the scope go to the primary."""
+        with primary_pin_scope() as pin, replica_reads():
+            self.assertIsNotNone(self.router.db_for_read(Account))
+            self.assertEquals(self.router.db_for_write(Account), 'default')
+            self.assertIsNone(self.router.db_for_read(Account))
+
+        self.assertTrue(pin.written)
+
+    def test_allow_migrate(self):
+        """Tables are never created on replicas."""
+        self.assertFalse(self.router.allow_migrate('replica_1', 'accounts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'accounts'))
+
+
+class PrimaryPinMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().post('/')
+
+    def test_write(self):
+        """Response of a request with a write pins the client."""
+        def view(request):
+            ReplicaRouter().db_for_write(Account)
+            return HttpResponse()
+
+        response = PrimaryPinMiddleware(view)(self.request)
+        cookie = response.cookies[REPLICA_PIN_COOKIE_NAME]
+
+        self.assertGreater(float(cookie.value), time.time())
+
+    def test_pinned(self):
+        """Request with a fresh cookie reads from the primary."""
+        self.request.COOKIES[REPLICA_PIN_COOKIE_NAME] = str(time.time() + 5)
+
+        def view(request):
+            with replica_reads():
+                self.assertIsNone(ReplicaRouter().db_for_read(Account))
+            return HttpResponse()
+
+        response = PrimaryPinMiddleware(view)(self.request)
+        self.assertNotIn(REPLICA_PIN_COOKIE_NAME, response.cookies)
+
+
+class AccountsRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = AccountsRouter()
+        self.router.database = 'accounts_db'
+
+    def test_db_for_write(self):
+        """Identity models are written to their own database."""
+        self.assertEquals(self.router.db_for_write(Account), 'accounts_db')
+        self.assertIsNone(self.router.db_for_write(Message))
+
+    def test_allow_relation(self):
+        """Other models may point to identity models."""
+        self.assertTrue(self.router.allow_relation(
+            Message(), Account()))
+        self.assertIsNone(self.router.allow_relation(Message(), Chat()))
+
+    def test_allow_migrate(self):
+        """Every app is migrated only in its own database."""
+        self.assertTrue(self.router.allow_migrate('accounts_db', 'accounts'))
+        self.assertFalse(self.router.allow_migrate('default', 'accounts'))
+        self.assertFalse(self.router.allow_migrate('accounts_db', 'chats'))
+        self.assertTrue(self.router.allow_migrate('default', 'chats'))
+        self.assertIsNone(self.router.allow_migrate('replica_1', 'chats'))
+
+    def test_without_partition(self):
+        """Without `accounts_db` everything is left to other routers."""
+        self.router.database = 'default'
+
+        self.assertIsNone(self.router.db_for_read(Account))
+        self.assertIsNone(self.router.allow_migrate('default', 'accounts'))
+
+    def test_identity_relations(self):
+        """Relations to identity models have no constraint or cascade."""
+        errors = [
+            error for error in run_checks() if error.id == 'accounts.E001']
+        self.assertEquals(errors, [])
@@ -0,0 +1,112 @@
+import smtplib
+import socket
+from unittest import skipUnless
+
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase
+
+from core.email_backends import PooledSMTPEmailBackend, SMTPConnectionPool
+
+try:
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.handlers import Sink
+except ImportError:
+    Controller = None
+
+
+class FakeConnection:
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.closed = False
+
+    def noop(self):
+        if not self.healthy:
+            raise smtplib.SMTPServerDisconnected()
+        return 250, b'OK'
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class SMTPConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        self.pool = SMTPConnectionPool(size=1, health_check_interval=0)
+
+    def test_reuse(self):
+        """Released connection is given again instead of a new one."""
+        pooled = self.pool.acquire(FakeConnection)
+        self.pool.release(pooled)
+
+        self.assertIs(self.pool.acquire(FakeConnection), pooled)
+
+    def test_health_check(self):
+        """Dead idle connection is closed and replaced."""
+        pooled = self.pool.acquire(lambda: FakeConnection(healthy=False))
+        self.pool.release(pooled)
+        new_pooled = self.pool.acquire(FakeConnection)
+
+        self.assertIsNot(new_pooled, pooled)
+        self.assertTrue(pooled.connection.closed)
+
+    def test_size(self):
+        """No more than `size` connections are in use at once."""
+        pooled = self.pool.acquire(FakeConnection)
+
+        with self.assertRaises(smtplib.SMTPConnectError):
+            self.pool.acquire(FakeConnection, timeout=0.01)
+
+        self.pool.release(pooled, broken=True)
+
+        self.assertTrue(pooled.connection.closed)
+        self.assertIsNot(self.pool.acquire(FakeConnection), pooled)
+
+
+@skipUnless(Controller, 'aiosmtpd is not installed')
+class PooledSMTPEmailBackendTest(SimpleTestCase):
+    def setUp(self):
+        with socket.socket() as free_socket:
+            free_socket.bind(('127.0.0.1', 0))
+            self.port = free_socket.getsockname()[1]
+
+        self.controller = Controller(
+            Sink(), hostname='127.0.0.1', port=self.port)
+        self.controller.start()
+        self.addCleanup(self.controller.stop)
+        self.addCleanup(SMTPConnectionPool.clear_all)
+
+    def _get_backend(self):
+        return PooledSMTPEmailBackend(
+            host='127.0.0.1', port=self.port, use_tls=False,
+            username='', password=''
+        )
+
+    @staticmethod
+    def _get_message(to: str) -> EmailMessage:
+        return EmailMessage('Subject', 'Body', 'from@gmail.com', [to])
+
+    def test_send_messages(self):
+        """Messages of many backends go through one connection."""
+        messages = [self._get_message(f'{i}@gmail.com') for i in range(5)]
+
+        first_backend = self._get_backend()
+        self.assertEquals(first_backend.send_messages(messages[:2]), 2)
+        second_backend = self._get_backend()
+        self.assertEquals(second_backend.send_messages(messages[2:]), 3)
+
+        pool = second_backend._pool
+        self.assertEquals(len(pool._idle), 1)
+        self.assertEquals(pool._idle[0].sent, 5)
+
+    def test_retry(self):
+        """Message is sent again on a new connection if the old one died."""
+        backend = self._get_backend()
+        backend.open()
+        backend.connection.close()
+
+        sent = backend.send_messages([self._get_message('to@gmail.com')])
+        backend.close()
+
+        self.assertEquals(sent, 1)
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from core.exceptions import ExecutorOverloadedError
+from core.executors import BoundedExecutor
+
+
+class BoundedExecutorTest(SimpleTestCase):
+    def setUp(self):
+        self.executor = BoundedExecutor('test', max_workers=1, max_backlog=1)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def test_run(self):
+        """Function runs in the executor and returns its result."""
+        result = asyncio.run(self.executor.run(lambda x: x * 2, 21))
+
+        self.assertEquals(result, 42)
+        self.assertEquals(self.executor.as_dict(),
+                          {'queued': 0, 'running': 0, 'rejected': 0})
+
+    def test_backlog(self):
+        """Calls beyond the backlog are rejected right away."""
+        async def run():
+            blocking = [
+                asyncio.create_task(self.executor.run(self.release.wait))
+                for _ in range(2)
+            ]
+            await asyncio.sleep(0.05)
+
+            with self.assertRaises(ExecutorOverloadedError):
+                await self.executor.run(lambda: None)
+
+            self.release.set()
+            await asyncio.gather(*blocking)
+
+        asyncio.run(run())
+
+        self.assertEquals(self.executor.rejected, 1)
+        self.assertEquals(self.executor.queued, 0)
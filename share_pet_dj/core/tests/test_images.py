@@ -0,0 +1,35 @@
+import io
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from core.exceptions import ImageTooLargeError
+from core.images import encode_image, get_square, open_image
+
+
+class ImagesTest(SimpleTestCase):
+    def setUp(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 200), 'red').save(buffer, format='PNG')
+        self.file = io.BytesIO(buffer.getvalue())
+
+    def test_open_image(self):
+        """Image within the limit is decoded."""
+        image = open_image(self.file, max_pixels=300 * 200)
+        self.assertEquals(image.size, (300, 200))
+
+    def test_open_too_large_image(self):
+        """Image over the limit is rejected."""
+        with self.assertRaises(ImageTooLargeError):
+            open_image(self.file, max_pixels=300 * 200 - 1)
+
+    def test_get_square(self):
+        """Center square is scaled to the size."""
+        image = get_square(open_image(self.file, 300 * 200), 64)
+        self.assertEquals(image.size, (64, 64))
+
+    def test_encode_image(self):
+        """Image with alpha is encoded to JPEG."""
+        image = Image.new('RGBA', (10, 10))
+        content = encode_image(image, 'jpeg', 80)
+        self.assertEquals(Image.open(io.BytesIO(content)).format, 'JPEG')
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpRequest
+from django.test import TestCase
+
+from core.loaders import BatchLoader, get_loader, loader_scope
+from core.middleware import BatchLoaderMiddleware
+
+Account = get_user_model()
+
+
+class BatchLoaderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.accounts = [
+            Account.objects.create(username=f'username{i}') for i in range(3)
+        ]
+
+    def test_load_is_batched(self):
+        """All pending loads are resolved with one query."""
+        loader = BatchLoader(Account)
+
+        with self.assertNumQueries(0):
+            lazy_accounts = [loader.load(account.pk)
+                             for account in self.accounts]
+
+        with self.assertNumQueries(1):
+            usernames = [str(account) for account in lazy_accounts]
+
+        self.assertEquals(usernames, ['username0', 'username1', 'username2'])
+
+    def test_identity_map(self):
+        """Loaded row is not read again."""
+        loader = BatchLoader(Account)
+        first = loader.load_many([self.accounts[0].pk])[0]
+
+        with self.assertNumQueries(0):
+            second = loader.load_many([self.accounts[0].pk])[0]
+
+        self.assertIs(first, second)
+
+    def test_not_existing(self):
+        loader = BatchLoader(Account)
+
+        self.assertEquals(loader.load_many([0]), [None])
+        with self.assertRaises(Account.DoesNotExist):
+            str(loader.load(0))
+
+    def test_scope(self):
+        """Loader is shared inside a scope only."""
+        self.assertIsNot(get_loader(Account), get_loader(Account))
+
+        with loader_scope():
+            self.assertIs(get_loader(Account), get_loader(Account))
+
+    def test_middleware(self):
+        """Every request gets its own loaders."""
+        loaders = []
+        middleware = BatchLoaderMiddleware(
+            lambda request: loaders.append(get_loader(Account)))
+
+        middleware(HttpRequest())
+        middleware(HttpRequest())
+
+        self.assertIsNot(loaders[0], loaders[1])
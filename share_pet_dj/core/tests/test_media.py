@@ -0,0 +1,89 @@
+import os
+import shutil
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.media import MediaView, media
+
+TEST_DIR = 'test_media'
+
+
+@override_settings(MEDIA_ROOT=TEST_DIR)
+class MediaViewTest(SimpleTestCase):
+    def setUp(self):
+        os.makedirs(f'{TEST_DIR}/accounts', exist_ok=True)
+        os.makedirs(f'{TEST_DIR}/chats', exist_ok=True)
+        self.addCleanup(shutil.rmtree, TEST_DIR, ignore_errors=True)
+
+        with open(f'{TEST_DIR}/accounts/avatar.jpg', 'wb') as file:
+            file.write(bytes(range(100)))
+
+        with open(f'{TEST_DIR}/chats/file.txt', 'wb') as file:
+            file.write(b'file')
+
+        self.factory = RequestFactory()
+
+    def _get(self, path: str = 'accounts/avatar.jpg', view=media, **headers):
+        return view(self.factory.get(f'/media/{path}', **headers), path=path)
+
+    def test_GET(self):
+        """Whole file is served with cache headers."""
+        response = self._get()
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(b''.join(response.streaming_content),
+                          bytes(range(100)))
+        self.assertEquals(response.headers['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('ETag', response.headers)
+
+    def test_not_found(self):
+        """Missing file and paths out of `MEDIA_ROOT` are not found."""
+        self.assertEquals(self._get('accounts/no.jpg').status_code, 404)
+        self.assertEquals(self._get('../manage.py').status_code, 404)
+
+    def test_not_normalized(self):
+        """Names with `.` or `..` segments are not found."""
+        for path in ('./chats/file.txt', 'accounts/../chats/file.txt',
+                     './accounts/avatar.jpg', 'accounts//avatar.jpg'):
+            self.assertEquals(self._get(path).status_code, 404)
+
+    def test_refused_prefix(self):
+        """Chat files are served only by their own view."""
+        self.assertEquals(self._get('chats/file.txt').status_code, 404)
+
+    def test_range(self):
+        """Only requested bytes are served."""
+        response = self._get(HTTP_RANGE='bytes=10-19')
+
+        self.assertEquals(response.status_code, 206)
+        self.assertEquals(b''.join(response.streaming_content),
+                          bytes(range(10, 20)))
+        self.assertEquals(response.headers['Content-Range'], 'bytes 10-19/100')
+
+        response = self._get(HTTP_RANGE='bytes=-5')
+        self.assertEquals(b''.join(response.streaming_content),
+                          bytes(range(95, 100)))
+
+    def test_range_not_satisfiable(self):
+        response = self._get(HTTP_RANGE='bytes=100-')
+
+        self.assertEquals(response.status_code, 416)
+        self.assertEquals(response.headers['Content-Range'], 'bytes */100')
+
+    def test_if_none_match(self):
+        """Matching ETag gives 304 without a body."""
+        etag = self._get().headers['ETag']
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEquals(response.status_code, 304)
+        self.assertEquals(response.content, b'')
+
+    def test_x_accel(self):
+        """Proxy gets the internal location and sends bytes itself."""
+        view = MediaView.as_view(serve_mode='x-accel')
+        response = self._get(view=view)
+
+        self.assertEquals(response.headers['X-Accel-Redirect'],
+                          '/protected-media/accounts/avatar.jpg')
+        self.assertEquals(response.content, b'')
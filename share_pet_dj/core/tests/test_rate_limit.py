@@ -0,0 +1,84 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from core.decorators import RateLimiter
+from core.rate_limit import KEY_PREFIX, SlidingWindowLimiter
+from core.redis_client import get_redis
+from core.tests.test_sessions import is_redis_available
+
+
+def clear_rate_limits(name: str = '') -> None:
+    """Counters are kept in Redis between test runs."""
+    if not is_redis_available():
+        return
+
+    keys = list(get_redis().scan_iter(f'{KEY_PREFIX}{name}*'))
+
+    if keys:
+        get_redis().delete(*keys)
+
+
+class RateLimiterTest(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().post(
+            '/', data={'login': ' Username1 ', 'email': 'Email1@gmail.com'},
+            REMOTE_ADDR='10.0.0.1'
+        )
+        self.request.user = AnonymousUser()
+
+    def test_get_values(self):
+        """Keys of the request are normalized."""
+        values = RateLimiter('test').get_values(self.request)
+
+        self.assertEquals(values, {
+            'ip': '10.0.0.1',
+            'account': 'username1',
+            'email': 'email1@gmail.com',
+        })
+
+    def test_get_ip(self):
+        """Address of the trusted proxy header is used if it is set."""
+        limiter = RateLimiter('test')
+        limiter.trusted_proxy_header = 'HTTP_X_FORWARDED_FOR'
+        self.assertEquals(limiter.get_ip(self.request), '10.0.0.1')
+
+        self.request.META['HTTP_X_FORWARDED_FOR'] = '1.1.1.1, 10.0.0.2'
+        self.assertEquals(limiter.get_ip(self.request), '10.0.0.2')
+
+    @skipUnless(is_redis_available(), 'Redis is not available')
+    def test_limited(self):
+        """Request over the limit gets 429 with Retry-After."""
+        limiter = RateLimiter('test_view', ip=(1, 60))
+        self.addCleanup(clear_rate_limits, 'test_view:')
+        view = limiter(lambda request: HttpResponse())
+
+        self.assertEquals(view(self.request).status_code, 200)
+
+        response = view(self.request)
+        self.assertEquals(response.status_code, 429)
+        self.assertGreater(int(response.headers['Retry-After']), 0)
+
+
+@skipUnless(is_redis_available(), 'Redis is not available')
+class SlidingWindowLimiterTest(SimpleTestCase):
+    def setUp(self):
+        self.limiter = SlidingWindowLimiter(
+            'test', ip=(2, 60), email=(3, 60))
+        self.addCleanup(clear_rate_limits, 'test:')
+
+    def test_hit(self):
+        """Hits over the smallest limit are rejected."""
+        self.assertEquals(self.limiter.hit(ip='ip1', email='email1'), 0)
+        self.assertEquals(self.limiter.hit(ip='ip1', email='email1'), 0)
+        self.assertGreater(self.limiter.hit(ip='ip1', email='email1'), 0)
+
+        self.assertEquals(self.limiter.hit(ip='ip2', email='email1'), 0)
+        self.assertGreater(self.limiter.hit(ip='ip3', email='email1'), 0)
+
+    def test_unknown_values(self):
+        """Values without a limit or empty are not counted."""
+        for _ in range(3):
+            self.assertEquals(self.limiter.hit(account='account1', ip=''), 0)
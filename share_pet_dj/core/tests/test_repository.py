@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models.fields.files import FieldFile
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Setting
+from core.repository import ModelObject, ModelObjectCache
+
+Account = get_user_model()
+
+
+class ModelObjectTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(
+            username='username1', first_name='Firstname')
+        cls.setting = cls.account.setting
+
+    def setUp(self):
+        cache.clear()
+        self.model_object = ModelObject(Account, 60)
+
+    def test_without_cache(self):
+        """Model object without `cache_timeout` always reads the db."""
+        model_object = ModelObject(Account)
+
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                account = model_object.get_model_object(
+                    ('username',), pk=self.account.pk)
+
+        self.assertEquals(account, {'username': 'username1'})
+        self.assertIsNone(model_object.cache_stats)
+
+    def test_projection(self):
+        """Only requested columns are selected."""
+        model_object = ModelObject(Account)
+
+        with CaptureQueriesContext(connection) as queries:
+            account = model_object.get_model_object(
+                ('username', 'avatar'), pk=self.account.pk)
+
+        self.assertNotIn('password', queries[0]['sql'])
+        self.assertEquals(account['username'], 'username1')
+        self.assertIsInstance(account['avatar'], FieldFile)
+
+    def test_get_model_row(self):
+        """Row is a named tuple with requested fields."""
+        model_object = ModelObject(Setting)
+        setting = model_object.get_model_row(
+            ('id', 'language'), account_id=self.account.pk)
+
+        self.assertEquals(setting._fields, ('id', 'language'))
+        self.assertEquals(setting.id, self.setting.pk)
+        self.assertEquals(setting.language, 'en')
+
+        with self.assertRaises(FieldDoesNotExist):
+            model_object.get_model_row(('unknown',), pk=self.setting.pk)
+
+    def test_cache_hit(self):
+        """Second read by pk is served from the cache."""
+        with self.assertNumQueries(1):
+            self.model_object.get_model_object(
+                ('username',), pk=self.account.pk)
+
+        with self.assertNumQueries(0):
+            account = self.model_object.get_model_object(
+                ('username',), pk=self.account.pk)
+
+        self.assertEquals(account, {'username': 'username1'})
+        self.assertEquals(self.model_object.cache_stats.hits, 1)
+
+    def test_update_fields_by_pk_invalidates(self):
+        """Updated row is read from the db again."""
+        self.model_object.get_model_object(
+            ('first_name',), pk=self.account.pk)
+        self.model_object.update_fields_by_pk(
+            self.account.pk, first_name='Newfirstname')
+
+        with self.assertNumQueries(1):
+            account = self.model_object.get_model_object(
+                ('first_name',), pk=self.account.pk)
+
+        self.assertEquals(account, {'first_name': 'Newfirstname'})
+
+    def test_save_invalidates(self):
+        """Saved model instance is read from the db again."""
+        self.model_object.get_model_object(
+            ('first_name',), pk=self.account.pk)
+        self.account.first_name = 'Newfirstname'
+        self.account.save()
+
+        account = self.model_object.get_model_object(
+            ('first_name',), pk=self.account.pk)
+
+        self.assertEquals(account, {'first_name': 'Newfirstname'})
+
+    def test_lookup_by_other_field(self):
+        """Non-pk lookup is remembered before the row is cached."""
+        model_object = ModelObject(Setting, 60)
+
+        for queries in 1, 1, 0:
+            with self.assertNumQueries(queries):
+                setting = model_object.get_model_object(
+                    ('language',), account_id=self.account.pk)
+
+        self.assertEquals(setting, {'language': 'en'})
+
+    def test_lookup_moved_to_other_row(self):
+        """Row found by a stale lookup is not cached under the old pk."""
+        lookup = {'username': 'username1'}
+
+        for _ in range(2):
+            self.model_object.get_model_object(('first_name',), **lookup)
+
+        self.account.username = 'username2'
+        self.account.save()
+        Account.objects.create(username='username1', first_name='Other')
+
+        account = self.model_object.get_model_object(
+            ('first_name',), **lookup)
+        old_account = self.model_object.get_model_object(
+            ('first_name',), pk=self.account.pk)
+
+        self.assertEquals(account, {'first_name': 'Other'})
+        self.assertEquals(old_account, {'first_name': 'Firstname'})
+
+    def test_flight_key_version(self):
+        """Readers of different versions don't share a query."""
+        model_object_cache = ModelObjectCache.for_model(Account, 60)
+        lookup, fields = {'pk': self.account.pk}, ('first_name',)
+
+        self.assertNotEquals(
+            model_object_cache.get_flight_key(lookup, fields, 1),
+            model_object_cache.get_flight_key(lookup, fields, 2)
+        )
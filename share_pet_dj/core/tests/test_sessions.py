@@ -0,0 +1,73 @@
+from unittest import skipUnless
+
+from django.contrib.auth import SESSION_KEY
+from django.test import SimpleTestCase
+from redis import RedisError
+
+from core.redis_client import get_redis
+from core.sessions import SessionStore
+
+
+def is_redis_available() -> bool:
+    try:
+        return get_redis().ping()
+    except RedisError:
+        return False
+
+
+@skipUnless(is_redis_available(), 'Redis is not available')
+class SessionStoreTest(SimpleTestCase):
+    def setUp(self):
+        # Indexes are kept in Redis between test runs.
+        for account_pk in 1, 2:
+            SessionStore.revoke_account_sessions(account_pk)
+
+    def _create_session(self, account_pk: int | None = 1) -> SessionStore:
+        session = SessionStore()
+
+        if account_pk is not None:
+            session[SESSION_KEY] = str(account_pk)
+
+        session.save()
+        self.addCleanup(session.delete)
+
+        return session
+
+    def test_save_and_load(self):
+        """Saved data is loaded by the session key."""
+        session = self._create_session()
+        session['key'] = 'value'
+        session.save()
+
+        loaded = SessionStore(session.session_key)
+
+        self.assertEquals(loaded['key'], 'value')
+        self.assertEquals(loaded[SESSION_KEY], '1')
+
+    def test_index(self):
+        """Sessions of an account are indexed, anonymous ones are not."""
+        first = self._create_session()
+        second = self._create_session()
+        self._create_session(account_pk=None)
+
+        self.assertEquals(
+            set(SessionStore.get_account_session_keys(1)),
+            {first.session_key, second.session_key}
+        )
+
+        first.delete()
+
+        self.assertEquals(SessionStore.get_account_session_keys(1),
+                          [second.session_key])
+
+    def test_revoke_account_sessions(self):
+        """All sessions except the kept one are deleted."""
+        kept = self._create_session(account_pk=2)
+        revoked = self._create_session(account_pk=2)
+
+        count = SessionStore.revoke_account_sessions(
+            2, keep=kept.session_key)
+
+        self.assertEquals(count, 1)
+        self.assertTrue(SessionStore().exists(kept.session_key))
+        self.assertFalse(SessionStore().exists(revoked.session_key))
@@ -0,0 +1,85 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from core.exceptions import WriteBufferFullError
+from core.executors import BoundedExecutor
+from core.write_buffer import WriteBuffer
+
+
+class WriteBufferTest(SimpleTestCase):
+    def setUp(self):
+        self.batches = []
+        self.errors = []
+        self.buffer = WriteBuffer(
+            'test', self._write, max_size=3, interval=0.05, max_backlog=5,
+            executor=BoundedExecutor('test', max_workers=1, max_backlog=10)
+        )
+
+    def _write(self, rows: list) -> None:
+        if self.errors:
+            raise self.errors.pop()
+
+        if 'poison' in rows:
+            raise ValueError
+
+        self.batches.append(rows)
+
+    def _add(self, rows: list, wait: float) -> None:
+        async def add():
+            for row in rows:
+                self.buffer.add(row)
+
+            await asyncio.sleep(wait)
+
+        asyncio.run(add())
+
+    def test_max_size(self):
+        """Full batch is written before the interval."""
+        self.buffer.interval = 10
+        self._add([1, 2, 3, 4], 0.1)
+
+        self.assertEquals(self.batches, [[1, 2, 3]])
+        self.assertEquals(self.buffer.as_dict(),
+                          {'pending': 1, 'written': 3, 'failed': 0,
+                           'dropped': 0})
+
+    def test_interval(self):
+        """Rows are written after the interval."""
+        self._add([1, 2], 0.2)
+
+        self.assertEquals(self.batches, [[1, 2]])
+
+    def test_failed(self):
+        """Failed batch is written again with its order kept."""
+        self.errors.append(ValueError())
+        self._add([1, 2], 0.3)
+
+        self.assertEquals(self.batches, [[1, 2]])
+        self.assertEquals(self.buffer.failed, 1)
+
+    def test_poison(self):
+        """Row which always fails is dropped, the others are written."""
+        self.buffer.max_attempts = 2
+        self._add([1, 'poison', 2, 3], 0.6)
+
+        self.assertEquals(self.batches, [[1], [2], [3]])
+        self.assertEquals(self.buffer.as_dict(),
+                          {'pending': 0, 'written': 3, 'failed': 2,
+                           'dropped': 1})
+
+    def test_backlog(self):
+        """Rows beyond the backlog are rejected."""
+        self.buffer.interval = 10
+        self.errors.append(ValueError())
+
+        with self.assertRaises(WriteBufferFullError):
+            self._add(range(6), 0)
+
+    def test_close(self):
+        """Waiting rows are written in batches on close."""
+        self.buffer.interval = 10
+        self._add([1, 2], 0)
+        self.buffer.close()
+
+        self.assertEquals(self.batches, [[1, 2]])
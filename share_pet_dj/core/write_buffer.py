@@ -0,0 +1,204 @@
+"""
+This module is used for writing rows made by async consumers
+in batches instead of with a query per row.
+
+Rows wait in the memory of the process and are written every
+`interval` seconds or as soon as `max_size` rows wait.
+A failed batch is written again after a growing delay, so rows
+are written at least once and writers must skip rows written
+before. A batch which keeps failing is written row by row and
+rows which still fail are dropped, so they don't block the rest.
+Rows still waiting are written when the process exits.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from core.exceptions import ExecutorOverloadedError, WriteBufferFullError
+from core.executors import BoundedExecutor, database_executor
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    """
+    Rows written by `write` in batches of at most `max_size`,
+    at most `max_backlog` rows are accepted to wait.
+
+    A batch is written row by row after `max_attempts` failures,
+    retries wait from `interval` to `max_retry_delay` seconds.
+    """
+    def __init__(self, name: str, write: Callable[[list], Any],
+                 max_size: int, interval: float, max_backlog: int,
+                 executor: BoundedExecutor = database_executor,
+                 max_attempts: int = 3, max_retry_delay: float = 5):
+        self.name = name
+        self.max_size = max_size
+        self.interval = interval
+        self.max_backlog = max_backlog
+        self.max_attempts = max_attempts
+        self.max_retry_delay = max_retry_delay
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self._attempts = 0
+        self._write = write
+        self._executor = executor
+        self._rows: list[Any] = []
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._full: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        metrics.register(name, self)
+        atexit.register(self.close)
+
+    def as_dict(self) -> dict:
+        return {
+            'pending': len(self._rows),
+            'written': self.written,
+            'failed': self.failed,
+            'dropped': self.dropped,
+        }
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._rows) >= self.max_backlog
+
+    def _bind(self) -> asyncio.Event:
+        """
+        Use the running event loop, tests run several of them.
+        Return the event set when a batch is full.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop or self._full is None:
+            self._loop = loop
+            self._full = asyncio.Event()
+            self._task = None
+
+        return self._full
+
+    def add(self, row: Any) -> None:
+        """
+        Add a row from the event loop without waiting for writes.
+
+        Raise `WriteBufferFullError` if the backlog is full,
+        so the caller can shed load.
+        """
+        full = self._bind()
+
+        with self._lock:
+            if len(self._rows) >= self.max_backlog:
+                raise WriteBufferFullError(self.name, len(self._rows))
+
+            self._rows.append(row)
+
+        if len(self._rows) >= self.max_size:
+            full.set()
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _take(self) -> list:
+        with self._lock:
+            rows = self._rows[:self.max_size]
+            del self._rows[:self.max_size]
+
+        return rows
+
+    def _put_back(self, rows: list) -> None:
+        with self._lock:
+            self._rows[:0] = rows
+
+    async def _run(self) -> None:
+        full = self._bind()
+
+        while self._rows:
+            try:
+                await asyncio.wait_for(full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            full.clear()
+
+            if not await self.flush():
+                await asyncio.sleep(min(
+                    self.interval * 2 ** self._attempts,
+                    self.max_retry_delay
+                ))
+
+    def _write_apart(self, rows: list) -> int:
+        """Write rows one by one, return the count of dropped ones."""
+        dropped = 0
+
+        for row in rows:
+            try:
+                self._write([row])
+            except Exception as error:
+                dropped += 1
+                logger.error('%s row is dropped: %r, %r',
+                             self.name, row, error)
+
+        return dropped
+
+    async def _write_batch(self, rows: list) -> int:
+        if self._attempts < self.max_attempts:
+            await self._executor.run(self._write, rows)
+            return 0
+
+        return await self._executor.run(self._write_apart, rows)
+
+    async def flush(self) -> bool:
+        """
+        Write the oldest batch, keep it for later if it failed.
+        Return if the batch is written.
+        """
+        rows = self._take()
+
+        if not rows:
+            return True
+
+        start = time.perf_counter()
+
+        try:
+            dropped = await self._write_batch(rows)
+        except asyncio.CancelledError:
+            self._put_back(rows)
+            raise
+        except Exception as error:
+            # Busy threads say nothing about the rows.
+            if not isinstance(error, ExecutorOverloadedError):
+                self._attempts += 1
+
+            self.failed += 1
+            self._put_back(rows)
+            logger.warning('%s batch of %d rows is not written: %r',
+                           self.name, len(rows), error)
+            return False
+
+        self._attempts = 0
+        self.dropped += dropped
+        self.written += len(rows) - dropped
+        metrics.timer(f'{self.name}.flush').observe(
+            time.perf_counter() - start)
+
+        if len(self._rows) >= self.max_size:
+            self._bind().set()
+
+        return True
+
+    def close(self) -> None:
+        """Write all waiting rows in the calling thread."""
+        while rows := self._take():
+            try:
+                self._write(rows)
+                dropped = 0
+            except Exception:
+                dropped = self._write_apart(rows)
+
+            self.dropped += dropped
+            self.written += len(rows) - dropped
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Case, OuterRef, Subquery, Value, When
+
+from accounts.models import Setting
+from notifications.models import Notification, NotificationFlag
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the account and flags columns of notifications '
+        'from their settings and boolean fields.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    @staticmethod
+    def _get_flags_expression():
+        flags = Value(0)
+
+        for name in Notification.FIELDS:
+            flags += Case(
+                When(**{name: True},
+                     then=Value(NotificationFlag.for_field(name).value)),
+                default=Value(0),
+            )
+
+        return flags
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        account = Subquery(
+            Setting.objects.filter(pk=OuterRef('setting_id'))
+            .values('account_id')[:1]
+        )
+        flags = self._get_flags_expression()
+        pks = Notification.objects.order_by('pk').values_list('pk', flat=True)
+        after = 0
+        updated = 0
+
+        while batch := list(pks.filter(pk__gt=after)[:batch_size]):
+            updated += Notification.objects.filter(
+                pk__gte=batch[0], pk__lte=batch[-1]
+            ).update(account=account, flags=flags)
+            after = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Notification flags filled for {updated} notifications.'))
@@ -1,13 +1,68 @@
+from enum import IntFlag
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from config.settings import AUTH_USER_MODEL
+
+
+class NotificationFlag(IntFlag):
+    """One bit of `Notification.flags` per notification field."""
+    SIGNUP = 1 << 0
+    LOGIN = 1 << 1
+    CHANGING_PROFILE = 1 << 2
+    CHANGING_SETTING = 1 << 3
+    SB_LIKED_COMMENT = 1 << 4
+    SB_REPLIED_TO_COMMENT = 1 << 5
+    SB_LIKED_ARTICLE = 1 << 6
+    NEW_COMMENT = 1 << 7
+    SB_LIKED_ANIMAL = 1 << 8
+    NEW_MESSAGE = 1 << 9
+    DEAL_START = 1 << 10
+    DEAL_TIMEOUT = 1 << 11
+    DEAL_FINISH = 1 << 12
+    REFILL = 1 << 13
+
+    @classmethod
+    def get_all(cls) -> 'NotificationFlag':
+        return cls((1 << len(cls)) - 1)
+
+    @classmethod
+    def for_field(cls, name: str) -> 'NotificationFlag':
+        return cls[name.upper()]
+
+    @classmethod
+    def from_fields(cls, **fields: bool) -> 'NotificationFlag':
+        """Pack values of notification fields into flags."""
+        flags = cls(0)
+
+        for name, enabled in fields.items():
+            if enabled:
+                flags |= cls.for_field(name)
+
+        return flags
+
 
 class Notification(models.Model):
-    """Notifications of an account."""
+    """
+    Notifications of an account.
+
+    Every boolean field is also packed into `flags`,
+    so an audience of one event is read from the
+    `(account, flags)` index without joins.
+    """
+    FIELDS = tuple(flag.name.lower() for flag in NotificationFlag)
+
     setting = models.OneToOneField(
         'accounts.Setting', on_delete=models.CASCADE,
         verbose_name=_('setting')
     )
+    account = models.OneToOneField(
+        AUTH_USER_MODEL, on_delete=models.CASCADE, blank=True, null=True,
+        verbose_name=_('account')
+    )
+    flags = models.PositiveIntegerField(
+        _('flags'), default=NotificationFlag.get_all().value, editable=False)
     signup = models.BooleanField(_('signup'), default=True)
     login = models.BooleanField(_('login'), default=True)
     changing_profile = models.BooleanField(_('changing profile'), default=True)
@@ -30,8 +85,27 @@ class Notification(models.Model):
     class Meta:
         db_table = 'notification'
         ordering = 'setting__account',
+        indexes = [
+            models.Index(
+                fields=('account', 'flags'),
+                name='notification_account_flags_idx'
+            ),
+        ]
         verbose_name = _('notification')
         verbose_name_plural = _('notifications')
 
     def __str__(self):
         return str(self.setting.account)
+
+    def save(self, *args, **kwargs):
+        if self.account_id is None:
+            self.account_id = self.setting.account_id
+
+        self.flags = NotificationFlag.from_fields(
+            **{name: getattr(self, name) for name in self.FIELDS}).value
+
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {
+                *kwargs['update_fields'], 'account', 'flags'}
+
+        super().save(*args, **kwargs)
@@ -0,0 +1,19 @@
+from typing import NamedTuple
+
+
+class NotificationEvent(NamedTuple):
+    """
+    Domain event to notify accounts about.
+
+    `name` is a notification field, for example `new_message`.
+    Without `account_ids` everybody with the event enabled is notified.
+    """
+    name: str
+    context: dict | None = None
+    account_ids: tuple[int, ...] | None = None
+
+
+class NotificationRecipient(NamedTuple):
+    pk: int
+    email: str
+    language: str
@@ -1,22 +1,181 @@
+from typing import Iterable, Iterator
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from config.settings import MODEL_OBJECT_CACHE_TIMEOUT
+from core.db_routers import replica_read
+from core.redis_client import get_redis
 from core.repository import ModelObject
-from notifications.models import Notification
+from notifications.models import Notification, NotificationFlag
+from notifications.services.data_structures import NotificationRecipient
+
+Account = get_user_model()
 
 
 class NotificationUpdate:
     """Logic for updating `Notification` model."""
-    _model_object = ModelObject(Notification)
+    _model_object = ModelObject(
+        Notification, MODEL_OBJECT_CACHE_TIMEOUT)
+
+    @staticmethod
+    def _get_flags_expression(**kwargs):
+        """Set and clear bits of updated fields in the same query."""
+        fields = {
+            name: value for name, value in kwargs.items()
+            if name in Notification.FIELDS
+        }
+        enabled = NotificationFlag.from_fields(**fields)
+        disabled = NotificationFlag.from_fields(
+            **{name: not value for name, value in fields.items()})
+
+        return F('flags').bitand(
+            (NotificationFlag.get_all() & ~disabled).value
+        ).bitor(enabled.value)
 
     def update_fields_by_pk(self, pk: int, **kwargs) -> None:
+        if any(name in Notification.FIELDS for name in kwargs):
+            kwargs['flags'] = self._get_flags_expression(**kwargs)
+
         self._model_object.update_fields_by_pk(pk, **kwargs)
 
 
 class NotificationGet:
     """Logic for getting `Notification` model."""
-    _model_object = ModelObject(Notification)
+    _model_object = ModelObject(
+        Notification, MODEL_OBJECT_CACHE_TIMEOUT)
 
+    @replica_read
     def get_notification(self, fields: tuple, **kwargs: int) -> dict:
         return self._model_object.get_model_object(fields, **kwargs)
 
 
 class NotificationRepository(NotificationGet, NotificationUpdate):
     """Logic for `Notification` model."""
+
+
+class NotificationAudience:
+    """
+    Logic for getting accounts that want a notification.
+
+    Account ids are read from the `(account, flags)` index
+    with keyset pagination, no model object is created.
+    """
+    @staticmethod
+    def _get_flag(event: NotificationFlag | str) -> NotificationFlag:
+        return (event if isinstance(event, NotificationFlag)
+                else NotificationFlag.for_field(event))
+
+    @staticmethod
+    def _get_enabled(flag: NotificationFlag):
+        return (
+            Notification.objects
+            .alias(enabled=F('flags').bitand(flag.value))
+            .filter(enabled=flag.value)
+            .order_by('account_id')
+            .values_list('account_id', flat=True)
+        )
+
+    def _get_batch(self, flag: NotificationFlag, after: int,
+                   batch_size: int) -> list[int]:
+        return list(
+            self._get_enabled(flag).filter(account_id__gt=after)[:batch_size])
+
+    def filter_recipient_ids(self, event: NotificationFlag | str,
+                             account_ids: Iterable[int]) -> list[int]:
+        """Keep only accounts of `account_ids` with `event` enabled."""
+        return list(self._get_enabled(self._get_flag(event)).filter(
+            account_id__in=account_ids))
+
+    def get_recipient_ids(self, event: NotificationFlag | str,
+                          batch_size: int = 1000) -> Iterator[list[int]]:
+        """Yield ids of accounts with `event` enabled batch by batch."""
+        flag = self._get_flag(event)
+        after = 0
+
+        while batch := self._get_batch(flag, after, batch_size):
+            yield batch
+
+            if len(batch) < batch_size:
+                return
+
+            after = batch[-1]
+
+
+class RecipientGet:
+    """Logic for getting the contact data of notified accounts."""
+    @staticmethod
+    def get_recipients(account_ids: Iterable[int]) \
+            -> list[NotificationRecipient]:
+        recipients = Account.objects.filter(
+            pk__in=account_ids, email__isnull=False
+        ).order_by().values_list('pk', 'email', 'setting__language')
+
+        return [NotificationRecipient._make(values) for values in recipients]
+
+
+class NotificationDigestStorage:
+    """
+    Logic for events waiting in Redis to be sent as a digest.
+
+    Every account has a hash of event counters, accounts
+    with anything to send are kept in one set.
+    """
+    _pending_key = 'notifications:digest:pending'
+
+    @staticmethod
+    def _get_key(account_id: int) -> str:
+        return f'notifications:digest:{account_id}'
+
+    def add(self, event_name: str, account_ids: Iterable[int]) -> None:
+        account_ids = list(account_ids)
+
+        if not account_ids:
+            return
+
+        pipeline = get_redis().pipeline(transaction=False)
+
+        for account_id in account_ids:
+            pipeline.hincrby(self._get_key(account_id), event_name, 1)
+
+        pipeline.sadd(self._pending_key, *account_ids)
+        pipeline.execute()
+
+    def restore(self, digests: dict[int, dict[str, int]]) -> None:
+        """Add popped counters back, for example if sending failed."""
+        pipeline = get_redis().pipeline(transaction=False)
+
+        for account_id, counters in digests.items():
+            for event_name, count in counters.items():
+                pipeline.hincrby(self._get_key(account_id), event_name, count)
+
+        if digests:
+            pipeline.sadd(self._pending_key, *digests)
+
+        pipeline.execute()
+
+    def pop(self, count: int) -> dict[int, dict[str, int]]:
+        """Remove and return counters of up to `count` accounts."""
+        redis = get_redis()
+        account_ids = [int(account_id) for account_id
+                       in redis.spop(self._pending_key, count) or ()]
+
+        if not account_ids:
+            return {}
+
+        pipeline = redis.pipeline(transaction=True)
+
+        for account_id in account_ids:
+            pipeline.hgetall(self._get_key(account_id))
+            pipeline.delete(self._get_key(account_id))
+
+        results = pipeline.execute()[::2]
+
+        return {
+            account_id: {
+                event_name.decode(): int(count)
+                for event_name, count in counters.items()
+            }
+            for account_id, counters in zip(account_ids, results)
+            if counters
+        }
@@ -0,0 +1,162 @@
+"""
+This module is used for working with
+application logic in the app.
+
+Repository + domain logic.
+"""
+from itertools import groupby
+from operator import attrgetter
+from typing import Any, Callable, Iterator
+
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.utils import translation
+from redis import RedisError
+
+from config.settings import (
+    CELERY_EMAIL_BACKEND, NOTIFICATION_BATCH_SIZE, NOTIFICATION_DIGEST_EVENTS
+)
+from notifications.models import Notification
+from notifications.services.data_structures import (
+    NotificationEvent, NotificationRecipient
+)
+from notifications.services.repository import (
+    NotificationAudience, NotificationDigestStorage, RecipientGet
+)
+
+
+class NotificationDispatcher:
+    """
+    Logic for turning a domain event into batches of recipients.
+
+    Every batch is given to `enqueue` as one task.
+    Events of `NOTIFICATION_DIGEST_EVENTS` are collected
+    in Redis instead and sent later as one digest email.
+    """
+    _audience = NotificationAudience()
+    _digest_storage = NotificationDigestStorage()
+
+    def __init__(self, enqueue: Callable[[str, dict, list[int]], Any],
+                 batch_size: int = NOTIFICATION_BATCH_SIZE):
+        self.enqueue = enqueue
+        self.batch_size = batch_size
+
+    def get_batches(self, event: NotificationEvent) -> Iterator[list[int]]:
+        if event.account_ids is None:
+            yield from self._audience.get_recipient_ids(
+                event.name, self.batch_size)
+            return
+
+        account_ids = list(event.account_ids)
+
+        for start in range(0, len(account_ids), self.batch_size):
+            batch = self._audience.filter_recipient_ids(
+                event.name, account_ids[start:start + self.batch_size])
+
+            if batch:
+                yield batch
+
+    def dispatch(self, event: NotificationEvent) -> int:
+        """Return the number of accounts to notify."""
+        count = 0
+
+        for batch in self.get_batches(event):
+            count += len(batch)
+
+            if event.name in NOTIFICATION_DIGEST_EVENTS:
+                try:
+                    self._digest_storage.add(event.name, batch)
+                    continue
+                except RedisError:
+                    pass
+
+            self.enqueue(event.name, event.context or {}, batch)
+
+        return count
+
+
+class NotificationSender:
+    """
+    Logic for sending notification emails.
+
+    A message is rendered once per language of a batch
+    and every email of the batch goes through one connection.
+    """
+    _recipient_get = RecipientGet()
+    _digest_storage = NotificationDigestStorage()
+
+    @staticmethod
+    def _get_title(event_name: str) -> str:
+        return str(Notification._meta.get_field(event_name).verbose_name)
+
+    @staticmethod
+    def _render(template_name: str, context: dict) -> tuple[str, str]:
+        subject = render_to_string(
+            f'notifications/email/{template_name}_subject.txt', context)
+        body = render_to_string(
+            f'notifications/email/{template_name}_message.txt', context)
+
+        return ' '.join(subject.split()), body
+
+    def get_messages(self, event_name: str, context: dict,
+                     recipients: list[NotificationRecipient]) \
+            -> list[EmailMessage]:
+        messages = []
+        recipients = sorted(recipients, key=attrgetter('language'))
+
+        for language, group in groupby(recipients, key=attrgetter('language')):
+            with translation.override(language):
+                subject, body = self._render('notification', {
+                    **context, 'title': self._get_title(event_name)})
+
+            messages.extend(
+                EmailMessage(subject, body, to=[recipient.email])
+                for recipient in group
+            )
+
+        return messages
+
+    def get_digest_messages(
+            self, digests: dict[int, dict[str, int]],
+            recipients: list[NotificationRecipient]
+    ) -> list[EmailMessage]:
+        messages = []
+
+        for recipient in recipients:
+            with translation.override(recipient.language):
+                events = [
+                    (self._get_title(event_name), count)
+                    for event_name, count in digests[recipient.pk].items()
+                ]
+                subject, body = self._render('digest', {'events': events})
+
+            messages.append(EmailMessage(subject, body, to=[recipient.email]))
+
+        return messages
+
+    @staticmethod
+    def _send(messages: list[EmailMessage]) -> int:
+        if not messages:
+            return 0
+
+        return get_connection(CELERY_EMAIL_BACKEND).send_messages(messages)
+
+    def send(self, event_name: str, context: dict,
+             account_ids: list[int]) -> int:
+        recipients = self._recipient_get.get_recipients(account_ids)
+        return self._send(self.get_messages(event_name, context, recipients))
+
+    def send_digests(self, batch_size: int = NOTIFICATION_BATCH_SIZE) -> int:
+        sent = 0
+
+        while digests := self._digest_storage.pop(batch_size):
+            try:
+                recipients = self._recipient_get.get_recipients(digests)
+                sent += self._send(
+                    self.get_digest_messages(digests, recipients))
+            except Exception:
+                # Sent again with the next digests, maybe twice for some.
+                self._digest_storage.restore(digests)
+                raise
+
+        return sent
@@ -0,0 +1,30 @@
+from config.celery import app
+from notifications.services.data_structures import NotificationEvent
+from notifications.services.services import (
+    NotificationDispatcher, NotificationSender
+)
+
+
+@app.task
+def send_notification_batch(event_name: str, context: dict,
+                            account_ids: list[int]) -> int:
+    return NotificationSender().send(event_name, context, account_ids)
+
+
+@app.task
+def dispatch_notification_event(
+        event_name: str, context: dict | None = None,
+        account_ids: list[int] | None = None
+) -> int:
+    """Resolve recipients of the event and enqueue their batches."""
+    event = NotificationEvent(
+        event_name, context,
+        None if account_ids is None else tuple(account_ids)
+    )
+    dispatcher = NotificationDispatcher(send_notification_batch.delay)
+    return dispatcher.dispatch(event)
+
+
+@app.task
+def send_notification_digests() -> int:
+    return NotificationSender().send_digests()
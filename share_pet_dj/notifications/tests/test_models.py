@@ -1,8 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-from accounts.models import Setting
-from notifications.models import Notification
+from notifications.models import Notification, NotificationFlag
 
 Account = get_user_model()
 
@@ -13,10 +12,10 @@ class NotificationModelTest(TestCase):
         cls.account = Account.objects.create()
 
     def test_create(self):
-        """Notification instance is created correctly."""
-        setting = Setting.objects.create(account=self.account)
-        notification = Notification.objects.create(
-            setting=setting, refill=False)
+        """Notification instance is created together with the account."""
+        notification = self.account.setting.notification
+        notification.refill = False
+        notification.save()
 
         self.assertEquals(Notification.objects.count(), 1)
         self.assertEquals(notification.setting.account, self.account)
@@ -40,26 +39,19 @@ class NotificationModelTest(TestCase):
         Model instance must have db table
         with particular name.
         """
-        setting = Setting.objects.create(account=self.account)
-        notification = Notification.objects.create(setting=setting)
+        notification = self.account.setting.notification
         self.assertEquals(notification._meta.db_table, 'notification')
 
     def test_ordering(self):
         """Model instances must be ordered by account date_joined."""
-        setting1 = Setting.objects.create(account=self.account)
-        Notification.objects.create(setting=setting1)
         account2 = Account.objects.create()
-        setting2 = Setting.objects.create(account=account2)
-        notification2 = Notification.objects.create(setting=setting2)
+        notification2 = account2.setting.notification
 
         last_notification = Notification.objects.last()
 
         self.assertEquals(last_notification, notification2)
 
-        account3 = Account.objects.create(
-            date_joined=self.account.date_joined)
-        setting3 = Setting.objects.create(account=account3)
-        Notification.objects.create(setting=setting3)
+        Account.objects.create(date_joined=self.account.date_joined)
 
         last_notification = Notification.objects.last()
 
@@ -73,11 +65,31 @@ class NotificationModelTest(TestCase):
         account1 = Account.objects.create(username='username1')
         account2 = Account.objects.create(email='email2')
 
-        setting1 = Setting.objects.create(account=account1)
-        setting2 = Setting.objects.create(account=account2)
-
-        notification1 = Notification.objects.create(setting=setting1)
-        notification2 = Notification.objects.create(setting=setting2)
+        notification1 = account1.setting.notification
+        notification2 = account2.setting.notification
 
         self.assertEquals(str(notification1), account1.username)
         self.assertEquals(str(notification2), account2.email)
+
+    def test_flags(self):
+        """Account and flags are filled from the setting and fields."""
+        notification = self.account.setting.notification
+        notification.refill = False
+        notification.login = False
+        notification.save()
+
+        self.assertEquals(notification.account, self.account)
+        self.assertEquals(
+            notification.flags,
+            NotificationFlag.get_all() &
+            ~NotificationFlag.REFILL & ~NotificationFlag.LOGIN
+        )
+
+        notification.refill = True
+        notification.save(update_fields=['refill'])
+        notification.refresh_from_db()
+
+        self.assertEquals(
+            notification.flags,
+            NotificationFlag.get_all() & ~NotificationFlag.LOGIN
+        )
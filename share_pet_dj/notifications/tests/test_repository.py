@@ -0,0 +1,98 @@
+import io
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from notifications.models import Notification, NotificationFlag
+from core.tests.test_sessions import is_redis_available
+from notifications.services.repository import (
+    NotificationAudience, NotificationDigestStorage, NotificationRepository
+)
+
+Account = get_user_model()
+
+
+class NotificationRepositoryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        account = Account.objects.create()
+        cls.notification = notification = account.setting.notification
+        notification.refill = False
+        notification.save()
+
+    def test_update_fields_by_pk(self):
+        """Updated fields are packed into flags in the same query."""
+        with self.assertNumQueries(1):
+            NotificationRepository().update_fields_by_pk(
+                self.notification.pk, refill=True, new_message=False)
+
+        self.notification.refresh_from_db()
+
+        self.assertTrue(self.notification.refill)
+        self.assertFalse(self.notification.new_message)
+        self.assertEquals(
+            self.notification.flags,
+            NotificationFlag.get_all() & ~NotificationFlag.NEW_MESSAGE
+        )
+
+    def test_backfill_notification_flags(self):
+        """Flags and account are restored from boolean fields."""
+        Notification.objects.update(account=None, flags=0)
+
+        call_command('backfill_notification_flags', stdout=io.StringIO())
+        self.notification.refresh_from_db()
+
+        self.assertEquals(
+            self.notification.account_id, self.notification.setting.account_id)
+        self.assertEquals(
+            self.notification.flags,
+            NotificationFlag.get_all() & ~NotificationFlag.REFILL
+        )
+
+
+class NotificationAudienceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account_pks = []
+
+        for i in range(5):
+            account = Account.objects.create(username=f'username{i}')
+            notification = account.setting.notification
+            notification.new_message = i != 2
+            notification.save()
+            cls.account_pks.append(account.pk)
+
+    def test_get_recipient_ids(self):
+        """Only accounts with the event enabled are yielded in batches."""
+        with self.assertNumQueries(3):
+            batches = list(NotificationAudience().get_recipient_ids(
+                'new_message', batch_size=2))
+
+        pks = self.account_pks
+        self.assertEquals(batches, [[pks[0], pks[1]], [pks[3], pks[4]]])
+
+    def test_get_recipient_ids_flag(self):
+        """Event can be given as a flag."""
+        batches = list(NotificationAudience().get_recipient_ids(
+            NotificationFlag.REFILL, batch_size=10))
+
+        self.assertEquals(batches, [self.account_pks])
+
+
+@skipUnless(is_redis_available(), 'Redis is not available')
+class NotificationDigestStorageTest(SimpleTestCase):
+    def setUp(self):
+        self.storage = NotificationDigestStorage()
+        self.addCleanup(self.storage.pop, 100)
+
+    def test_restore(self):
+        """Restored counters are added to the ones of new events."""
+        self.storage.add('login', [1, 2])
+        digests = self.storage.pop(100)
+        self.storage.add('login', [1])
+        self.storage.restore(digests)
+
+        self.assertEquals(self.storage.pop(100),
+                          {1: {'login': 2}, 2: {'login': 1}})
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from notifications.services.data_structures import (
+    NotificationEvent, NotificationRecipient
+)
+from notifications.services.services import (
+    NotificationDispatcher, NotificationSender
+)
+
+Account = get_user_model()
+
+
+class NotificationDispatcherTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account_pks = []
+
+        for i in range(5):
+            account = Account.objects.create(
+                username=f'username{i}', email=f'email{i}@gmail.com')
+            notification = account.setting.notification
+            notification.new_message = i != 2
+            notification.save()
+            cls.account_pks.append(account.pk)
+
+    def setUp(self):
+        self.enqueued = []
+        self.dispatcher = NotificationDispatcher(
+            lambda *args: self.enqueued.append(args), batch_size=2)
+
+    def test_dispatch(self):
+        """Every batch of enabled accounts is enqueued once."""
+        count = self.dispatcher.dispatch(
+            NotificationEvent('new_message', {'text': 'Hi'}))
+        pks = self.account_pks
+
+        self.assertEquals(count, 4)
+        self.assertEquals(self.enqueued, [
+            ('new_message', {'text': 'Hi'}, [pks[0], pks[1]]),
+            ('new_message', {'text': 'Hi'}, [pks[3], pks[4]]),
+        ])
+
+    def test_dispatch_account_ids(self):
+        """Given accounts are filtered by their flags."""
+        pks = self.account_pks
+        count = self.dispatcher.dispatch(NotificationEvent(
+            'new_message', account_ids=(pks[1], pks[2])))
+
+        self.assertEquals(count, 1)
+        self.assertEquals(self.enqueued, [('new_message', {}, [pks[1]])])
+
+
+class NotificationSenderTest(TestCase):
+    def setUp(self):
+        self.sender = NotificationSender()
+        self.recipients = [
+            NotificationRecipient(1, 'email1@gmail.com', 'en'),
+            NotificationRecipient(2, 'email2@gmail.com', 'ru'),
+            NotificationRecipient(3, 'email3@gmail.com', 'en'),
+        ]
+
+    def test_get_messages(self):
+        """Every recipient gets one message with the event title."""
+        messages = self.sender.get_messages(
+            'new_message', {'text': 'Hi there'}, self.recipients)
+
+        self.assertEquals(
+            sorted(message.to[0] for message in messages),
+            ['email1@gmail.com', 'email2@gmail.com', 'email3@gmail.com']
+        )
+        self.assertEquals(messages[0].subject, 'SharePet: new message')
+        self.assertIn('Hi there', messages[0].body)
+
+    def test_get_digest_messages(self):
+        """Counters of one account are merged into one message."""
+        messages = self.sender.get_digest_messages(
+            {1: {'sb_liked_animal': 50, 'sb_liked_comment': 2}},
+            self.recipients[:1]
+        )
+
+        self.assertEquals(len(messages), 1)
+        self.assertIn('somebody liked animal: 50', messages[0].body)
+        self.assertIn('somebody liked comment: 2', messages[0].body)
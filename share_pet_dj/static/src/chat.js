@@ -1,23 +1,188 @@
 const roomName = JSON.parse(document.getElementById('room-name').textContent);
-const sender = JSON.parse(document.getElementById('sender').textContent);
 const sendButton = document.querySelector('#send-button');
 const textArea = document.querySelector('#id_text');
+const chat = document.querySelector('.chat');
+const historyUrl = JSON.parse(document.getElementById('history-url').textContent);
+let nextCursor = JSON.parse(document.getElementById('next-cursor').textContent);
+let historyLoading = false;
 
-const chatSocket = new WebSocket(
-    'ws://'
-    + window.location.host
-    + '/ws/chat/'
-    + roomName
-    + '/'
-);
+// Binary frames need msgpack and inflating of large frames.
+const protocols = ['sharepet.v2.json'];
+if (window.MessagePack && window.DecompressionStream) {
+    protocols.unshift('sharepet.v2.msgpack');
+}
 
-chatSocket.onmessage = function(e) {
-    const data = JSON.parse(e.data);
+const PLAIN = 0;
+const DEFLATED = 1;
+const BATCH_INTERVAL = 20;
+const MAX_RECONNECT_DELAY = 30000;
+let chatSocket = null;
+let reconnectAttempts = 0;
+let outbox = [];
+let lastSeq = JSON.parse(document.getElementById('last-seq').textContent);
+
+// Messages may be delivered more than once.
+const receivedIds = new Set();
+
+async function decodeFrame(data) {
+    if (typeof data === 'string') {
+        return JSON.parse(data);
+    }
+
+    const bytes = new Uint8Array(data);
+    let payload = bytes.subarray(1);
+
+    if (bytes[0] === DEFLATED) {
+        const stream = new Blob([payload]).stream()
+            .pipeThrough(new DecompressionStream('deflate'));
+        payload = new Uint8Array(await new Response(stream).arrayBuffer());
+    }
+
+    return MessagePack.decode(payload);
+}
+
+function encodeFrame(events) {
+    const frame = {'v': 2, 'events': events};
+
+    if (chatSocket.protocol !== 'sharepet.v2.msgpack') {
+        return JSON.stringify(frame);
+    }
+
+    const payload = MessagePack.encode(frame);
+    const bytes = new Uint8Array(payload.length + 1);
+    bytes[0] = PLAIN;
+    bytes.set(payload, 1);
+
+    return bytes;
+}
+
+function showMessage(event) {
+    if (receivedIds.has(event.id)) {
+        return;
+    }
+    receivedIds.add(event.id);
 
     let div = document.createElement('div');
+    let date = document.createElement('i');
+    let name = document.createElement('b');
     div.className = 'message';
-    div.innerHTML = data.text + '<b>' + sender + '</b>';
-    document.querySelector('.chat').appendChild(div);
+    date.textContent = new Date(event.date_sent).toLocaleString();
+    name.textContent = event.sender;
+    div.append(date, event.text, name);
+    chat.appendChild(div);
+    chat.scrollTop = chat.scrollHeight;
+}
+
+function handleEvent(event) {
+    if (event.seq !== undefined) {
+        if (lastSeq !== null && event.seq <= lastSeq) {
+            return;
+        }
+        if (lastSeq !== null && event.seq > lastSeq + 1) {
+            sendEvent({'type': 'resume', 'seq': lastSeq});
+            return;
+        }
+        lastSeq = event.seq;
+    }
+
+    if (event.type === 'reset') {
+        window.location.reload();
+    } else if (event.type === 'error') {
+        alert(event.error);
+    } else if (event.type === 'message') {
+        showMessage(event);
+    }
+}
+
+// Frames are decoded asynchronously but handled in order.
+let received = Promise.resolve();
+
+function flushOutbox() {
+    if (outbox.length && chatSocket.readyState === WebSocket.OPEN) {
+        chatSocket.send(encodeFrame(outbox));
+        outbox = [];
+    }
+}
+
+// Events sent together in a short time share one frame.
+function sendEvent(event) {
+    outbox.push(event);
+
+    if (outbox.length === 1) {
+        setTimeout(flushOutbox, BATCH_INTERVAL);
+    }
+}
+
+function connect() {
+    chatSocket = new WebSocket(
+        'ws://'
+        + window.location.host
+        + '/ws/chat/'
+        + roomName
+        + '/',
+        protocols
+    );
+    chatSocket.binaryType = 'arraybuffer';
+
+    chatSocket.onopen = function(e) {
+        reconnectAttempts = 0;
+
+        // Only missed events are replayed, not the whole history.
+        if (lastSeq !== null) {
+            outbox.unshift({'type': 'resume', 'seq': lastSeq});
+        }
+        flushOutbox();
+    };
+
+    chatSocket.onmessage = function(e) {
+        const frame = decodeFrame(e.data);
+
+        received = received.then(() => frame).then(data => {
+            data.events.forEach(handleEvent);
+        });
+    };
+
+    // Random delays spread reconnects of all clients after deploys.
+    chatSocket.onclose = function(e) {
+        // Banned or the chat does not exist.
+        if (e.code === 4003 || e.code === 4004) {
+            return;
+        }
+
+        const delay = Math.min(MAX_RECONNECT_DELAY, 1000 * 2 ** reconnectAttempts);
+
+        reconnectAttempts += 1;
+        setTimeout(connect, delay / 2 + Math.random() * delay / 2);
+    };
+}
+
+connect();
+
+function loadHistory() {
+    if (historyLoading || nextCursor === null) {
+        return;
+    }
+
+    historyLoading = true;
+    fetch(historyUrl + '?cursor=' + encodeURIComponent(nextCursor))
+        .then(response => response.json())
+        .then(data => {
+            const height = chat.scrollHeight;
+
+            chat.insertAdjacentHTML('afterbegin', data.html);
+            chat.scrollTop += chat.scrollHeight - height;
+            nextCursor = data.next;
+        })
+        .finally(() => {
+            historyLoading = false;
+        });
+}
+
+chat.scrollTop = chat.scrollHeight;
+chat.onscroll = function(e) {
+    if (chat.scrollTop < 100) {
+        loadHistory();
+    }
 };
 
 textArea.focus();
@@ -28,9 +193,6 @@ textArea.onkeyup = function(e) {
 };
 
 sendButton.onclick = function(e) {
-    const message = textArea.value;
-    chatSocket.send(JSON.stringify({
-        'message': message
-    }));
+    sendEvent({'type': 'message', 'text': textArea.value});
     textArea.value = '';
 };
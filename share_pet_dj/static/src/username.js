@@ -0,0 +1,32 @@
+const usernameInput = document.querySelector('#id_username');
+const availabilityUrl = JSON.parse(
+    document.getElementById('username-availability-url').textContent
+);
+
+if (usernameInput !== null) {
+    const hint = document.createElement('small');
+    usernameInput.insertAdjacentElement('afterend', hint);
+
+    let timer = null;
+    usernameInput.oninput = function(e) {
+        clearTimeout(timer);
+        timer = setTimeout(function() {
+            const username = usernameInput.value.trim();
+            if (username === '') {
+                hint.textContent = '';
+                return;
+            }
+
+            fetch(availabilityUrl + '?username=' + encodeURIComponent(username))
+                .then(response => response.json())
+                .then(function(data) {
+                    if (data.username !== usernameInput.value.trim()) {
+                        return;
+                    }
+                    hint.textContent = data.available
+                        ? 'Username is available.'
+                        : 'Username is taken or can not be used.';
+                });
+        }, 300);
+    };
+}